@@ -0,0 +1,231 @@
+import argparse
+import csv
+import importlib.util
+import json
+import os
+import tempfile
+import threading
+import time
+
+import numpy as np
+
+# 캐시를 켜면 두 번째 실행부터 호출이 사라지므로 기본은 끔 (모듈 import 전에 설정)
+os.environ.setdefault("LLM_CACHE", "0")
+# 스크립트가 import 시점에 빈 키로 클라이언트를 만들기 때문에 더미 키를 넣어둠
+os.environ.setdefault("GOOGLE_API_KEY", "mock")
+
+from common.adaptive import reset_controllers
+from common.corpus import DATASET_DIR, load_rows
+from mock_llm_server import MockLLMServer, add_config_arguments, config_from_args, gemini_client, openai_client
+
+
+TRUTHFULQA_KO = os.path.join(DATASET_DIR, "gemini", "accuracy_eval_dataset", "TruthfulQA_ko_eval_gemini3.csv")
+TRUTHFULQA_JEJU = os.path.join(DATASET_DIR, "gemini", "translation_dataset", "truthfulqa_Jeju.gemini-2.5-pro.csv")
+MEDNLI_JEJU = os.path.join(DATASET_DIR, "gemini", "translation_dataset", "mednli_Jeju.gemini-2.5-pro.csv")
+
+RESULT_FIELDS = ["scenario", "rows", "seconds", "rows_per_sec", "calls", "p50_ms", "p99_ms",
+                 "requests", "rate_limited", "server_errors", "call_errors", "error_rows", "cached_tokens"]
+
+
+#############################################
+# 스크립트 모듈 로드 + 모의 클라이언트 / 호출 계측 주입
+#############################################
+def load_script(relpath):
+    path = os.path.join(DATASET_DIR, relpath)
+    name = "bench_" + os.path.basename(path).replace(" ", "_").replace(".py", "")
+    spec = importlib.util.spec_from_file_location(name, path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+class CallRecorder:
+    """LLM 호출 함수를 감싸서 호출별 지연 / 예외 수를 기록"""
+
+    def __init__(self):
+        self.latencies = []
+        self.errors = 0
+        self.lock = threading.Lock()
+
+    def wrap(self, func):
+        def timed(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            except Exception:
+                with self.lock:
+                    self.errors += 1
+                raise
+            finally:
+                with self.lock:
+                    self.latencies.append(time.perf_counter() - start)
+        return timed
+
+
+def prepare(module, options, recorder, call_name):
+    """속도 제한 / 동시성 / 묶음 크기 덮어쓰기 + 호출 계측"""
+    module.RESUME = False
+    if not options.keep_limits:
+        # 할당량은 모의 서버의 --server-rpm 으로 흉내 내고, 스크립트 쪽 버킷은 끔
+        module.RPM = module.TPM = None
+    if options.concurrency:
+        module.CONCURRENCY = options.concurrency
+    if options.batch_size is not None and hasattr(module, "BATCH_SIZE"):
+        module.BATCH_SIZE = options.batch_size
+    setattr(module, call_name, recorder.wrap(getattr(module, call_name)))
+
+
+def sample_input(source, name, rows):
+    """원본 CSV 앞부분 rows 행을 작업 디렉터리에 name 으로 저장"""
+    fieldnames, data = load_rows(source)
+    with open(name, "w", encoding="utf-8", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=fieldnames)
+        writer.writeheader()
+        writer.writerows(data[:rows])
+    return name
+
+
+#############################################
+# 시나리오 — 실제 파일 처리 함수를 그대로 실행 (출력 파일 경로 목록 반환)
+#############################################
+def scenario_translate(url, options, recorder):
+    module = load_script(os.path.join("gemini", "gemini_translate.py"))
+    prepare(module, options, recorder, "gemini_generate")
+    module.client = gemini_client(url)
+    source = sample_input(TRUTHFULQA_KO, "truthfulqa_ko.bench.csv", options.rows)
+    module.process_TruthfulQA(source, "truthfulqa_Jeju.translated.csv", "Jeju")
+    return ["truthfulqa_Jeju.translated.csv"]
+
+
+def scenario_translate_fanout(url, options, recorder):
+    module = load_script(os.path.join("gemini", "gemini_translate.py"))
+    prepare(module, options, recorder, "gemini_generate")
+    module.client = gemini_client(url)
+    source = sample_input(TRUTHFULQA_KO, "truthfulqa_ko.bench.csv", options.rows)
+    outputs = {d: f"truthfulqa_{d}.fanout.csv" for d in module.DIALECT_NAMES}
+    module.process_fanout(source, outputs, module.TRUTHFULQA_COLUMNS, module.truthfulqa_fieldnames, module.truthfulqa_row)
+    return list(outputs.values())
+
+
+def scenario_hallucination_mednli(url, options, recorder):
+    module = load_script(os.path.join("gemini", "gemini _evaluation_Hallucination.py"))
+    prepare(module, options, recorder, "gemini_generate")
+    client = gemini_client(url)
+    module.get_client = lambda: client
+    source = sample_input(MEDNLI_JEJU, "mednli_jeju.bench.csv", options.rows)
+    module.process_mednli_file((source, "mednli_jeju_eval.csv", "jeju"))
+    return ["mednli_jeju_eval.csv"]
+
+
+def scenario_hallucination_truthfulqa(url, options, recorder):
+    module = load_script(os.path.join("gemini", "gemini _evaluation_Hallucination.py"))
+    prepare(module, options, recorder, "gemini_generate")
+    client = gemini_client(url)
+    module.get_client = lambda: client
+    source = sample_input(TRUTHFULQA_JEJU, "truthfulqa_Jeju.bench.csv", options.rows)
+    module.process_truthfulqa_file(source)
+    return [source.replace(".csv", "_evaluated.csv")]
+
+
+def scenario_chatgpt_truthfulqa(url, options, recorder):
+    module = load_script(os.path.join("chatgpt", "TruthfulQA_eval_Hallucination.py"))
+    prepare(module, options, recorder, "openai_chat")
+    module.client = openai_client(url, max_retries=0)
+    source = sample_input(TRUTHFULQA_JEJU, "truthfulqa_Jeju.bench.csv", options.rows)
+    module.evaluate_truthfulqa(source)
+    return [source.replace(".csv", "_evaluated.csv")]
+
+
+SCENARIOS = {
+    "translate": scenario_translate,
+    "translate_fanout": scenario_translate_fanout,
+    "hallucination_mednli": scenario_hallucination_mednli,
+    "hallucination_truthfulqa": scenario_hallucination_truthfulqa,
+    "chatgpt_truthfulqa": scenario_chatgpt_truthfulqa,
+}
+
+
+def count_error_rows(paths):
+    """출력 행 중 ERROR 로 기록된 행 수"""
+    errors = 0
+    for path in paths:
+        _, rows = load_rows(path)
+        errors += sum(any(str(v).startswith("ERROR") for v in row.values()) for row in rows)
+    return errors
+
+
+def run_scenario(name, server, options):
+    recorder = CallRecorder()
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory(prefix="bench") as workdir:
+        os.chdir(workdir)
+        try:
+            server.state.reset()
+            reset_controllers()
+            start = time.perf_counter()
+            outputs = SCENARIOS[name](server.url, options, recorder)
+            seconds = time.perf_counter() - start
+            error_rows = count_error_rows(outputs)
+        finally:
+            os.chdir(cwd)
+
+    served = server.stats()
+    latencies = np.array(recorder.latencies) * 1000
+    return {
+        "scenario": name,
+        "rows": options.rows,
+        "seconds": round(seconds, 2),
+        "rows_per_sec": round(options.rows / seconds, 2) if seconds else None,
+        "calls": len(latencies),
+        "p50_ms": round(float(np.percentile(latencies, 50)), 1) if len(latencies) else None,
+        "p99_ms": round(float(np.percentile(latencies, 99)), 1) if len(latencies) else None,
+        "requests": served["requests"],
+        # 429 / 503 응답 하나마다 재시도 한 번 (또는 행 실패)
+        "rate_limited": served["rate_limited"],
+        "server_errors": served["server_errors"],
+        "call_errors": recorder.errors,
+        "error_rows": error_rows,
+        # 컨텍스트 캐시 / 접두부 캐시로 처리된 입력 토큰 (--cache-min-tokens 로 캐시 최소 길이 조절)
+        "cached_tokens": served["cached_tokens"],
+    }
+
+
+def print_results(results):
+    header = "".join(f"{f:>14}" if i else f"{f:<26}" for i, f in enumerate(RESULT_FIELDS))
+    print("\n" + header)
+    print("-" * len(header))
+    for r in results:
+        print("".join(f"{str(r[f]):>14}" if i else f"{r[f]:<26}" for i, f in enumerate(RESULT_FIELDS)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="모의 서버로 번역 / 평가 파이프라인 처리량 측정 (할당량 소모 없음)")
+    parser.add_argument("scenarios", nargs="*", help=f"{' / '.join(SCENARIOS)} (기본: 전체)")
+    parser.add_argument("--rows", type=int, default=40, help="시나리오마다 처리할 행 수")
+    parser.add_argument("--concurrency", type=int, default=None, help="스크립트의 CONCURRENCY 덮어쓰기")
+    parser.add_argument("--batch-size", type=int, default=None, help="스크립트의 BATCH_SIZE 덮어쓰기")
+    parser.add_argument("--keep-limits", action="store_true", help="스크립트의 RPM / TPM 버킷 유지")
+    parser.add_argument("--output", default=None, help="결과를 JSON Lines 로 이어 쓰기 (변경 전후 비교용)")
+    add_config_arguments(parser)
+    args = parser.parse_args()
+    unknown = [name for name in args.scenarios if name not in SCENARIOS]
+    if unknown:
+        parser.error(f"알 수 없는 시나리오: {', '.join(unknown)}")
+
+    results = []
+    with MockLLMServer(**config_from_args(args)) as server:
+        for name in args.scenarios or list(SCENARIOS):
+            print(f"\n🏁 {name} ({args.rows}행) → {server.url}")
+            results.append(run_scenario(name, server, args))
+
+    print_results(results)
+    if args.output:
+        config = {k: v for k, v in vars(args).items() if k not in ("scenarios", "output")}
+        with open(args.output, "a", encoding="utf-8") as f:
+            for r in results:
+                f.write(json.dumps(dict(r, time=time.strftime("%Y-%m-%d %H:%M:%S"), config=config), ensure_ascii=False) + "\n")
+        print(f"\n📝 {args.output} 에 기록")
+
+
+if __name__ == "__main__":
+    main()
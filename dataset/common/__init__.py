@@ -0,0 +1 @@
+"""번역 / 평가 스크립트가 공통으로 사용하는 모듈 모음"""
@@ -0,0 +1,178 @@
+import re
+import threading
+import time
+from contextlib import contextmanager
+
+
+#############################################
+# 오류 분류 — 할당량 초과(429) / 과부하(503) / 일시적 오류 / 그 외
+#############################################
+THROTTLE_STATUS = {429, 503}
+THROTTLE_NAMES = {"ResourceExhausted", "RateLimitError", "TooManyRequests", "ServiceUnavailable"}
+TRANSIENT_NAMES = {"DeadlineExceeded", "Aborted", "APITimeoutError", "APIConnectionError",
+                   "ReadTimeout", "ConnectTimeout", "RemoteProtocolError"}
+
+
+def _retry_after(error):
+    """Retry-After 헤더 또는 Gemini RetryInfo(retryDelay: "12s") → 초, 없으면 None"""
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None)
+    if headers is not None:
+        value = headers.get("retry-after")
+        try:
+            return float(value) if value is not None else None
+        except ValueError:
+            pass
+    match = re.search(r"retryDelay['\"]?\s*[:=]\s*['\"]?([\d.]+)s", str(getattr(error, "details", "") or error))
+    return float(match.group(1)) if match else None
+
+
+def classify_error(error):
+    """("throttle" | "transient" | None, Retry-After 초)"""
+    name = type(error).__name__
+    status = getattr(error, "status_code", None) or getattr(error, "code", None)
+    if name in THROTTLE_NAMES or status in THROTTLE_STATUS:
+        return "throttle", _retry_after(error)
+    if name in TRANSIENT_NAMES or status in (500, 502, 504):
+        return "transient", _retry_after(error)
+    return None, None
+
+
+#############################################
+# AIMD 동시성 제어 — 성공하면 +1/limit 씩, 할당량 오류면 절반으로
+#############################################
+class AIMDController:
+    """
+    모델 하나의 동시 요청 한도를 조절한다 (스레드 여러 개에서 공유).
+    성공할 때마다 limit += increase / limit (한 번에 limit 개가 끝나면 약 +1),
+    429 / 503 이면 limit *= decrease 후 Retry-After 동안 새 요청을 멈춘다.
+    """
+
+    def __init__(self, name, initial=4, min_limit=1, max_limit=64, increase=1.0, decrease=0.5, cooldown=2.0):
+        self.name = name
+        self.limit = float(initial)
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.increase = increase
+        self.decrease = decrease
+        self.cooldown = cooldown
+        self.inflight = 0
+        self.resume_at = 0.0
+        self.last_cut = 0.0
+        self.latency = None
+        self.counters = {"success": 0, "throttle": 0, "transient": 0, "failed": 0, "cuts": 0}
+        self.cond = threading.Condition()
+
+    @contextmanager
+    def slot(self):
+        with self.cond:
+            while True:
+                wait = self.resume_at - time.monotonic()
+                if wait <= 0 and self.inflight < int(self.limit):
+                    break
+                self.cond.wait(timeout=wait if wait > 0 else None)
+            self.inflight += 1
+        try:
+            yield
+        finally:
+            self.release()
+
+    def try_slot(self, force=False):
+        """
+        기다리지 않고 빈 자리가 있으면 차지하고 True (hedge 중복 요청용, 끝나면 release()).
+        force=True 면 한도와 상관없이 차지 — 이미 보낸 요청이 slot 밖에서 계속 도는 동안 자리를 잡아 둠
+        """
+        with self.cond:
+            if not force and (self.resume_at > time.monotonic() or self.inflight >= int(self.limit)):
+                return False
+            self.inflight += 1
+            return True
+
+    def release(self):
+        with self.cond:
+            self.inflight -= 1
+            self.cond.notify_all()
+
+    def on_success(self, latency):
+        with self.cond:
+            self.counters["success"] += 1
+            self.limit = min(self.max_limit, self.limit + self.increase / self.limit)
+            self.latency = latency if self.latency is None else 0.9 * self.latency + 0.1 * latency
+            self.cond.notify_all()
+
+    def on_error(self, kind, retry_after=None):
+        with self.cond:
+            now = time.monotonic()
+            self.counters[kind] += 1
+            # 동시에 날아간 요청들이 한꺼번에 429를 받아도 한 번만 줄임 (왕복 시간당 1회)
+            if kind == "throttle" and now - self.last_cut >= (self.latency or 1.0):
+                self.limit = max(self.min_limit, self.limit * self.decrease)
+                self.last_cut = now
+                self.counters["cuts"] += 1
+            self.resume_at = max(self.resume_at, now + (retry_after if retry_after is not None else self.cooldown))
+
+    @property
+    def rate(self):
+        """현재 허용 처리량 추정 (분당 요청 수) = 동시 한도 / 평균 응답 시간"""
+        return self.limit / self.latency * 60 if self.latency else None
+
+    def call(self, func, max_retries=5):
+        """func() 실행, 할당량 / 일시적 오류는 max_retries 번까지 재시도 (그 외 예외는 바로 전달)"""
+        for attempt in range(max_retries):
+            with self.slot():
+                start = time.monotonic()
+                try:
+                    result = func()
+                except Exception as e:
+                    kind, retry_after = classify_error(e)
+                    if kind is None or attempt == max_retries - 1:
+                        with self.cond:
+                            self.counters["failed"] += 1
+                        raise
+                    self.on_error(kind, retry_after)
+                    continue
+            self.on_success(time.monotonic() - start)
+            return result
+
+    def snapshot(self):
+        with self.cond:
+            return dict(self.counters, name=self.name, limit=round(self.limit, 2), inflight=self.inflight,
+                        rate=round(self.rate, 1) if self.rate else None)
+
+
+_controllers = {}
+_controllers_lock = threading.Lock()
+
+
+def controller_for(model, **kwargs):
+    """모델별 제어기 (할당량이 모델 단위로 잡히므로 프로세스 안에서 모델당 하나)"""
+    with _controllers_lock:
+        if model not in _controllers:
+            _controllers[model] = AIMDController(model, **kwargs)
+        return _controllers[model]
+
+
+def reset_controllers():
+    with _controllers_lock:
+        _controllers.clear()
+
+
+def status_line():
+    """진행 표시줄용 — 모델별 현재 동시 한도 / 허용 처리량"""
+    with _controllers_lock:
+        controllers = list(_controllers.values())
+    parts = []
+    for c in controllers:
+        rate = c.rate
+        parts.append(f"{c.name} ×{c.limit:.1f}" + (f" ≈{rate:.0f}rpm" if rate else ""))
+    return ", ".join(parts)
+
+
+def print_controller_stats():
+    with _controllers_lock:
+        controllers = list(_controllers.values())
+    for c in controllers:
+        s = c.snapshot()
+        rate = f"{s['rate']} rpm" if s["rate"] else "-"
+        print(f"🎚️ {s['name']}: 동시 한도 {s['limit']} (허용 처리량 ≈ {rate}) / 성공 {s['success']}, "
+              f"429·503 {s['throttle']}회 (한도 축소 {s['cuts']}회), 일시 오류 {s['transient']}회, 실패 {s['failed']}회")
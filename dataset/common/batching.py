@@ -0,0 +1,106 @@
+import json
+import re
+
+
+#############################################
+# 여러 행을 한 번의 요청으로 묶어서 평가 (micro-batch)
+#############################################
+def chunk(seq, size):
+    seq = list(seq)
+    return [seq[i:i + size] for i in range(0, len(seq), size)]
+
+
+def format_batch(items, render):
+    """[(row_id, payload)] → 행 ID가 붙은 프롬프트 본문"""
+    return "\n\n".join(f"[ID: {row_id}]\n{render(payload)}" for row_id, payload in items)
+
+
+def parse_json_array(text):
+    """응답에서 JSON 배열을 꺼냄 (```json 코드블록 / 앞뒤 설명 허용), 실패 시 None"""
+    if not text:
+        return None
+    text = re.sub(r"```(?:json)?", "", text)
+    start, end = text.find("["), text.rfind("]")
+    if start < 0 or end <= start:
+        return None
+    try:
+        data = json.loads(text[start:end + 1])
+    except ValueError:
+        return None
+    return data if isinstance(data, list) else None
+
+
+def parse_json_object(text):
+    """응답에서 JSON 객체를 꺼냄 (```json 코드블록 / 앞뒤 설명 허용), 실패 시 None"""
+    if not text:
+        return None
+    text = re.sub(r"```(?:json)?", "", text)
+    start, end = text.find("{"), text.rfind("}")
+    if start < 0 or end <= start:
+        return None
+    try:
+        data = json.loads(text[start:end + 1])
+    except ValueError:
+        return None
+    return data if isinstance(data, dict) else None
+
+
+def answer_batch(items, call_batch, parse_answer, fallback, stats=None):
+    """
+    items: [(row_id, payload)] 를 call_batch(items) 한 번으로 평가한다.
+    응답 JSON 배열의 각 원소 {"id": ..., ...} 를 parse_answer(obj)로 검증하고,
+    빠졌거나 형식이 틀린 행만 반으로 나눠 다시 요청한다.
+    한 행만 남았는데도 실패하면 fallback(row_id, payload) (기존 단일 행 평가)로 처리.
+    call_batch 는 응답 텍스트 또는 이미 검증된 배열 (구조화 출력 모드, common/structured.py 의 structured_batch) 을 반환.
+    반환: {row_id: answer}
+    """
+    if stats is not None:
+        stats["calls"] = stats.get("calls", 0) + 1
+
+    try:
+        response = call_batch(items)
+        data = (response if isinstance(response, list) else parse_json_array(response)) or []
+    except Exception as e:
+        print(f"⚠️ 배치 요청 실패 ({e.__class__.__name__}) → 분할 재시도")
+        data = []
+
+    by_id = {}
+    for obj in data:
+        if isinstance(obj, dict) and "id" in obj:
+            by_id[str(obj["id"])] = obj
+
+    answers = {}
+    missing = []
+    for row_id, payload in items:
+        obj = by_id.get(str(row_id))
+        answer = parse_answer(obj) if obj is not None else None
+        if answer is None:
+            missing.append((row_id, payload))
+        else:
+            answers[row_id] = answer
+
+    if not missing:
+        return answers
+
+    if len(items) == 1:
+        if stats is not None:
+            stats["fallback"] = stats.get("fallback", 0) + 1
+        row_id, payload = items[0]
+        answers[row_id] = fallback(row_id, payload)
+        return answers
+
+    if stats is not None:
+        stats["retried_rows"] = stats.get("retried_rows", 0) + len(missing)
+    half = (len(missing) + 1) // 2
+    for part in (missing[:half], missing[half:]):
+        if part:
+            answers.update(answer_batch(part, call_batch, parse_answer, fallback, stats))
+    return answers
+
+
+def print_batch_stats(name, total_rows, stats):
+    calls = stats.get("calls", 0)
+    if not calls:
+        return
+    print(f"📦 {name}: {total_rows}행 / 배치 요청 {calls}회 "
+          f"(분할 재시도 {stats.get('retried_rows', 0)}행, 단일 행 처리 {stats.get('fallback', 0)}행)")
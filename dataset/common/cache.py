@@ -0,0 +1,89 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+
+DEFAULT_CACHE_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ".llm_cache.sqlite")
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+
+
+def make_key(provider, model, system, user, config=None):
+    """(provider, model, system, user, config) 해시 — 같은 요청이면 같은 키"""
+    payload = json.dumps([provider, model, system or "", user or "", config or {}],
+                         ensure_ascii=False, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+#############################################
+# SQLite 응답 캐시 (크기 기준 LRU 삭제)
+#############################################
+class ResponseCache:
+    """LLM 응답 텍스트를 키 해시로 저장하는 디스크 캐시 (스레드 / 프로세스 공유 가능)"""
+
+    def __init__(self, path=DEFAULT_CACHE_PATH, max_bytes=DEFAULT_MAX_BYTES):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            " key TEXT PRIMARY KEY, value TEXT NOT NULL,"
+            " size INTEGER NOT NULL, last_used REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS responses_last_used ON responses(last_used)")
+        self._conn.commit()
+
+    def get(self, key):
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM responses WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self._conn.execute("UPDATE responses SET last_used = ? WHERE key = ?", (time.time(), key))
+            self._conn.commit()
+            self.hits += 1
+            return row[0]
+
+    def put(self, key, value):
+        size = len(value.encode("utf-8"))
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (key, value, size, last_used) VALUES (?, ?, ?, ?)",
+                (key, value, size, time.time()),
+            )
+            self._evict()
+            self._conn.commit()
+
+    def _evict(self):
+        # 용량 초과 시 가장 오래 안 쓴 항목부터 삭제 (한도의 90%까지)
+        total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        target = total - int(self.max_bytes * 0.9)
+        freed = 0
+        victims = []
+        for key, size in self._conn.execute("SELECT key, size FROM responses ORDER BY last_used"):
+            victims.append((key,))
+            freed += size
+            if freed >= target:
+                break
+        self._conn.executemany("DELETE FROM responses WHERE key = ?", victims)
+
+    def stats(self):
+        with self._lock:
+            entries, total = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses").fetchone()
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "entries": entries,
+            "bytes": total,
+        }
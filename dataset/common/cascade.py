@@ -0,0 +1,88 @@
+import os
+import threading
+
+from .generation import reasoning_only
+
+
+# LLM_CASCADE=1 이면 싼 모델이 먼저 답하고, 확신이 없는 행만 원래(pro) 모델로 다시 평가
+CASCADE_ENABLED = os.environ.get("LLM_CASCADE", "0") != "0"
+
+# 싼 모델에게 몇 번 물어서 (self-consistency) 모두 같은 답이어야 채택할지 — 1 이면 한 번만
+CASCADE_VOTES = int(os.environ.get("LLM_CASCADE_VOTES", "2"))
+
+# 평가 모델 → 먼저 물어볼 싼 모델 (없는 모델은 캐스케이드 없이 그대로)
+CHEAP_MODELS = {
+    "gemini-3.0-pro": "gemini-2.5-flash",
+    "gemini-3-pro-preview": "gemini-2.5-flash",
+    "gemini-2.5-pro": "gemini-2.5-flash",
+    # 투표에 temperature / seed 를 쓰므로 sampling 인자를 받는 모델로 (gpt-5-mini 같은 reasoning 모델은 거부)
+    "gpt-5.1": "gpt-4.1-mini",
+}
+
+# 결과 CSV 에 어느 모델이 그 행을 결정했는지 기록하는 컬럼
+DECIDED_BY = "decided_by"
+
+_lock = threading.Lock()
+_stats = {}
+
+
+def sample_params(sample, model=None, base=None):
+    """
+    투표 k 번째 요청의 생성 설정 — 첫 요청은 평소 설정(base), 이후는 temperature / seed 를 바꿔 응답 캐시 키도 달라짐.
+    sampling 인자를 거부하는 reasoning 모델이면 빈 설정 (cascade_rows 도 그 모델에는 한 번만 물음)
+    """
+    if model is not None and reasoning_only(model):
+        return {}
+    return dict(base or {}) if sample == 0 else {"temperature": 1.0, "seed": sample}
+
+
+def _copy(items):
+    # 평가 함수가 행 dict 를 직접 채우므로 투표 / 승급마다 원본 행을 복사해서 넘김
+    return [(key, dict(row)) for key, row in items]
+
+
+def cascade_rows(items, evaluate, decide, model, votes=None):
+    """
+    items: [(행 번호, row)] 를 싼 모델로 먼저 평가하고, 답이 UNKNOWN / 파싱 실패 / 투표 불일치인 행만 model 로 다시 평가.
+    evaluate(모델, items, sample) → 평가된 행 목록 (items 와 같은 순서),
+    decide(row) → 채택할 수 있는 답 (비교 가능한 값) 또는 None.
+    반환: 평가된 행 목록 (각 행에 decided_by = 결정한 모델)
+    """
+    cheap = CHEAP_MODELS.get(model)
+    if cheap is None:
+        return [dict(row, **{DECIDED_BY: model}) for row in evaluate(model, items, 0)]
+
+    # 투표 요청을 서로 다르게 만들 수 없는 모델은 한 번만 (같은 요청이면 응답 캐시가 같은 답을 돌려줌)
+    votes = 1 if reasoning_only(cheap) else votes or CASCADE_VOTES
+    first = evaluate(cheap, _copy(items), 0)
+    answers = [[decide(row)] for row in first]
+    for sample in range(1, votes):
+        # 이미 탈락한 행은 더 묻지 않음
+        open_rows = [i for i, a in enumerate(answers) if a[0] is not None and len(set(a)) == 1]
+        if not open_rows:
+            break
+        for i, row in zip(open_rows, evaluate(cheap, _copy([items[i] for i in open_rows]), sample)):
+            answers[i].append(decide(row))
+
+    escalate = [i for i, a in enumerate(answers) if not (a[0] is not None and len(a) == votes and len(set(a)) == 1)]
+    results = [dict(row, **{DECIDED_BY: cheap}) for row in first]
+    if escalate:
+        for i, row in zip(escalate, evaluate(model, _copy([items[i] for i in escalate]), 0)):
+            results[i] = dict(row, **{DECIDED_BY: model})
+
+    with _lock:
+        s = _stats.setdefault((cheap, model), {"rows": 0, "escalated": 0, "unsure": 0})
+        s["rows"] += len(items)
+        s["escalated"] += len(escalate)
+        s["unsure"] += sum(a[0] is None for a in answers)
+    return results
+
+
+def print_cascade_stats():
+    with _lock:
+        stats = {k: dict(v) for k, v in _stats.items()}
+    for (cheap, model), s in sorted(stats.items()):
+        rows = max(1, s["rows"])
+        print(f"🪜 캐스케이드 {cheap} → {model}: {s['rows']}행 중 싼 모델 결정 {s['rows'] - s['escalated']}행 "
+              f"({1 - s['escalated'] / rows:.1%}), 승급 {s['escalated']}행 "
+              f"(UNKNOWN / 파싱 실패 {s['unsure']}, 투표 불일치 {s['escalated'] - s['unsure']})")
@@ -0,0 +1,213 @@
+import ast
+import csv
+import io
+import json
+import os
+import re
+
+
+DATASET_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CORPUS_DIR = os.path.join(DATASET_DIR, "corpus")
+MANIFEST_PATH = os.path.join(CORPUS_DIR, "manifest.json")
+
+
+#############################################
+# 인코딩 — UTF-8 / CP949(EUC-KR) 혼재 CSV 디코딩 (chardet 없이)
+#############################################
+def decode_bytes(data):
+    """(텍스트, 인코딩 이름) 반환. 둘 다 실패하면 줄 단위로 UTF-8 → CP949 순서로 복구"""
+    for encoding in ("utf-8-sig", "cp949"):
+        try:
+            return data.decode(encoding), encoding
+        except UnicodeDecodeError:
+            pass
+
+    lines = []
+    for line in data.splitlines(keepends=True):
+        try:
+            lines.append(line.decode("utf-8"))
+        except UnicodeDecodeError:
+            lines.append(line.decode("cp949", errors="replace"))
+    return "".join(lines).lstrip("﻿"), "mixed"
+
+
+def read_csv_rows(path):
+    """CSV → (컬럼 목록, dict 행 목록). 이름 없는 빈 컬럼은 버리고, 행 길이는 헤더에 맞춤"""
+    with open(path, "rb") as f:
+        text, _ = decode_bytes(f.read())
+
+    records = csv.reader(io.StringIO(text, newline=""))
+    header = next(records, [])
+    keep = [i for i, name in enumerate(header) if name.strip()]
+    fieldnames = [header[i].strip() for i in keep]
+
+    rows = []
+    for record in records:
+        if not any(cell.strip() for cell in record):
+            continue
+        record = record + [""] * (len(header) - len(record))
+        rows.append({fieldnames[n]: record[i] for n, i in enumerate(keep)})
+    return fieldnames, rows
+
+
+#############################################
+# 파일 이름 → (dataset, dialect, model, stage)
+#############################################
+DIALECT_ALIASES = {
+    "ko": "ko", "kor": "ko", "k1o": "ko",
+    "jeju": "Jeju", "jej1u": "Jeju",
+    "gyeongsang": "Gyeongsang", "kyungsang": "Gyeongsang", "gyeon2gsang": "Gyeongsang",
+    "jeolla": "Jeolla", "jeonra": "Jeolla", "jeollra": "Jeolla", "jeol1lra": "Jeolla",
+    "chungcheong": "Chungcheong", "choongchung": "Chungcheong", "choochung": "Chungcheong",
+    "chungchung": "Chungcheong", "chun2gchung": "Chungcheong",
+}
+
+STAGE_DIRS = {
+    "translation_dataset": "translation",
+    "accuracy_eval_dataset": "accuracy",
+    "hallucination_eval_dataset": "hallucination",
+}
+
+# 평가(judge) 모델 — 결과 파일이 들어있는 프로바이더 디렉터리 기준
+JUDGE_MODELS = {"gemini": "gemini-3-pro", "chatgpt": "gpt-5.1", "claude": "claude"}
+
+TRANSLATOR_PATTERN = re.compile(r"(gpt-5-pro|gpt-5|gemini-2\.5-pro|gpt4o)", re.IGNORECASE)
+
+
+def normalize_dialect(name):
+    return DIALECT_ALIASES.get(str(name).strip().lower(), name)
+
+
+def describe_file(path):
+    """결과 / 번역 CSV 경로에서 메타데이터 추출"""
+    name = os.path.basename(path)
+    lower = name.lower()
+    parent = os.path.basename(os.path.dirname(os.path.abspath(path)))
+    provider = next((p for p in JUDGE_MODELS if p in os.path.abspath(path).split(os.sep)), None)
+
+    dataset = "mednli" if lower.startswith("mednli") else "truthfulqa"
+    dialect = next((DIALECT_ALIASES[t] for t in re.split(r"[._\-() ]+", lower) if t in DIALECT_ALIASES), None)
+
+    if parent in STAGE_DIRS:
+        stage = STAGE_DIRS[parent]
+    elif "_evaluated" in lower or "hallucination" in lower:
+        stage = "hallucination"
+    elif "processed" in lower or "_eval" in lower:
+        stage = "accuracy"
+    else:
+        stage = "translation"
+
+    match = TRANSLATOR_PATTERN.search(name)
+    translator = match.group(1) if match else ("original" if dialect == "ko" else None)
+    model = translator if stage == "translation" else JUDGE_MODELS.get(provider, provider)
+
+    return {"dataset": dataset, "dialect": dialect, "model": model, "stage": stage, "translator": translator}
+
+
+def find_inputs(directory, dataset):
+    """
+    directory 안의 번역(평가 입력) CSV → [(방언, 경로)].
+    파일 이름 철자가 달라도 (jeju / jej1u, jeonra / jeol1lra ...) DIALECT_ALIASES 로 같은 방언으로 묶음
+    """
+    found = []
+    for name in sorted(os.listdir(directory)):
+        path = os.path.join(directory, name)
+        if not name.lower().endswith(".csv") or not os.path.isfile(path):
+            continue
+        meta = describe_file(path)
+        if meta["stage"] == "translation" and meta["dataset"] == dataset and meta["dialect"]:
+            found.append((meta["dialect"], path))
+    return found
+
+
+def column_dialect(fieldnames, prefix):
+    """"sentence1_jeonra" 처럼 파일에 실제로 적힌 방언 표기 (prefix 컬럼이 없으면 None)"""
+    return next((c[len(prefix):] for c in fieldnames if c.lower().startswith(prefix)), None)
+
+
+#############################################
+# 리스트 컬럼 (선택지 / 라벨) 파싱
+#############################################
+def list_kind(column):
+    """'choices' → 문자열 리스트, 'labels' → 정수 리스트, 그 외 None"""
+    lower = column.lower()
+    if re.match(r"mc[12]_choices", lower):
+        return "choices"
+    if re.match(r"mc[12]_labels?$", lower):
+        return "labels"
+    return None
+
+
+def parse_list(value):
+    """"['a', 'b']" / "[1, 0]" → 리스트, 파싱 실패 시 None"""
+    try:
+        items = ast.literal_eval(str(value).strip())
+    except (ValueError, SyntaxError):
+        return None
+    return list(items) if isinstance(items, (list, tuple)) else None
+
+
+#############################################
+# 컬럼 저장소 (Arrow IPC / Feather v2, 비압축 → memory-map 가능)
+#############################################
+def load_manifest():
+    if not os.path.exists(MANIFEST_PATH):
+        return {"tables": []}
+    with open(MANIFEST_PATH, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def source_signature(path):
+    st = os.stat(path)
+    return {"size": st.st_size, "mtime": int(st.st_mtime)}
+
+
+def find_table(source_path, manifest=None):
+    """원본 CSV에 해당하는 최신 테이블 항목 (원본이 바뀌었으면 None)"""
+    manifest = manifest or load_manifest()
+    source = os.path.relpath(os.path.abspath(source_path), DATASET_DIR)
+    for entry in manifest["tables"]:
+        if entry["source"] == source and os.path.exists(os.path.join(CORPUS_DIR, entry["path"])):
+            if entry["signature"] == source_signature(source_path):
+                return entry
+    return None
+
+
+def select_tables(manifest=None, **filters):
+    """dataset / dialect / model / stage 조건에 맞는 테이블 항목 목록"""
+    manifest = manifest or load_manifest()
+    return [e for e in manifest["tables"] if all(e.get(k) == v for k, v in filters.items())]
+
+
+def read_table(entry, columns=None):
+    """테이블을 memory-map 으로 열어서 필요한 컬럼만 pyarrow.Table 로 반환"""
+    from pyarrow import feather
+
+    return feather.read_table(os.path.join(CORPUS_DIR, entry["path"]), columns=columns, memory_map=True)
+
+
+def load_rows(path, columns=None):
+    """
+    스크립트용 입력 로더 — (컬럼 목록, dict 행 목록).
+    ingest 된 테이블이 있으면 그것을 memory-map 으로 읽고, 없으면 CSV를 직접 디코딩한다.
+    리스트 컬럼은 프롬프트에 그대로 쓰이도록 원래 CSV와 같은 "[...]" 문자열로 돌려준다.
+    """
+    entry = find_table(path)
+    if entry is None:
+        fieldnames, rows = read_csv_rows(path)
+        if columns:
+            fieldnames = [c for c in fieldnames if c in columns]
+            rows = [{c: row[c] for c in fieldnames} for row in rows]
+        return fieldnames, rows
+
+    table = read_table(entry, columns=[c for c in entry["columns"] if not columns or c in columns])
+    fieldnames = table.column_names
+    data = table.to_pydict()
+    rows = []
+    for i in range(table.num_rows):
+        row = {}
+        for c in fieldnames:
+            value = data[c][i]
+            row[c] = str(value) if isinstance(value, list) else ("" if value is None else value)
+        rows.append(row)
+    return fieldnames, rows
@@ -0,0 +1,207 @@
+import hashlib
+import json
+import os
+
+import numpy as np
+
+from .corpus import CORPUS_DIR, DATASET_DIR, column_dialect, list_kind, load_rows, parse_list, source_signature
+from .stats import paired_length
+
+
+#############################################
+# 방언 ↔ 표준말(ko) 문자 n-gram 거리 — 해시 희소 벡터 (API 호출 없음)
+#############################################
+HASH_BITS = 18
+HASH_DIM = 1 << HASH_BITS
+COSINE_ORDERS = (1, 2, 3)       # 코사인은 음절 / 자모 1~3-gram 을 한 벡터로
+CHRF_ORDERS = 6                 # chrF 는 1~6-gram 정밀도 / 재현율 평균
+CHRF_BETA = 2.0
+LEVELS = ("syllable", "jamo")
+METRICS = ("cosine", "chrf", "jamo_chrf")    # 모두 1 - 유사도 (0 = 같음, 1 = 전혀 다름)
+
+# 데이터셋별 문장 컬럼 접두어 (뒤에 방언 표기가 붙음, 선택지 컬럼은 리스트를 풀어서 이어 붙임)
+TEXT_PREFIXES = {"mednli": ["sentence1_", "sentence2_"],
+                 "truthfulqa": ["question_", "mc1_choices_", "mc2_choices_"]}
+
+DIVERGENCE_DIR = os.path.join(CORPUS_DIR, "divergence")
+DIVERGENCE_VERSION = 2
+
+_PRIME = np.uint64(1000003)
+_SYLLABLE_BASE, _SYLLABLE_LAST = 0xAC00, 0xD7A3
+
+
+def text_columns(fieldnames, dataset):
+    """파일에 실제로 있는 문장 컬럼 이름 목록 (sentence1_jeonra, question_Jeju ...)"""
+    columns = []
+    for prefix in TEXT_PREFIXES[dataset]:
+        spelled = column_dialect(fieldnames, prefix)
+        if spelled is not None:
+            columns.append(next(c for c in fieldnames if c.lower() == prefix + spelled.lower()))
+    return columns
+
+
+def row_texts(rows, columns):
+    """행마다 셀 문자열 목록 — 리스트 컬럼은 선택지 하나하나를 셀로 (n-gram 이 셀 경계를 넘지 않음)"""
+    cells, owners = [], []
+    for i, row in enumerate(rows):
+        for col in columns:
+            value = row.get(col, "")
+            items = parse_list(value) if list_kind(col) == "choices" else None
+            for text in (items if items is not None else [value]):
+                cells.append("".join(str(text or "").split()))
+                owners.append(i)
+    return cells, np.asarray(owners, dtype=np.int64)
+
+
+#############################################
+# 코드 포인트 → 음절 / 자모 단위 배열 (셀 번호 배열과 같이)
+#############################################
+def codepoints(cells):
+    joined = "".join(cells)
+    units = np.frombuffer(joined.encode("utf-32-le"), dtype=np.uint32).astype(np.uint64)
+    lengths = np.fromiter((len(c) for c in cells), dtype=np.int64, count=len(cells))
+    return units, np.repeat(np.arange(len(cells)), lengths)
+
+
+def decompose_jamo(units, cell):
+    """한글 음절을 초성 / 중성 / (종성) 자모 코드 포인트로 펼침 — 그 외 문자는 그대로 한 단위"""
+    units = units.astype(np.int64)
+    offset = units - _SYLLABLE_BASE
+    syllable = (units >= _SYLLABLE_BASE) & (units <= _SYLLABLE_LAST)
+    has_final = syllable & (offset % 28 != 0)
+    counts = 1 + syllable + has_final
+    start = np.cumsum(counts) - counts
+
+    out = np.empty(int(counts.sum()), dtype=np.int64)
+    out[start] = np.where(syllable, 0x1100 + offset // 588, units)
+    out[start[syllable] + 1] = 0x1161 + (offset[syllable] % 588) // 28
+    out[start[has_final] + 2] = 0x11A7 + offset[has_final] % 28
+    return out.astype(np.uint64), np.repeat(cell, counts)
+
+
+def ngram_matrix(h, cell, owners, n_rows, order):
+    """order-gram 해시 h (창 시작 위치별) → (행 수 × HASH_DIM) CSR 빈도 행렬 — 같은 행의 셀들은 한 행으로 합산"""
+    from scipy import sparse
+
+    windows = len(h)
+    valid = cell[:windows] == cell[order - 1:order - 1 + windows]
+    h = h[valid] * _PRIME + np.uint64(order)
+    columns = ((h ^ (h >> np.uint64(29))) & np.uint64(HASH_DIM - 1)).astype(np.int64)
+    rows = owners[cell[:windows][valid]]
+    # (행, 열) 을 한 정수로 묶어 np.unique 한 번에 정렬 + 중복 합산 → CSR 배열을 바로 구성 (scipy 의 행별 정렬보다 빠름)
+    keys, counts = np.unique(rows * HASH_DIM + columns, return_counts=True)
+    indptr = np.searchsorted(keys, np.arange(n_rows + 1, dtype=np.int64) * HASH_DIM)
+    return sparse.csr_matrix((counts.astype(np.float32), (keys % HASH_DIM).astype(np.int32), indptr),
+                             shape=(n_rows, HASH_DIM))
+
+
+def featurize(rows, columns):
+    """{(단위, n): CSR 행렬} — 음절 / 자모 각각 1 ~ max(CHRF_ORDERS, COSINE_ORDERS)"""
+    cells, owners = row_texts(rows, columns)
+    units, cell = codepoints(cells)
+    jamo, jamo_cell = decompose_jamo(units, cell)
+    features = {}
+    for level, (u, c) in zip(LEVELS, [(units, cell), (jamo, jamo_cell)]):
+        # 다항 해시를 차수마다 한 글자씩 늘려가며 계산 (n-gram 하나당 곱셈 한 번)
+        h = np.zeros(len(u) + 1, dtype=np.uint64)
+        for order in range(1, max(CHRF_ORDERS, max(COSINE_ORDERS)) + 1):
+            h = h[:-1] * _PRIME + u[order - 1:]
+            features[level, order] = ngram_matrix(h, c, owners, len(rows), order)
+    return features
+
+
+_features = {}
+
+
+def file_features(path, dataset):
+    """파일 하나의 (featurize 결과, 문장 컬럼) — 같은 ko 원문이 여러 방언 / 단계와 짝지어지므로 프로세스 안에서 재사용"""
+    key = (os.path.abspath(path), dataset, json.dumps(source_signature(path)))
+    if key not in _features:
+        fieldnames, rows = load_rows(path)
+        columns = text_columns(fieldnames, dataset)
+        _features[key] = (featurize(rows, columns) if columns else {}), columns
+    return _features[key]
+
+
+#############################################
+# 행별 거리 — 코사인 / chrF (beta=2)
+#############################################
+def _rowsum(matrix):
+    return np.asarray(matrix.sum(axis=1), dtype=np.float64).ravel()
+
+
+def cosine_distance(ref, hyp):
+    a = sum(ref[level, n] for level in LEVELS for n in COSINE_ORDERS)
+    b = sum(hyp[level, n] for level in LEVELS for n in COSINE_ORDERS)
+    dot = _rowsum(a.multiply(b))
+    norm = np.sqrt(_rowsum(a.multiply(a)) * _rowsum(b.multiply(b)))
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.where(norm > 0, 1 - dot / norm, np.nan)
+
+
+def chrf_counts(ref, hyp, level):
+    """n 별 (겹치는 n-gram 수, 번역 쪽 수, 원문 쪽 수) — (CHRF_ORDERS × 행 수) 배열 세 개"""
+    overlap = np.vstack([_rowsum(ref[level, n].minimum(hyp[level, n])) for n in range(1, CHRF_ORDERS + 1)])
+    hyp_total = np.vstack([_rowsum(hyp[level, n]) for n in range(1, CHRF_ORDERS + 1)])
+    ref_total = np.vstack([_rowsum(ref[level, n]) for n in range(1, CHRF_ORDERS + 1)])
+    return overlap, hyp_total, ref_total
+
+
+def chrf_score(overlap, hyp_total, ref_total, axis=0):
+    """n-gram 차수별 정밀도 / 재현율을 평균한 뒤 F-beta (양쪽 다 n-gram 이 없는 차수는 평균에서 제외)"""
+    with np.errstate(invalid="ignore", divide="ignore"):
+        usable = (hyp_total > 0) | (ref_total > 0)
+        precision = np.where(hyp_total > 0, overlap / hyp_total, 0.0)
+        recall = np.where(ref_total > 0, overlap / ref_total, 0.0)
+        k = usable.sum(axis=axis)
+        p = np.where(usable, precision, 0).sum(axis=axis) / k
+        r = np.where(usable, recall, 0).sum(axis=axis) / k
+        b2 = CHRF_BETA ** 2
+        return np.where((p + r) > 0, (1 + b2) * p * r / (b2 * p + r), 0.0)
+
+
+def _cache_path(reference, target, dataset):
+    key = {"version": DIVERGENCE_VERSION, "dataset": dataset, "hash_bits": HASH_BITS,
+           "cosine": list(COSINE_ORDERS), "chrf": [CHRF_ORDERS, CHRF_BETA]}
+    for name, path in (("reference", reference), ("target", target)):
+        key[name] = [os.path.relpath(os.path.abspath(path), DATASET_DIR), source_signature(path)]
+    digest = hashlib.sha1(json.dumps(key, sort_keys=True).encode("utf-8")).hexdigest()[:20]
+    return os.path.join(DIVERGENCE_DIR, f"{digest}.npz")
+
+
+def pair_divergence(reference, target, dataset, use_cache=True):
+    """
+    원문(ko) 파일과 방언 파일을 행 순서로 짝지어 행별 거리 배열 dict 반환 (행 수가 다르면 ValueError):
+    cosine / chrf / jamo_chrf (1 - 유사도) + 코퍼스 단위 chrF 용 n-gram 합계.
+    결과는 두 파일의 크기 / 수정 시각을 키로 corpus/divergence/ 에 npz 로 캐시.
+    """
+    cache_path = _cache_path(reference, target, dataset)
+    if use_cache and os.path.exists(cache_path):
+        with np.load(cache_path) as cached:
+            return {k: cached[k] for k in cached.files}
+
+    ref, ref_columns = file_features(reference, dataset)
+    hyp, hyp_columns = file_features(target, dataset)
+    if not ref_columns or len(ref_columns) != len(hyp_columns):
+        return None
+    paired_length(ref["syllable", 1], hyp["syllable", 1], f"{target} ↔ {reference}")
+
+    result = {"cosine": cosine_distance(ref, hyp)}
+    for metric, level in (("chrf", "syllable"), ("jamo_chrf", "jamo")):
+        overlap, hyp_total, ref_total = chrf_counts(ref, hyp, level)
+        result[metric] = 1 - chrf_score(overlap, hyp_total, ref_total)
+        # 방언 전체 chrF (micro) 는 행별 점수의 평균이 아니라 n-gram 합계로 계산
+        result[f"{metric}_totals"] = np.vstack([overlap.sum(1), hyp_total.sum(1), ref_total.sum(1)])
+
+    if use_cache:
+        os.makedirs(DIVERGENCE_DIR, exist_ok=True)
+        tmp_path = f"{cache_path}.tmp.npz"
+        np.savez(tmp_path, **result)
+        os.replace(tmp_path, cache_path)
+    return result
+
+
+def micro_chrf(totals):
+    """pair_divergence 의 *_totals (3 × 차수) → 코퍼스 단위 거리 (1 - chrF)"""
+    overlap, hyp_total, ref_total = totals
+    return float(1 - chrf_score(overlap, hyp_total, ref_total))
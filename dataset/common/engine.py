@@ -0,0 +1,236 @@
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from tqdm import tqdm
+
+from .adaptive import status_line
+from .telemetry import run_tagged
+
+
+#############################################
+# 토큰 버킷 — 분당 요청 수(RPM) / 분당 토큰 수(TPM) 제한
+#############################################
+class TokenBucket:
+    """분당 per_minute 만큼 채워지는 토큰 버킷 (이벤트 루프 하나에서만 사용)"""
+
+    def __init__(self, per_minute, capacity=None):
+        self.rate = per_minute / 60.0
+        # 기본 버스트 크기는 10초 분량 — 한꺼번에 몰려서 429가 나는 것을 방지
+        self.capacity = capacity or max(1.0, per_minute / 6.0)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    async def acquire(self, amount=1):
+        # 버킷보다 큰 요청은 버킷 크기만큼만 기다림 (무한 대기 방지)
+        amount = min(amount, self.capacity)
+        while True:
+            self._refill()
+            if self.tokens >= amount:
+                self.tokens -= amount
+                return
+            await asyncio.sleep((amount - self.tokens) / self.rate)
+
+    def try_take(self, amount=1):
+        """기다리지 않고 가져갈 수 있으면 가져가고 True"""
+        amount = min(amount, self.capacity)
+        self._refill()
+        if self.tokens < amount:
+            return False
+        self.tokens -= amount
+        return True
+
+    def give_back(self, amount=1):
+        self.tokens = min(self.capacity, self.tokens + min(amount, self.capacity))
+
+
+class RateLimiter:
+    """RPM / TPM 버킷을 묶은 제한기 (None 이면 해당 제한 없음)"""
+
+    def __init__(self, rpm=None, tpm=None):
+        self.requests = TokenBucket(rpm) if rpm else None
+        self.tokens = TokenBucket(tpm) if tpm else None
+
+    async def acquire(self, tokens=0):
+        if self.requests:
+            await self.requests.acquire(1)
+        if self.tokens and tokens:
+            await self.tokens.acquire(tokens)
+
+    def try_acquire(self, tokens=0):
+        """
+        기다리지 않고 두 버킷을 모두 통과할 수 있을 때만 가져가고 True (hedge 중복 요청 — 지금 못 보내면 보내지 않음).
+        이벤트 루프 안에서 호출 (worker 스레드에서는 thread_budget 으로)
+        """
+        if self.requests and not self.requests.try_take(1):
+            return False
+        if self.tokens and tokens and not self.tokens.try_take(tokens):
+            if self.requests:
+                self.requests.give_back(1)
+            return False
+        return True
+
+
+async def _try_acquire(limiter, tokens):
+    return limiter.try_acquire(tokens)
+
+
+def thread_budget(limiter, loop, tokens=0):
+    """
+    worker 스레드에서 부르는 limiter.try_acquire(tokens) — 버킷은 이벤트 루프 하나에서만 만지므로 루프로 넘겨 실행.
+    run_tagged 로 넘기면 common/hedging.py 의 중복 요청이 같은 RPM / TPM 한도를 씀 (limiter 가 없으면 None)
+    """
+    if not limiter:
+        return None
+    return lambda: asyncio.run_coroutine_threadsafe(_try_acquire(limiter, tokens), loop).result()
+
+
+#############################################
+# 프로세스 간 공유 제한기 — multiprocessing.Pool 워커들이 모델별 RPM / TPM 한도 하나를 나눠 씀
+#############################################
+class SharedTokenBucket:
+    """
+    TokenBucket 과 같은 규칙이지만 (남은 토큰, 갱신 시각)을 공유 메모리(multiprocessing.Array)에 둔다.
+    부모 프로세스에서 만들고 Pool(initializer=install_shared_limiters) 로 자식에게 넘긴다 (spawn / fork 모두 가능)
+    """
+
+    def __init__(self, per_minute, capacity=None):
+        import multiprocessing
+
+        self.rate = per_minute / 60.0
+        self.capacity = capacity or max(1.0, per_minute / 6.0)
+        self.state = multiprocessing.Array("d", [self.capacity, time.monotonic()])
+
+    def _take(self, amount):
+        """토큰을 가져가면 0, 모자라면 기다려야 할 초 (잠금은 계산하는 동안만)"""
+        with self.state.get_lock():
+            now = time.monotonic()
+            tokens = min(self.capacity, self.state[0] + (now - self.state[1]) * self.rate)
+            self.state[1] = now
+            if tokens >= amount:
+                self.state[0] = tokens - amount
+                return 0.0
+            self.state[0] = tokens
+            return (amount - tokens) / self.rate
+
+    def try_take(self, amount=1):
+        return self._take(min(amount, self.capacity)) <= 0
+
+    def give_back(self, amount=1):
+        with self.state.get_lock():
+            self.state[0] = min(self.capacity, self.state[0] + min(amount, self.capacity))
+
+    async def acquire(self, amount=1):
+        amount = min(amount, self.capacity)
+        while True:
+            wait = self._take(amount)
+            if wait <= 0:
+                return
+            await asyncio.sleep(wait)
+
+
+class SharedRateLimiter(RateLimiter):
+    """RateLimiter 와 같은 acquire — 버킷만 공유 메모리"""
+
+    def __init__(self, rpm=None, tpm=None):
+        self.requests = SharedTokenBucket(rpm) if rpm else None
+        self.tokens = SharedTokenBucket(tpm) if tpm else None
+
+
+_shared_limiters = {}
+
+
+def install_shared_limiters(limiters):
+    """Pool initializer — {모델: SharedRateLimiter} 를 이 프로세스에 등록 (이후 limiter_for 가 반환)"""
+    _shared_limiters.update(limiters)
+
+
+def limiter_for(model, rpm=None, tpm=None):
+    """공유 제한기가 설치된 모델이면 그것을, 아니면 이 프로세스만의 RateLimiter(rpm, tpm)"""
+    return _shared_limiters.get(model) or RateLimiter(rpm=rpm, tpm=tpm)
+
+
+def estimate_tokens(*texts):
+    """대략적인 토큰 수 추정 (한국어는 글자 2개당 1토큰 정도로 계산)"""
+    return max(1, sum(len(str(t or "")) for t in texts) // 2)
+
+
+#############################################
+# 순서 보장 동시 실행
+#############################################
+async def _run_ordered(items, func, on_result, concurrency, limiter, estimate, desc):
+    loop = asyncio.get_running_loop()
+    semaphore = asyncio.Semaphore(concurrency)
+    results = [None] * len(items)
+    finished = {}
+    next_index = 0
+
+    with ThreadPoolExecutor(max_workers=concurrency) as executor, \
+            tqdm(total=len(items), desc=desc) as bar:
+
+        async def worker(i, item):
+            nonlocal next_index
+            async with semaphore:
+                if limiter:
+                    await limiter.acquire(estimate(item) if estimate else 0)
+                # SDK 호출은 blocking 이므로 스레드에서 실행 (telemetry 이벤트에 작업 이름을 붙임)
+                budget = thread_budget(limiter, loop, estimate(item) if estimate else 0)
+                result = await loop.run_in_executor(executor, run_tagged, desc, func, item, budget)
+
+            results[i] = result
+            finished[i] = result
+            bar.update(1)
+            # 모델별 AIMD 동시 한도 / 허용 처리량 표시
+            status = status_line()
+            if status:
+                bar.set_postfix_str(status, refresh=False)
+
+            # 앞 순서가 모두 끝난 결과만 입력 순서대로 내보냄
+            while next_index in finished:
+                if on_result:
+                    on_result(next_index, items[next_index], finished.pop(next_index))
+                else:
+                    finished.pop(next_index)
+                next_index += 1
+
+        await asyncio.gather(*(worker(i, item) for i, item in enumerate(items)))
+
+    return results
+
+
+def run_ordered(items, func, on_result=None, concurrency=8, limiter=None, estimate=None, desc=None):
+    """
+    items 각각에 func(item)을 최대 concurrency개 동시에 실행한다.
+    on_result(index, item, result)는 입력 순서대로 호출되므로 CSV에 그대로 쓰면 된다.
+    limiter가 있으면 호출 전에 RPM / TPM 버킷을 통과해야 한다 (estimate(item) = 예상 토큰 수).
+    """
+    items = list(items)
+    return asyncio.run(_run_ordered(items, func, on_result, concurrency, limiter, estimate, desc))
+
+
+#############################################
+# 작업 단위 — 파일 하나의 (items, func, on_result) 묶음
+#############################################
+class Job:
+    """
+    run_ordered 인자 묶음. 스크립트의 *_job() context manager 가 출력 파일을 열고 Job 을 yield 하면,
+    run_job 으로 단독 실행하거나 common/scheduler.py 에서 다른 파일의 작업과 한 풀에서 실행한다.
+    stop() 이 True 를 돌려주면 스케줄러는 남은 항목을 꺼내지 않고 Job 을 닫는다 (common/sampling.py)
+    """
+
+    def __init__(self, name, items, func, on_result=None, estimate=None, stop=None):
+        self.name = name
+        self.items = list(items)
+        self.func = func
+        self.on_result = on_result
+        self.estimate = estimate
+        self.stop = stop
+
+
+def run_job(job, concurrency=8, limiter=None):
+    return run_ordered(job.items, job.func, job.on_result, concurrency, limiter, job.estimate, job.name)
@@ -0,0 +1,127 @@
+import os
+
+
+#############################################
+# 작업별 생성 설정 프로필 — 사고(thinking) 예산 / reasoning effort / 최대 출력 토큰 / stop
+# 답이 라벨 하나나 짧은 문장인데 reasoning 모델의 숨은 사고 토큰이 지연과 비용을 대부분 차지하므로 작업마다 줄여 씀
+#############################################
+# LLM_GENERATION_PROFILE 로 선택 (LLM_PROFILE 은 cProfile 스위치), run_plan.py --profile / --compare-profiles 로도 지정
+GENERATION_PROFILE = os.environ.get("LLM_GENERATION_PROFILE", "default")
+
+# 작업 태그 = 호출할 때 넘기는 prefix_cache 의 첫 값 (translate / translate_fanout / mednli / mednli_batch / truthfulqa)
+# 최대 출력 토큰은 두 프로바이더 모두 사고 토큰을 포함하므로 사고 예산보다 넉넉하게 잡음
+# stop 은 한 줄 답(MedNLI 행 단위)에만 — 배치 JSON / 여러 줄 형식에는 쓰지 않음
+GENERATION_PROFILES = {
+    "default": {},
+    "lean": {
+        "translate": {"thinking_budget": 1024, "thinking_level": "low", "reasoning_effort": "low",
+                      "max_output_tokens": 4096},
+        "translate_fanout": {"thinking_budget": 1024, "thinking_level": "low", "reasoning_effort": "low",
+                             "max_output_tokens": 8192},
+        "mednli": {"thinking_budget": 256, "thinking_level": "low", "reasoning_effort": "low",
+                   "max_output_tokens": 2048, "stop": ["\n"]},
+        "mednli_batch": {"thinking_budget": 1024, "thinking_level": "low", "reasoning_effort": "low",
+                         "max_output_tokens": 4096},
+        "truthfulqa": {"thinking_budget": 256, "thinking_level": "low", "reasoning_effort": "low",
+                       "max_output_tokens": 2048},
+    },
+    "minimal": {
+        # gemini-2.5-pro 는 사고를 끌 수 없고 최소 예산이 128
+        "translate": {"thinking_budget": 128, "thinking_level": "low", "reasoning_effort": "none",
+                      "max_output_tokens": 2048},
+        "translate_fanout": {"thinking_budget": 128, "thinking_level": "low", "reasoning_effort": "none",
+                             "max_output_tokens": 4096},
+        "mednli": {"thinking_budget": 128, "thinking_level": "low", "reasoning_effort": "none",
+                   "max_output_tokens": 512, "stop": ["\n"]},
+        "mednli_batch": {"thinking_budget": 128, "thinking_level": "low", "reasoning_effort": "none",
+                         "max_output_tokens": 2048},
+        "truthfulqa": {"thinking_budget": 128, "thinking_level": "low", "reasoning_effort": "none",
+                       "max_output_tokens": 512},
+    },
+}
+
+# reasoning_effort="none" 을 받는 모델 — 그 외(gpt-5 / gpt-5-mini)는 가장 낮은 "minimal" 로
+NO_REASONING_MODELS = ("gpt-5.1",)
+# reasoning 을 끌 수 없는 OpenAI 모델 — temperature / seed / logprobs 같은 sampling 인자를 거부 (400)
+REASONING_ONLY_MODELS = ("gpt-5", "o1", "o3", "o4")
+# reasoning 이 켜진 요청에서 거부되는 sampling 인자
+SAMPLING_PARAMS = ("temperature", "top_p", "seed", "logprobs", "top_logprobs")
+
+_active = [GENERATION_PROFILE]
+
+
+def reasoning_only(model):
+    return model.startswith(REASONING_ONLY_MODELS) and not model.startswith(NO_REASONING_MODELS)
+
+
+def reasoning_enabled(model, params):
+    """이 요청에서 reasoning 이 켜지는지 — gpt-5.1 은 reasoning_effort 가 "none" (기본값) 이 아닐 때, 그 외는 reasoning_only"""
+    if model.startswith(NO_REASONING_MODELS):
+        return params.get("reasoning_effort", "none") != "none"
+    return reasoning_only(model)
+
+
+def drop_rejected_sampling(model, params):
+    """
+    reasoning 이 켜지는 요청이면 sampling 인자 (temperature / seed / logprobs ...) 를 뺌 — 그대로 보내면 400.
+    프로필이 gpt-5.1 에 reasoning_effort 를 붙이면 호출한 쪽이 넘긴 temperature=0.0 같은 값과 함께 보낼 수 없음
+    """
+    if not reasoning_enabled(model, params):
+        return params
+    return {k: v for k, v in params.items() if k not in SAMPLING_PARAMS}
+
+
+def set_profile(name):
+    if name not in GENERATION_PROFILES:
+        raise ValueError(f"알 수 없는 생성 프로필: {name} (가능: {', '.join(GENERATION_PROFILES)})")
+    _active[0] = name
+    # 스크립트가 띄우는 multiprocessing 워커도 같은 프로필을 쓰도록
+    os.environ["LLM_GENERATION_PROFILE"] = name
+
+
+def active_profile():
+    return _active[0]
+
+
+def task_settings(tag):
+    """
+    작업 태그의 설정 dict. 프로필에 태그가 없으면 앞부분(mednli_batch → mednli)의 사고 설정만 사용
+    (출력 길이 / stop 은 응답 형식에 따라 다르므로 물려받지 않음)
+    """
+    profile = GENERATION_PROFILES[_active[0]]
+    if not tag:
+        return {}
+    if tag in profile:
+        return profile[tag]
+    base = profile.get(tag.split("_")[0], {})
+    return {k: v for k, v in base.items() if k not in ("max_output_tokens", "stop")}
+
+
+def gemini_settings(model, tag, config):
+    """gemini_generate(**config) 에 더할 설정 — 호출한 쪽이 직접 넘긴 값이 우선, JSON 모드면 stop 제외"""
+    settings = task_settings(tag)
+    extra = {}
+    if model.startswith("gemini-3") and "thinking_level" in settings:
+        extra["thinking_config"] = {"thinking_level": settings["thinking_level"]}
+    elif "thinking_budget" in settings:
+        extra["thinking_config"] = {"thinking_budget": settings["thinking_budget"]}
+    if "max_output_tokens" in settings:
+        extra["max_output_tokens"] = settings["max_output_tokens"]
+    if settings.get("stop") and "response_mime_type" not in config:
+        extra["stop_sequences"] = settings["stop"]
+    return extra
+
+
+def openai_settings(model, tag, params):
+    """openai_chat(**params) 에 더할 설정 — 호출한 쪽이 직접 넘긴 값이 우선, JSON 모드면 stop 제외"""
+    settings = task_settings(tag)
+    extra = {}
+    # reasoning 모델이 아니면 (gpt-4.1-mini 같은 캐스케이드 싼 모델) reasoning_effort 를 거부하므로 보내지 않음
+    if "reasoning_effort" in settings and model.startswith(REASONING_ONLY_MODELS):
+        effort = settings["reasoning_effort"]
+        extra["reasoning_effort"] = "minimal" if effort == "none" and not model.startswith(NO_REASONING_MODELS) else effort
+    if "max_output_tokens" in settings:
+        extra["max_completion_tokens"] = settings["max_output_tokens"]
+    if settings.get("stop") and "response_format" not in params:
+        extra["stop"] = settings["stop"]
+    return extra
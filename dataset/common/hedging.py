@@ -0,0 +1,187 @@
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+import numpy as np
+
+from .adaptive import classify_error
+from .telemetry import (bind_event, current_event, merge_event, prompt_id, record_hedge, shadow_event, try_budget,
+                        write_discarded)
+
+
+#############################################
+# 요청 마감 시간 + hedged request — 멈춘 요청 하나가 파일 전체를 붙잡지 않도록
+#############################################
+# 요청 하나의 마감 시간 (초) — SDK timeout 으로 전달, 넘으면 일시 오류(타임아웃)로 분류되어 AIMD 제어기가 재시도. 0 = 제한 없음
+DEADLINE_S = float(os.environ.get("LLM_DEADLINE", "300"))
+
+# LLM_HEDGE=1 이면 (모델, 프롬프트 템플릿)별 관측 p95 지연을 넘긴 요청에 같은 요청을 하나 더 보내고 먼저 온 답을 사용
+HEDGE_ENABLED = os.environ.get("LLM_HEDGE", "0") != "0"
+HEDGE_PERCENTILE = 95
+# 모델별 중복 요청 비율 상한 (전체 실제 요청 대비) — p95 기준이면 평소 약 5%, 지연이 몰릴 때도 추가 할당량을 이 비율 안으로 묶음
+HEDGE_MAX_RATE = float(os.environ.get("LLM_HEDGE_MAX_RATE", "0.1"))
+# p95 를 믿을 만한 최소 관측 수 / 최근 관측 창 크기
+HEDGE_MIN_SAMPLES = 20
+LATENCY_WINDOW = 500
+
+_executor = None
+_lock = threading.Lock()
+_hedgers = {}
+
+
+def deadline_ms():
+    return int(DEADLINE_S * 1000) if DEADLINE_S > 0 else None
+
+
+def _pool():
+    global _executor
+    with _lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=256, thread_name_prefix="hedge")
+        return _executor
+
+
+class Hedger:
+    """
+    모델 하나의 중복 요청 결정 (스레드 여러 개에서 공유).
+    기준 지연은 템플릿마다 따로 (행 단위 호출과 20행 묶음 호출의 지연 분포가 다르므로).
+    중복 요청은 HEDGE_MAX_RATE 안에서, AIMD 동시 한도에 빈 자리가 있고 이 행의 RPM / TPM 버킷에 여유가 있을 때만
+    (기다리지 않음 — 지금 보낼 수 없으면 보내지 않음)
+    """
+
+    def __init__(self, model):
+        self.model = model
+        self.lock = threading.Lock()
+        self.latencies = {}
+        self.requests = 0
+        self.hedged = 0
+
+    def threshold(self, template):
+        with self.lock:
+            window = self.latencies.get(template)
+            if window is None or len(window) < HEDGE_MIN_SAMPLES:
+                return None
+            return float(np.percentile(window, HEDGE_PERCENTILE)) / 1000
+
+    def observe(self, template, ms):
+        with self.lock:
+            self.latencies.setdefault(template, deque(maxlen=LATENCY_WINDOW)).append(ms)
+
+    def allow(self, controller=None):
+        """중복 요청 하나를 보내도 되면 True — 비율 상한, AIMD 빈 자리 (controller.release() 로 반납), RPM / TPM 버킷"""
+        with self.lock:
+            if self.hedged + 1 > HEDGE_MAX_RATE * self.requests:
+                return False
+        if controller is not None and not controller.try_slot():
+            return False
+        if not try_budget():
+            if controller is not None:
+                controller.release()
+            return False
+        with self.lock:
+            self.hedged += 1
+        return True
+
+    def _primary_done(self, template, ms, pending=None):
+        self.observe(template, ms)
+        record_hedge(self.model, primary_ms=ms, pending=pending)
+
+    def call(self, request, template, controller=None):
+        """
+        request() 한 번 (재시도 없음) — 기준 지연을 넘기면 중복 요청, 먼저 성공한 응답을 반환.
+        controller 는 바깥 AIMD 제어기 (이 호출은 이미 그 slot 안) — 중복 요청도 slot 하나를 차지하고 429 를 알림
+        """
+        with self.lock:
+            self.requests += 1
+        start = time.perf_counter()
+        elapsed = lambda: (time.perf_counter() - start) * 1000
+        threshold = self.threshold(template)
+        if threshold is None:
+            try:
+                return request()
+            finally:
+                ms = elapsed()
+                self._primary_done(template, ms)
+                record_hedge(self.model, effective_ms=ms)
+
+        # 두 요청 모두 별도 이벤트에 기록 → 이긴 쪽만 호출 이벤트로 옮기고 진 쪽은 따로 비용 기록
+        # (진 요청이 나중에 끝나도 이미 기록된 호출 이벤트를 건드리지 않음)
+        event = current_event()
+        shadows = {}
+        token = (object(), start)
+        record_hedge(self.model, pending=token)
+        primary = _pool().submit(bind_event(request, shadows.setdefault("primary", shadow_event(event))))
+        # 첫 요청이 끝난 시각은 중복 요청이 이겨도 기록 (hedge 가 없었다면 걸렸을 지연 = p99 비교 기준)
+        primary.add_done_callback(lambda f: self._primary_done(template, elapsed(), token))
+        done, _ = wait([primary], timeout=threshold)
+        if done or not self.allow(controller):
+            try:
+                return primary.result()
+            finally:
+                merge_event(event, shadows["primary"])
+                record_hedge(self.model, effective_ms=elapsed())
+
+        def backup_request():
+            try:
+                return request()
+            except Exception as e:
+                # 중복 요청의 429 / 503 도 제어기에 알림 (재시도는 하지 않음)
+                kind, retry_after = classify_error(e)
+                if controller is not None and kind is not None:
+                    controller.on_error(kind, retry_after)
+                raise
+
+        backup = _pool().submit(bind_event(backup_request, shadows.setdefault("backup", shadow_event(event))))
+        if controller is not None:
+            backup.add_done_callback(lambda f: controller.release())
+        if event is not None:
+            event["hedge"] = "sent"
+        names = {primary: "primary", backup: "backup"}
+        racing, error, winner = {primary, backup}, None, None
+        while racing and winner is None:
+            done, racing = wait(racing, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    winner = future
+                    break
+                error = error or future.exception()
+
+        # 진 쪽: 아직 시작 전이면 취소, 이미 보낸 HTTP 요청은 끊을 수 없으므로 (마감 시간 안에 끝남) 끝날 때 비용만 기록
+        # 진 첫 요청은 바깥 slot 을 곧 반납하므로 끝날 때까지 자리를 하나 더 잡아 둠
+        merge_event(event, shadows[names[winner or primary]])
+        for loser in (primary, backup):
+            if loser is winner or (winner is None and loser is primary) or loser.cancel():
+                continue
+            shadow = shadows[names[loser]]
+            if loser is primary and controller is not None:
+                controller.try_slot(force=True)
+                loser.add_done_callback(lambda f: controller.release())
+            loser.add_done_callback(lambda f, shadow=shadow: write_discarded(shadow, elapsed(), f.exception()))
+
+        won = winner is backup
+        if won and event is not None:
+            event["hedge"] = "won"
+        record_hedge(self.model, effective_ms=elapsed(), hedged=True, won=won)
+        if winner is None:
+            raise error
+        return winner.result()
+
+
+def hedger_for(model):
+    with _lock:
+        if model not in _hedgers:
+            _hedgers[model] = Hedger(model)
+        return _hedgers[model]
+
+
+def hedged(model, system, user, request, controller=None):
+    """
+    _cached 의 실제 호출 한 번 (AIMD 제어기 재시도 안쪽) — hedge 가 꺼져 있으면 request 그대로.
+    controller 는 그 제어기 (LLM_ADAPTIVE=0 이면 None — 중복 요청은 비율 상한 / RPM·TPM 버킷으로만 제한)
+    """
+    if not HEDGE_ENABLED:
+        return request
+    template = prompt_id(system, user)
+    return lambda: hedger_for(model).call(request, template, controller)
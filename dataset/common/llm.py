@@ -0,0 +1,259 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+from .adaptive import controller_for
+from .cache import ResponseCache, make_key
+from .engine import estimate_tokens
+from .generation import drop_rejected_sampling, gemini_settings, openai_settings
+from .hedging import DEADLINE_S, deadline_ms, hedged
+from .logprobs import logprob_settings
+from .telemetry import attempt, instrument_client, record_usage, track
+
+
+# LLM_CACHE=0 으로 캐시 끄기, LLM_CACHE_PATH 로 위치 변경
+CACHE_ENABLED = os.environ.get("LLM_CACHE", "1") != "0"
+
+# LLM_ADAPTIVE=0 이면 AIMD 동시성 제어 / 재시도 없이 바로 호출 (예외는 호출한 쪽으로)
+ADAPTIVE_ENABLED = os.environ.get("LLM_ADAPTIVE", "1") != "0"
+MAX_RETRIES = 5
+
+# 프롬프트 배치 — system: 고정 지시문은 system_instruction 으로, 행마다 바뀌는 내용만 contents 로 (기본)
+#                inline: 예전처럼 지시문을 contents 앞에 붙여 보냄 (기존 응답 캐시 / 결과와 바이트 단위로 같은 요청)
+PROMPT_LAYOUT = os.environ.get("LLM_PROMPT_LAYOUT", "system")
+
+# Gemini 명시적 컨텍스트 캐시 (cachedContents) — (모델, 작업, 방언)별 handle 하나를 만들어 재사용
+# LLM_CONTEXT_CACHE=0 으로 끄기. 지시문이 MIN_TOKENS 보다 짧으면 API 가 생성을 거부하므로 system_instruction 으로만 보냄
+CONTEXT_CACHE_ENABLED = os.environ.get("LLM_CONTEXT_CACHE", "1") != "0"
+CONTEXT_CACHE_TTL = 3600
+CONTEXT_CACHE_MIN_TOKENS = int(os.environ.get("LLM_CONTEXT_CACHE_MIN_TOKENS", "1024"))
+
+# 첫 출력 토큰의 상위 후보 수 (두 API 모두 최대 20)
+TOP_LOGPROBS = 20
+_cache = None
+# refreshed_cache() 안이면 True — repair.py 처럼 캐시에 남은 응답이 바로 고치려는 응답인 실행
+_refreshing = [False]
+
+# use_cache=REFRESH — 그 호출 하나만 캐시를 읽지 않고 새로 요청해서 같은 키의 캐시 항목을 덮어씀
+# (구조화 출력의 재요청처럼 캐시에 남은 응답이 잘못된 것으로 확인된 경우)
+REFRESH = "refresh"
+
+
+def get_cache():
+    """프로세스당 하나의 응답 캐시 (처음 사용할 때 연결)"""
+    global _cache
+    if _cache is None:
+        path = os.environ.get("LLM_CACHE_PATH")
+        _cache = ResponseCache(path) if path else ResponseCache()
+    return _cache
+
+
+@contextmanager
+def refreshed_cache():
+    """with 블록 안의 호출은 (어느 스레드에서든) 캐시를 읽지 않고 새로 요청해서 같은 키의 캐시 항목을 덮어씀"""
+    previous = _refreshing[0]
+    _refreshing[0] = True
+    try:
+        yield
+    finally:
+        _refreshing[0] = previous
+
+
+def _cached(provider, model, system, user, config, use_cache, call, max_retries):
+    # 실제 요청 한 번마다 hedge (LLM_HEDGE=1) — 재시도는 바깥 제어기가
+    call = hedged(model, system, user, call, controller_for(model) if ADAPTIVE_ENABLED else None)
+    if ADAPTIVE_ENABLED:
+        # 캐시 hit 은 한도를 차지하지 않도록 실제 호출만 제어기를 거침
+        request, call = call, lambda: controller_for(model).call(request, max_retries=max_retries)
+    # 캐시 조회 + 재시도까지 포함한 호출 하나를 telemetry 이벤트로 기록
+    with track(provider, model, system, user) as event:
+        if not (use_cache and CACHE_ENABLED):
+            return call()
+        cache = get_cache()
+        key = make_key(provider, model, system, user, config)
+        text = None if _refreshing[0] or use_cache == REFRESH else cache.get(key)
+        if text is not None:
+            event["cache"] = "hit"
+            return text
+        event["cache"] = "miss"
+        text = call()
+        # 빈 응답은 저장하지 않음 (다음 실행에서 다시 요청)
+        if text:
+            cache.put(key, text)
+        return text
+
+
+#############################################
+# 프롬프트 배치 / 컨텍스트 캐시
+#############################################
+def layout_prompt(system, user):
+    """(system_instruction, contents) — 고정 지시문을 앞(system)에, 바뀌는 내용을 뒤에 두어 접두부가 요청마다 같게 유지"""
+    if PROMPT_LAYOUT == "inline":
+        return None, f"{system}\n\n{user}"
+    return system, user
+
+
+class ContextCaches:
+    """(모델, 태그, 지시문 해시) → cachedContents 이름 (생성 실패 / 너무 짧으면 None 을 기억해서 다시 시도하지 않음)"""
+
+    def __init__(self):
+        self.handles = {}
+        self.lock = threading.Lock()
+        self.created = 0
+
+    def handle(self, client, model, system, tag):
+        key = (model, tag, hashlib.sha1(system.encode("utf-8")).hexdigest())
+        with self.lock:
+            name, expires = self.handles.get(key, (None, 0.0))
+            if key in self.handles and (name is None or time.time() < expires):
+                return name
+            # 처음이거나 TTL 이 거의 끝난 handle — 작업 하나당 한 번만 만들도록 lock 안에서 생성
+            name = None
+            if estimate_tokens(system) >= CONTEXT_CACHE_MIN_TOKENS:
+                from google.genai import types
+
+                try:
+                    cached = client.caches.create(model=model, config=types.CreateCachedContentConfig(
+                        system_instruction=system, ttl=f"{CONTEXT_CACHE_TTL}s", display_name=":".join(tag)))
+                    name = cached.name
+                    self.created += 1
+                except Exception as e:
+                    print(f"⚠️ 컨텍스트 캐시 생성 실패 ({e.__class__.__name__}, {':'.join(tag)}) → system_instruction 으로 전송")
+            self.handles[key] = (name, time.time() + CONTEXT_CACHE_TTL - 300)
+            return name
+
+    def active(self):
+        with self.lock:
+            return sum(name is not None for name, _ in self.handles.values())
+
+
+context_caches = ContextCaches()
+
+
+#############################################
+# 프로바이더 호출 — 모든 스크립트가 이 함수들을 거쳐 호출
+#############################################
+def gemini_generate(client, model, contents, system_instruction=None, use_cache=True, max_retries=MAX_RETRIES,
+                    prefix_cache=None, extract=None, **config):
+    """
+    Gemini generate_content 호출 → 응답 텍스트 (429 / 일시 오류는 재시도, 그 외 예외는 호출한 쪽에서 처리).
+    prefix_cache=(작업, 방언) 이면 system_instruction 을 명시적 컨텍스트 캐시로 보냄 (응답 캐시 키는 그대로).
+    작업의 생성 프로필(사고 예산 / 최대 출력 토큰 / stop)을 config 에 더함 — 응답 캐시 키에도 들어감 (common/generation.py).
+    extract(response) 를 주면 응답 텍스트 대신 그 결과(문자열)를 반환 / 캐시
+    """
+    if prefix_cache:
+        config = {**gemini_settings(model, prefix_cache[0], config), **config}
+
+    def call():
+        kwargs = {"model": model, "contents": contents}
+        cached_content = None
+        if prefix_cache and system_instruction and CONTEXT_CACHE_ENABLED:
+            cached_content = context_caches.handle(client, model, system_instruction, tuple(prefix_cache))
+        # 마감 시간은 요청 옵션으로만 (응답 캐시 키 config 에는 넣지 않음)
+        timeout = {"http_options": {"timeout": deadline_ms()}} if deadline_ms() else {}
+        if cached_content is not None:
+            from google.genai import types
+
+            kwargs["config"] = types.GenerateContentConfig(cached_content=cached_content, **config, **timeout)
+        elif system_instruction is not None or config or timeout:
+            from google.genai import types
+
+            kwargs["config"] = types.GenerateContentConfig(system_instruction=system_instruction, **config, **timeout)
+        attempt()
+        response = client.models.generate_content(**kwargs)
+        usage = response.usage_metadata
+        if usage is not None:
+            record_usage(usage.prompt_token_count, usage.candidates_token_count,
+                         usage.thoughts_token_count, usage.cached_content_token_count)
+        return extract(response) if extract else response.text or ""
+
+    instrument_client(client)
+    return _cached("gemini", model, system_instruction, contents, config, use_cache, call, max_retries)
+
+
+def openai_chat(client, model, system, user, use_cache=True, max_retries=MAX_RETRIES, prefix_cache=None, extract=None,
+                **params):
+    """
+    OpenAI chat.completions 호출 → 응답 텍스트 (429 / 일시 오류는 재시도, 그 외 예외는 호출한 쪽에서 처리).
+    OpenAI 는 1024 토큰 이상 같은 접두부를 자동으로 캐시하므로 prefix_cache=(작업, 방언) 은 prompt_cache_key 와
+    생성 프로필(reasoning_effort / max_completion_tokens / stop) 선택에만 사용. extract 는 gemini_generate 와 같음.
+    reasoning 이 켜지는 요청이면 temperature / seed / logprobs 는 빼고 보냄 (generation.drop_rejected_sampling)
+    """
+    if prefix_cache:
+        params = {**openai_settings(model, prefix_cache[0], params), **params}
+    params = drop_rejected_sampling(model, params)
+
+    def call():
+        messages = [{"role": "system", "content": system}] if system is not None else []
+        messages.append({"role": "user", "content": user})
+        # prompt_cache_key 는 응답에 영향이 없으므로 응답 캐시 키(params)에는 넣지 않음
+        extra = {"prompt_cache_key": ":".join(prefix_cache)} if prefix_cache else {}
+        if DEADLINE_S > 0:
+            extra["timeout"] = DEADLINE_S
+        attempt()
+        res = client.chat.completions.create(model=model, messages=messages, **params, **extra)
+        usage = res.usage
+        if usage is not None:
+            # completion_tokens 에는 reasoning 토큰이 포함되어 있으므로 나눠서 기록
+            reasoning = getattr(usage.completion_tokens_details, "reasoning_tokens", None) or 0
+            cached = getattr(usage.prompt_tokens_details, "cached_tokens", None)
+            record_usage(usage.prompt_tokens, usage.completion_tokens - reasoning, reasoning, cached)
+        return extract(res) if extract else res.choices[0].message.content or ""
+
+    instrument_client(client)
+    return _cached("openai", model, system, user, params, use_cache, call, max_retries)
+
+
+#############################################
+# 첫 토큰 logprobs — 출력 1토큰 호출의 상위 후보 [(토큰, logprob)] (객관식 채점용, common/logprobs.py)
+# 응답 캐시에는 JSON 텍스트로 저장. logprobs 를 돌려주지 않는 모델이면 None (빈 응답이므로 캐시하지 않음)
+# 사고 / reasoning 설정은 logprob_settings — 이 방식을 쓸 수 없는 모델이면 요청 없이 None
+#############################################
+def _gemini_top(response):
+    candidate = (response.candidates or [None])[0]
+    result = getattr(candidate, "logprobs_result", None)
+    if not result or not result.top_candidates:
+        return ""
+    return json.dumps([[c.token, c.log_probability] for c in result.top_candidates[0].candidates or []],
+                      ensure_ascii=False)
+
+
+def _openai_top(res):
+    logprobs = res.choices[0].logprobs
+    if not logprobs or not logprobs.content:
+        return ""
+    return json.dumps([[t.token, t.logprob] for t in logprobs.content[0].top_logprobs], ensure_ascii=False)
+
+
+def gemini_top_logprobs(client, model, contents, system_instruction=None, use_cache=True, max_retries=MAX_RETRIES,
+                        prefix_cache=None, **config):
+    settings = logprob_settings(model)
+    if settings is None:
+        return None
+    config = {"response_logprobs": True, "logprobs": TOP_LOGPROBS, **settings, **config}
+    text = gemini_generate(client, model, contents, system_instruction, use_cache, max_retries, prefix_cache,
+                           extract=_gemini_top, **config)
+    return json.loads(text) if text else None
+
+
+def openai_top_logprobs(client, model, system, user, use_cache=True, max_retries=MAX_RETRIES, prefix_cache=None,
+                        **params):
+    settings = logprob_settings(model)
+    if settings is None:
+        return None
+    params = {"logprobs": True, "top_logprobs": TOP_LOGPROBS, **settings, **params}
+    text = openai_chat(client, model, system, user, use_cache, max_retries, prefix_cache, extract=_openai_top, **params)
+    return json.loads(text) if text else None
+
+
+def print_cache_stats():
+    if CACHE_ENABLED and _cache is not None:
+        s = _cache.stats()
+        print(f"💾 응답 캐시: hit {s['hits']} / miss {s['misses']} "
+              f"(hit율 {s['hit_rate']:.1%}, {s['entries']}개, {s['bytes'] / 1024 / 1024:.1f} MB)")
+    if context_caches.created:
+        print(f"🧷 컨텍스트 캐시: {context_caches.created}개 생성, 사용 중 {context_caches.active()}개 "
+              f"(절약된 입력 토큰은 print_telemetry_stats / telemetry_report.py 의 cached 열)")
@@ -0,0 +1,210 @@
+import csv
+import io
+import json
+import os
+import time
+
+# group commit — 이만큼 행이 쌓이거나 시간이 지나면 저널을 fsync (행마다 syscall 하지 않음)
+COMMIT_ROWS = 50
+COMMIT_SECONDS = 2.0
+
+
+#############################################
+# 이미 기록된 출력 CSV에서 완료된 행 수 찾기
+#############################################
+def completed_prefix(path):
+    """
+    (header, 완료 행 수, 마지막 완전한 행 끝의 byte offset) 반환.
+    엔진이 입력 순서대로 기록하므로 완료된 행 = 입력의 앞쪽 N개 행이다.
+    줄바꿈 없이 끝났거나 컬럼 수가 맞지 않는 마지막 행은 반쯤 쓰인 행으로 본다.
+    """
+    with open(path, "rb") as f:
+        data = f.read()
+
+    lines = data.splitlines(keepends=True)
+    consumed = 0
+
+    def feed():
+        nonlocal consumed
+        for line in lines:
+            consumed += len(line)
+            yield line.decode("utf-8", errors="replace")
+
+    reader = csv.reader(feed())
+    try:
+        header = next(reader)
+    except (StopIteration, csv.Error):
+        return None, 0, 0
+    if header:
+        header[0] = header[0].lstrip("﻿")
+    offset = consumed
+    done = 0
+
+    try:
+        for record in reader:
+            ended = data[consumed - 1:consumed] in (b"\n", b"\r")
+            if not ended or len(record) != len(header):
+                break
+            done += 1
+            offset = consumed
+    except csv.Error:
+        pass
+
+    return header, done, offset
+
+
+#############################################
+# 저널 — 완료된 행을 JSON 배열 한 줄씩 이어 쓰는 append-only 파일 ({출력}.journal)
+#############################################
+def read_journal(path):
+    """(컬럼 목록, 행 값 목록, 마지막 완전한 줄 끝의 byte offset) — 잘린 마지막 줄은 버림"""
+    with open(path, "rb") as f:
+        data = f.read()
+
+    fieldnames, records, offset = None, [], 0
+    for line in data.splitlines(keepends=True):
+        if not line.endswith(b"\n"):
+            break
+        try:
+            value = json.loads(line)
+        except ValueError:
+            break
+        if fieldnames is None:
+            if not isinstance(value, dict) or "fields" not in value:
+                break
+            fieldnames = value["fields"]
+        elif isinstance(value, list) and len(value) == len(fieldnames):
+            records.append(value)
+        else:
+            break
+        offset += len(line)
+    return fieldnames, records, offset
+
+
+class _JournalWriter:
+    """csv.DictWriter 와 같은 writerow / writerows — 값은 CSV 에 쓰일 문자열 그대로 저널에 기록"""
+
+    def __init__(self, output, fieldnames):
+        self.output = output
+        self.fieldnames = list(fieldnames)
+
+    def writerow(self, row):
+        extra = [k for k in row if k not in self.fieldnames]
+        if extra:
+            raise ValueError(f"dict contains fields not in fieldnames: {', '.join(map(repr, extra))}")
+        values = ["" if row.get(f) is None else str(row.get(f)) for f in self.fieldnames]
+        self.output.append(json.dumps(values, ensure_ascii=False))
+
+    def writerows(self, rows):
+        for row in rows:
+            self.writerow(row)
+
+
+class ResumableCSV:
+    """
+    출력 CSV 래퍼. 완료된 행은 {path}.journal 에 이어 쓰고 COMMIT_ROWS 행 / COMMIT_SECONDS 초마다 fsync,
+    작업이 예외 없이 끝나면 임시 파일에 CSV 를 만든 뒤 rename 으로 한 번에 교체한다 (반쯤 쓰인 CSV 가 남지 않음).
+    resume=True 이면 헤더가 같은 저널(없으면 예전 방식으로 쓰인 CSV)의 완료 행부터 이어서 진행한다.
+    """
+
+    def __init__(self, path, resume=True, commit_rows=COMMIT_ROWS, commit_seconds=COMMIT_SECONDS):
+        self.path = path
+        self.journal_path = f"{path}.journal"
+        self.resume = resume
+        self.commit_rows = commit_rows
+        self.commit_seconds = commit_seconds
+        self.file = None
+        self.fieldnames = None
+        self.pending = 0
+        self.committed_at = time.monotonic()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if self.file is None:
+            return
+        self.commit()
+        self.file.close()
+        self.file = None
+        # 중단 / 예외 시에는 저널만 남기고 (다음 실행에서 이어서) 최종 CSV 는 건드리지 않음
+        if exc_type is None:
+            self.materialize()
+
+    def _resume_point(self, fieldnames):
+        """이어서 쓸 저널을 준비하고 완료된 행 수 반환 (없거나 헤더가 다르면 None)"""
+        if os.path.exists(self.journal_path):
+            header, records, offset = read_journal(self.journal_path)
+            if header == list(fieldnames):
+                with open(self.journal_path, "r+b") as f:
+                    f.truncate(offset)
+                return len(records)
+            print(f"⚠ {self.journal_path}: 헤더가 달라 처음부터 다시 작성")
+            return None
+
+        if os.path.exists(self.path) and os.path.getsize(self.path) > 0:
+            header, done, offset = completed_prefix(self.path)
+            if header != list(fieldnames):
+                print(f"⚠ {self.path}: 헤더가 달라 처음부터 다시 작성")
+                return None
+            # 예전 방식(행마다 flush)으로 쓰인 CSV — 완료된 행을 저널로 옮겨서 이어감
+            with open(self.path, "rb") as f:
+                text = f.read(offset).decode("utf-8", errors="replace").lstrip("\ufeff")
+            records = list(csv.reader(io.StringIO(text, newline="")))[1:done + 1]
+            self._write_journal(fieldnames, records)
+            return done
+        return None
+
+    def _write_journal(self, fieldnames, records):
+        with open(self.journal_path, "w", encoding="utf-8", newline="\n") as f:
+            f.write(json.dumps({"fields": list(fieldnames)}, ensure_ascii=False) + "\n")
+            for record in records:
+                f.write(json.dumps(record, ensure_ascii=False) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+
+    def start(self, fieldnames):
+        """(writer, 이미 완료된 행 수) 반환"""
+        self.fieldnames = list(fieldnames)
+        done = self._resume_point(fieldnames) if self.resume else None
+        if done is None:
+            self._write_journal(fieldnames, [])
+            done = 0
+        elif done:
+            print(f"↻ {self.path}: {done}행 완료됨 → 이어서 진행")
+
+        self.file = open(self.journal_path, "a", encoding="utf-8", newline="\n")
+        self.committed_at = time.monotonic()
+        return _JournalWriter(self, fieldnames), done
+
+    def append(self, line):
+        self.file.write(line + "\n")
+        self.pending += 1
+        if self.pending >= self.commit_rows or time.monotonic() - self.committed_at >= self.commit_seconds:
+            self.commit()
+
+    def commit(self):
+        """버퍼에 쌓인 행을 디스크까지 기록 (group commit)"""
+        if self.pending:
+            self.file.flush()
+            os.fsync(self.file.fileno())
+            self.pending = 0
+        self.committed_at = time.monotonic()
+
+    def flush(self):
+        """예전 호출 호환용 — 행마다 부르더라도 group commit 주기가 됐을 때만 실제로 기록"""
+        if self.pending and time.monotonic() - self.committed_at >= self.commit_seconds:
+            self.commit()
+
+    def materialize(self):
+        """저널 → {path}.tmp CSV → fsync → rename (원자적 교체) → 저널 삭제"""
+        fieldnames, records, _ = read_journal(self.journal_path)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(fieldnames)
+            writer.writerows(records)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+        os.remove(self.journal_path)
@@ -0,0 +1,240 @@
+import csv
+import math
+import os
+import random
+from collections import defaultdict
+from contextlib import contextmanager
+from statistics import NormalDist
+
+from .corpus import load_rows, parse_list
+from .engine import Job
+from .resume import read_journal
+from .scoring import score_mednli, score_truthfulqa
+
+
+#############################################
+# 순차 적응 샘플링 — 행을 시드 고정 무작위 순서로 평가하다가
+# 방언 정확도가 충분히 정해지면 (dataset, 방언, 모델) 흐름별로 중단
+#############################################
+SAMPLING_DEFAULTS = {
+    "seed": 0,
+    "look_every": 50,      # 몇 행마다 중간 점검할지
+    "min_rows": 150,       # 이보다 적으면 멈추지 않음
+    "max_looks": 30,       # 반복 점검 보정 (유의수준을 alpha / max_looks 로 나눔)
+    "alpha": 0.05,
+    "width": 0.08,         # 정확도 신뢰구간 폭이 이 이하가 되면 중단
+    "margin": 0.03,        # ko 대비 차이의 신뢰구간이 ±margin 안에 들어오면 "차이 없음"으로 중단
+    "metrics": {"truthfulqa": "mc1", "mednli": "mednli"},
+}
+
+ROW_ID = "row_id"
+SAMPLING_FIELDS = ["dataset", "evaluator", "dialect", "rows", "total", "saved", "accuracy", "ci_low", "ci_high",
+                   "diff", "diff_low", "diff_high", "reason"]
+
+
+def _write_rows(output, fieldnames, rows):
+    tmp_path = f"{output}.tmp"
+    with open(tmp_path, "w", encoding="utf-8", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=fieldnames)
+        writer.writeheader()
+        writer.writerows(rows)
+    os.replace(tmp_path, output)
+    return output
+
+
+def permuted_input(source, output, seed):
+    """입력 CSV 를 시드 고정 순서로 섞은 복사본 작성 (원래 행 번호는 row_id 컬럼) — 방언 간 같은 순서 = 같은 문항"""
+    fieldnames, rows = load_rows(source)
+    order = list(range(len(rows)))
+    random.Random(seed).shuffle(order)
+    if ROW_ID not in fieldnames:
+        fieldnames = fieldnames + [ROW_ID]
+    return _write_rows(output, fieldnames, [dict(rows[i], **{ROW_ID: rows[i].get(ROW_ID, i)}) for i in order])
+
+
+#############################################
+# 층화 표본 (smoke test) — 긴 실행 전에 프롬프트 / 파싱 / 처리량을 몇 분 안에 확인
+#############################################
+def stratum(dataset, row):
+    """MedNLI 는 gold_label, TruthfulQA 는 (category, mc1 선택지 수) — 선택지 7개 이상은 한 층으로"""
+    if dataset == "mednli":
+        return row.get("gold_label") or ""
+    choices = len(parse_list(row.get("mc1_labels")) or [])
+    return row.get("category") or row.get("Category") or "", min(choices, 7)
+
+
+def stratified_indices(dataset, rows, n, seed):
+    """층별 비율대로 (최대 잔여법) n 행을 고른 행 번호 (원래 순서) — 층 수가 n 이하면 층마다 최소 1행"""
+    if n >= len(rows):
+        return list(range(len(rows)))
+    strata = defaultdict(list)
+    for i, row in enumerate(rows):
+        strata[stratum(dataset, row)].append(i)
+
+    quotas = {k: n * len(v) / len(rows) for k, v in strata.items()}
+    floor = 1 if len(strata) <= n else 0
+    counts = {k: min(len(strata[k]), max(floor, int(q))) for k, q in quotas.items()}
+    for k in sorted(quotas, key=lambda k: quotas[k] - int(quotas[k]), reverse=True):
+        if sum(counts.values()) >= n:
+            break
+        if counts[k] < len(strata[k]):
+            counts[k] += 1
+
+    rng = random.Random(seed)
+    chosen = []
+    for k in sorted(strata, key=str):
+        chosen += rng.sample(strata[k], counts[k])
+    return sorted(chosen)
+
+
+def take_rows(source, output, indices):
+    """source 의 indices 행만 output 에 작성 (번역 파일도 원문과 같은 행 번호로 잘라냄)"""
+    fieldnames, rows = load_rows(source)
+    return _write_rows(output, fieldnames, [rows[i] for i in indices if i < len(rows)])
+
+
+def _normal_ci(values, z):
+    n = len(values)
+    if n == 0:
+        return None, None, None
+    mean = sum(values) / n
+    var = sum((v - mean) ** 2 for v in values) / (n - 1) if n > 1 else 0.25
+    half = z * math.sqrt(max(var, 1e-12) / n)
+    return mean, mean - half, mean + half
+
+
+class StreamMonitor:
+    """(dataset, 방언, 평가 모델) 흐름 하나 — 기록된 결과 행을 모아 중간 점검마다 중단 여부 판단"""
+
+    def __init__(self, dataset, dialect, evaluator, config, baseline=None):
+        self.dataset = dataset
+        self.dialect = dialect
+        self.evaluator = evaluator
+        self.config = config
+        self.metric = config["metrics"].get(dataset)
+        self.baseline = baseline
+        self.dependents = []
+        self.rows = []
+        self.total = 0
+        self.delivered = 0
+        self.checked_at = 0
+        self.stopped = False
+        self.reason = None
+        self.accuracy = self.ci = self.diff = self.diff_ci = None
+        # 반복해서 들여다보는 만큼 유의수준을 보수적으로 나눔 (Bonferroni)
+        self.z = NormalDist().inv_cdf(1 - config["alpha"] / (2 * config["max_looks"]))
+        if baseline is not None:
+            baseline.dependents.append(self)
+
+    def resume_from(self, output_file):
+        """이어서 실행할 때 이미 기록된 결과 행(저널 또는 CSV)도 점검에 포함"""
+        journal = f"{output_file}.journal"
+        if os.path.exists(journal):
+            fieldnames, records, _ = read_journal(journal)
+            self.rows = [dict(zip(fieldnames, r)) for r in records] if fieldnames else []
+        elif os.path.exists(output_file):
+            _, self.rows = load_rows(output_file)
+        self.rows = [r for r in self.rows if r.get(ROW_ID) not in (None, "")]
+
+    def collect(self, result):
+        self.rows.extend(result if isinstance(result, list) else [result])
+
+    def scored(self):
+        """{row_id: 정답 여부} — 무효 / 모름 행은 제외"""
+        if not self.rows:
+            return {}
+        fieldnames = list(self.rows[0])
+        scores = score_mednli(self.rows, fieldnames) if self.dataset == "mednli" else score_truthfulqa(self.rows, fieldnames)
+        if self.metric not in scores:
+            return {}
+        correct, invalid, _ = scores[self.metric]
+        return {row[ROW_ID]: bool(c) for row, c, bad in zip(self.rows, correct, invalid) if not bad}
+
+    def measure(self):
+        """정확도 신뢰구간 갱신 → {row_id: 정답 여부}"""
+        self.checked_at = len(self.rows)
+        scores = self.scored()
+        self.accuracy, low, high = _normal_ci([float(v) for v in scores.values()], self.z)
+        self.ci = (low, high)
+        return scores
+
+    def check(self):
+        cfg = self.config
+        if self.stopped:
+            return True
+        if self.dependents:
+            # ko 흐름은 짝지을 방언 흐름이 모두 멈출 때까지 계속
+            if all(d.stopped for d in self.dependents):
+                self.measure()
+                self.stopped, self.reason = True, "baseline"
+            return self.stopped
+        if len(self.rows) < cfg["min_rows"] or len(self.rows) - self.checked_at < cfg["look_every"]:
+            return False
+
+        scores = self.measure()
+        if self.baseline is not None:
+            base = self.baseline.scored()
+            paired = [float(scores[k]) - float(base[k]) for k in scores if k in base]
+            if len(paired) >= cfg["min_rows"]:
+                self.diff, d_low, d_high = _normal_ci(paired, self.z)
+                self.diff_ci = (d_low, d_high)
+                if d_low > 0 or d_high < 0:
+                    self.stopped, self.reason = True, "differs"
+                elif -cfg["margin"] <= d_low and d_high <= cfg["margin"]:
+                    self.stopped, self.reason = True, "equivalent"
+        low, high = self.ci
+        if not self.stopped and low is not None and high - low <= cfg["width"]:
+            self.stopped, self.reason = True, "width"
+        return self.stopped
+
+    def wrap(self, job):
+        """Job 의 on_result 에 결과 수집을 붙이고, 스케줄러가 확인할 stop 조건 연결"""
+        self.total = len(job.items)
+        on_result = job.on_result
+
+        def collect(i, item, result):
+            if on_result:
+                on_result(i, item, result)
+            self.delivered += 1
+            self.collect(result)
+
+        return Job(job.name, job.items, job.func, collect, job.estimate, stop=self.check)
+
+    def record(self):
+        """보고서 한 줄 — total / saved 는 작업 단위(행 또는 배치) 기준 = 아낀 호출 수"""
+        if self.rows:
+            # 마지막 점검 이후 도착한 행까지 포함한 최종 정확도
+            self.measure()
+        fmt = lambda v: None if v is None else round(v, 4)
+        return {
+            "dataset": self.dataset, "evaluator": self.evaluator, "dialect": self.dialect,
+            "rows": len(self.rows), "total": self.total, "saved": self.total - self.delivered,
+            "accuracy": fmt(self.accuracy), "ci_low": fmt(self.ci and self.ci[0]), "ci_high": fmt(self.ci and self.ci[1]),
+            "diff": fmt(self.diff), "diff_low": fmt(self.diff_ci and self.diff_ci[0]),
+            "diff_high": fmt(self.diff_ci and self.diff_ci[1]), "reason": self.reason or "complete",
+        }
+
+
+@contextmanager
+def sampled_job(job_context, monitor):
+    """스크립트의 *_job() context manager 를 감싸 monitor 가 붙은 Job 을 yield"""
+    with job_context as job:
+        yield monitor.wrap(job)
+
+
+def write_sampling_report(monitors, path):
+    """흐름별 처리 행 수 / 아낀 호출 수 출력 + CSV 저장"""
+    records = [m.record() for m in monitors]
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=SAMPLING_FIELDS)
+        writer.writeheader()
+        writer.writerows(records)
+
+    for r in records:
+        diff = "" if r["diff"] is None else f", ko 대비 {r['diff']:+.3f} [{r['diff_low']:+.3f}, {r['diff_high']:+.3f}]"
+        acc = "-" if r["accuracy"] is None else f"{r['accuracy']:.3f}"
+        print(f"  {r['evaluator']:<24}{r['dataset']:<12}{r['dialect']:<13}{r['total'] - r['saved']:>6}/{r['total']:<6}"
+              f" 정확도 {acc}{diff}  ({r['reason']})")
+    total = sum(r["total"] for r in records)
+    saved = sum(r["saved"] for r in records)
+    print(f"✂️ 적응 샘플링: 호출 {total}회 중 {saved}회 절약 ({saved / max(1, total):.1%}) → {path}")
@@ -0,0 +1,222 @@
+import asyncio
+import sys
+import traceback
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import ExitStack
+
+from tqdm import tqdm
+
+from .adaptive import status_line
+from .engine import RateLimiter, thread_budget
+from .telemetry import run_tagged
+
+DEFAULT_BUDGET = {"concurrency": 4, "rpm": None, "tpm": None}
+
+
+#############################################
+# 작업 그래프 노드
+#############################################
+class Task:
+    """
+    job : 인자 없이 호출하면 Job 을 yield 하는 context manager 를 돌려주는 함수 (행 단위 작업 → 모델 풀에서 실행)
+    run : 인자 없는 일반 함수 (요약 / 집계처럼 API 호출이 없는 작업)
+    deps: 먼저 끝나야 하는 Task 이름들 — 하나라도 실패하면 이 작업은 건너뜀
+    """
+
+    def __init__(self, name, model=None, deps=(), job=None, run=None):
+        self.name = name
+        self.model = model
+        self.deps = list(deps)
+        self.job = job
+        self.run = run
+
+
+class _ActiveJob:
+    """실행 중인 Job 하나의 상태 — 꺼낸 위치 / 끝난 결과 / 순서대로 내보낸 위치"""
+
+    def __init__(self, task, job, stack):
+        self.task = task
+        self.job = job
+        self.stack = stack
+        self.cursor = 0
+        self.inflight = 0
+        self.finished = {}
+        self.next_index = 0
+        self.error = None
+        self.stopped = False
+
+    @property
+    def exhausted(self):
+        return self.error is not None or self.stopped or self.cursor >= len(self.job.items)
+
+
+class _ModelPool:
+    """모델 하나의 작업 큐 — 활성 Job 들을 돌아가며 한 행씩 꺼냄 (파일 하나가 할당량을 독점하지 않도록)"""
+
+    def __init__(self, model, budget, pending):
+        self.model = model
+        self.concurrency = budget.get("concurrency") or DEFAULT_BUDGET["concurrency"]
+        self.limiter = RateLimiter(rpm=budget.get("rpm"), tpm=budget.get("tpm"))
+        self.pending = pending
+        self.active = deque()
+        self.cond = asyncio.Condition()
+
+    async def next_item(self):
+        """(상태, 행 번호) — 남은 Job 이 없으면 None"""
+        async with self.cond:
+            while True:
+                for _ in range(len(self.active)):
+                    state = self.active[0]
+                    self.active.rotate(-1)
+                    if not state.exhausted:
+                        i = state.cursor
+                        state.cursor += 1
+                        state.inflight += 1
+                        return state, i
+                if self.pending == 0:
+                    return None
+                await self.cond.wait()
+
+    async def notify(self):
+        async with self.cond:
+            self.cond.notify_all()
+
+
+#############################################
+# 실행 — 모든 파일의 행 단위 작업을 모델별 풀 하나에서 처리
+#############################################
+async def _run_plan(tasks, budgets):
+    loop = asyncio.get_running_loop()
+    by_name = {t.name: t for t in tasks}
+    done = {t.name: asyncio.Event() for t in tasks}
+    status = {}
+
+    models = {}
+    for t in tasks:
+        if t.job is not None:
+            models[t.model] = models.get(t.model, 0) + 1
+    pools = {m: _ModelPool(m, dict(DEFAULT_BUDGET, **(budgets.get(m) or {})), n) for m, n in models.items()}
+    workers = sum(p.concurrency for p in pools.values())
+
+    with ThreadPoolExecutor(max_workers=workers + 1) as executor, \
+            tqdm(total=0, desc="run plan") as bar:
+
+        async def finish(task, result, pool=None):
+            status[task.name] = result
+            done[task.name].set()
+            if pool is not None:
+                pool.pending -= 1
+                await pool.notify()
+
+        async def close(state, pool):
+            pool.active.remove(state)
+            error = state.error
+            try:
+                if error is None:
+                    state.stack.close()
+                else:
+                    state.stack.__exit__(type(error), error, error.__traceback__)
+            except Exception as e:
+                error = error or e
+            if error is not None:
+                tqdm.write(f"❌ {state.task.name}: {error!r}")
+            await finish(state.task, "failed" if error else "done", pool)
+
+        async def activate(task):
+            for dep in task.deps:
+                await done[dep].wait()
+            if any(status[dep] != "done" for dep in task.deps):
+                tqdm.write(f"⏭️ {task.name}: 선행 작업 실패로 건너뜀")
+                return await finish(task, "skipped", pools.get(task.model) if task.job else None)
+
+            if task.run is not None:
+                try:
+                    await loop.run_in_executor(executor, task.run)
+                except Exception:
+                    traceback.print_exc(file=sys.stderr)
+                    return await finish(task, "failed")
+                return await finish(task, "done")
+
+            pool = pools[task.model]
+            stack = ExitStack()
+            try:
+                job = stack.enter_context(task.job())
+            except Exception as e:
+                stack.close()
+                tqdm.write(f"❌ {task.name}: {e!r}")
+                return await finish(task, "failed", pool)
+
+            state = _ActiveJob(task, job, stack)
+            pool.active.append(state)
+            bar.total += len(job.items)
+            bar.refresh()
+            if not job.items:
+                return await close(state, pool)
+            await pool.notify()
+
+        async def worker(pool):
+            while True:
+                picked = await pool.next_item()
+                if picked is None:
+                    return
+                state, i = picked
+                job = state.job
+                item = job.items[i]
+                try:
+                    tokens = job.estimate(item) if job.estimate else 0
+                    await pool.limiter.acquire(tokens)
+                    # SDK 호출은 blocking 이므로 스레드에서 실행 (telemetry 이벤트에 계획의 작업 이름을 붙임)
+                    result = await loop.run_in_executor(executor, run_tagged, state.task.name, job.func, item,
+                                                        thread_budget(pool.limiter, loop, tokens))
+                except Exception as e:
+                    # 한 행이 실패하면 그 파일만 멈춤 (다른 파일 작업은 계속)
+                    state.error = state.error or e
+                else:
+                    state.finished[i] = result
+                    # 앞 순서가 모두 끝난 결과만 입력 순서대로 내보냄
+                    while state.error is None and state.next_index in state.finished:
+                        k = state.next_index
+                        value = state.finished.pop(k)
+                        if job.on_result:
+                            try:
+                                job.on_result(k, job.items[k], value)
+                            except Exception as e:
+                                state.error = e
+                        state.next_index += 1
+                    # 조기 종료 조건 (적응 샘플링) — 남은 항목은 꺼내지 않고 진행 중인 것만 마저 받음
+                    if state.error is None and not state.stopped and job.stop and job.stop():
+                        state.stopped = True
+                        bar.total -= len(job.items) - state.cursor
+                        bar.refresh()
+                state.inflight -= 1
+                bar.update(1)
+                line = status_line()
+                if line:
+                    bar.set_postfix_str(line, refresh=False)
+
+                if state.inflight == 0 and (state.next_index >= len(job.items) or state.error is not None
+                                            or state.stopped):
+                    if state in pool.active:
+                        await close(state, pool)
+
+        await asyncio.gather(
+            *(activate(t) for t in tasks),
+            *(worker(pool) for pool in pools.values() for _ in range(pool.concurrency)),
+        )
+
+    return {name: status[name] for name in by_name}
+
+
+def run_plan(tasks, budgets=None):
+    """
+    tasks 의 의존 관계대로 실행한다. job 이 있는 작업은 선행 작업이 끝나는 즉시 열려서
+    같은 모델의 다른 파일 작업과 한 풀에서 번갈아 실행된다 (모델별 동시 요청 수 / RPM / TPM 은 budgets).
+    반환: {작업 이름: "done" | "failed" | "skipped"}
+    """
+    names = {t.name for t in tasks}
+    for t in tasks:
+        missing = [d for d in t.deps if d not in names]
+        if missing:
+            raise ValueError(f"{t.name}: 알 수 없는 선행 작업 {missing}")
+    return asyncio.run(_run_plan(tasks, budgets or {}))
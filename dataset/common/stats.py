@@ -0,0 +1,88 @@
+import math
+
+import numpy as np
+
+
+DEFAULT_RESAMPLES = 10000
+DEFAULT_ALPHA = 0.05
+# 한 번에 만드는 인덱스 행렬의 행 수 (batch × n int32 — 1372행 기준 약 5MB)
+RESAMPLE_BATCH = 1000
+
+
+#############################################
+# 짝짓기 — 두 결과 파일은 같은 문항이 같은 행 번호에 있어야 함
+#############################################
+def paired_length(a, b, what="두 배열"):
+    """행 순서로 짝짓는 두 배열의 공통 행 수 — 길이가 다르면 잘라 맞추지 않고 ValueError (밀린 행끼리 짝지어지는 것 방지)"""
+    n_a, n_b = a.shape[0], b.shape[0]
+    if n_a != n_b:
+        raise ValueError(f"{what}: 행 수가 다름 ({n_a} != {n_b}) — 같은 문항끼리 짝지을 수 없음")
+    return n_a
+
+
+#############################################
+# 부트스트랩 — 재표본 인덱스 행렬을 batch 단위로 한꺼번에 생성
+#############################################
+def bootstrap_means(values, resamples=DEFAULT_RESAMPLES, seed=0, batch=RESAMPLE_BATCH):
+    """values (행별 0/1 또는 -1/0/1) 를 resamples 번 복원추출한 평균 배열"""
+    values = np.asarray(values, dtype=np.int8)
+    n = len(values)
+    if n == 0:
+        return np.full(resamples, np.nan)
+    rng = np.random.default_rng(seed)
+    means = np.empty(resamples)
+    for start in range(0, resamples, batch):
+        size = min(batch, resamples - start)
+        index = rng.integers(0, n, size=(size, n), dtype=np.int32)
+        means[start:start + size] = values[index].sum(axis=1, dtype=np.int64) / n
+    return means
+
+
+def bootstrap_ci(correct, alpha=DEFAULT_ALPHA, **kwargs):
+    """정확도와 percentile 신뢰구간 → (점추정, 하한, 상한)"""
+    correct = np.asarray(correct, dtype=bool)
+    if len(correct) == 0:
+        return float("nan"), float("nan"), float("nan")
+    means = bootstrap_means(correct, **kwargs)
+    low, high = np.quantile(means, [alpha / 2, 1 - alpha / 2])
+    return float(correct.mean()), float(low), float(high)
+
+
+def paired_bootstrap(a, b, alpha=DEFAULT_ALPHA, **kwargs):
+    """
+    같은 문항 번호로 짝지은 두 정답 배열의 정확도 차이 (a - b).
+    두 배열을 같은 인덱스로 재표본하는 것과 같도록 행별 차이(-1/0/1)를 재표본한다.
+    → (차이, 하한, 상한, 양측 p-value)
+    """
+    diff = np.asarray(a, dtype=np.int8) - np.asarray(b, dtype=np.int8)
+    if len(diff) == 0:
+        return float("nan"), float("nan"), float("nan"), float("nan")
+    means = bootstrap_means(diff, **kwargs)
+    low, high = np.quantile(means, [alpha / 2, 1 - alpha / 2])
+    # 재표본 차이가 0의 반대편에 떨어지는 비율 × 2
+    p = 2 * min((means <= 0).mean(), (means >= 0).mean())
+    return float(diff.mean()), float(low), float(high), float(min(1.0, p))
+
+
+#############################################
+# McNemar 검정 (짝지은 정답 / 오답 불일치 쌍)
+#############################################
+def mcnemar(a, b):
+    """
+    (a만 정답 수, b만 정답 수, 양측 p-value).
+    불일치 쌍이 25개 미만이면 정확 이항검정, 그 이상이면 연속성 보정 카이제곱 (자유도 1).
+    """
+    a = np.asarray(a, dtype=bool)
+    b = np.asarray(b, dtype=bool)
+    only_a = int((a & ~b).sum())
+    only_b = int((~a & b).sum())
+    discordant = only_a + only_b
+    if discordant == 0:
+        return only_a, only_b, 1.0
+    if discordant < 25:
+        k = min(only_a, only_b)
+        p = 2 * sum(math.comb(discordant, i) for i in range(k + 1)) / 2 ** discordant
+    else:
+        chi2 = (abs(only_a - only_b) - 1) ** 2 / discordant
+        p = math.erfc(math.sqrt(chi2 / 2))
+    return only_a, only_b, min(1.0, p)
@@ -0,0 +1,149 @@
+import json
+import os
+import threading
+
+from .batching import parse_json_object
+from .llm import REFRESH
+
+
+# LLM_STRUCTURED=1 이면 판정 모델에게 JSON 스키마로 제한된 출력을 요청 (기본은 기존 자유 형식 프롬프트 — 응답 캐시 / 결과 그대로)
+STRUCTURED_ENABLED = os.environ.get("LLM_STRUCTURED", "0") != "0"
+
+# 깨진 JSON / 스키마 위반일 때만 응답 캐시를 읽지 않고 다시 요청하는 횟수 (UNKNOWN 같은 정상 답은 재요청하지 않음)
+# 재요청 응답은 같은 캐시 항목을 덮어씀 → 다음 실행이 깨진 첫 응답을 다시 읽지 않음
+STRUCTURED_RETRIES = 1
+
+# 파싱 실패가 재요청 후에도 남은 행에 기록하는 값 (평가 스크립트의 ERROR_API 와 구분)
+PARSE_ERROR = "ERROR_PARSE"
+
+MC_LETTERS = ["A", "B", "C", "D"]
+
+_lock = threading.Lock()
+_stats = {}
+
+
+#############################################
+# 스키마 — JSON Schema 의 작은 부분집합 (object / array / string enum / integer)
+#############################################
+def enum(values):
+    return {"type": "string", "enum": list(values)}
+
+
+def obj(**properties):
+    return {"type": "object", "properties": properties, "required": list(properties)}
+
+
+def array(items):
+    return {"type": "array", "items": items}
+
+
+def batch_schema(**properties):
+    """배치 응답 [{"id": n, ...}] 스키마"""
+    return array(obj(id={"type": "integer"}, **properties))
+
+
+#############################################
+# 프로바이더별 요청 설정 — 응답 캐시 키(config / params)에도 들어가므로 자유 형식 응답과 섞이지 않음
+#############################################
+def gemini_config(schema):
+    """gemini_generate(**config) 에 넘길 JSON 모드 설정"""
+    return {"response_mime_type": "application/json", "response_schema": schema}
+
+
+def _strict(schema):
+    # OpenAI strict 모드는 모든 object 에 additionalProperties: false 가 필요 (Gemini Schema 는 이 필드가 없음)
+    if schema.get("type") == "object":
+        return dict(schema, additionalProperties=False,
+                    properties={k: _strict(v) for k, v in schema["properties"].items()})
+    if schema.get("type") == "array":
+        return dict(schema, items=_strict(schema["items"]))
+    return schema
+
+
+def openai_schema(schema):
+    """OpenAI strict 모드는 최상위가 object 여야 하므로 배열은 {"answers": [...]} 로 감쌈 (응답 검증도 이 스키마로)"""
+    return schema if schema.get("type") == "object" else obj(answers=schema)
+
+
+def openai_params(name, schema):
+    """openai_chat(**params) 에 넘길 response_format (openai_schema 로 감싼 스키마)"""
+    return {"response_format": {"type": "json_schema",
+                                "json_schema": {"name": name, "strict": True, "schema": _strict(openai_schema(schema))}}}
+
+
+#############################################
+# 검증 디코더 — json.loads 한 번 + 스키마 순회 (정규식 / 줄 단위 스캔 없음)
+#############################################
+def valid(value, schema):
+    kind = schema.get("type")
+    if kind == "object":
+        return (isinstance(value, dict) and all(k in value for k in schema.get("required", []))
+                and all(valid(value[k], s) for k, s in schema["properties"].items() if k in value))
+    if kind == "array":
+        return isinstance(value, list) and all(valid(v, schema["items"]) for v in value)
+    if kind == "integer":
+        return isinstance(value, int) and not isinstance(value, bool)
+    if kind == "string":
+        return isinstance(value, str) and ("enum" not in schema or value in schema["enum"])
+    return True
+
+
+def decode(text, schema):
+    """응답 텍스트 → 스키마를 만족하는 값, 아니면 None (```json 코드블록으로 감싼 응답도 허용)"""
+    if not text:
+        return None
+    try:
+        value = json.loads(text)
+    except ValueError:
+        value = parse_json_object(text) if schema.get("type") == "object" else None
+    return value if value is not None and valid(value, schema) else None
+
+
+def structured_call(call, schema, task):
+    """
+    call(use_cache) → 응답 텍스트 (API 최종 실패면 None) 를 호출하고 decode.
+    파싱 실패일 때만 STRUCTURED_RETRIES 번까지 use_cache=REFRESH 로 다시 요청 — 캐시는 읽지 않고 새 응답으로 덮어씀
+    (API 오류 재시도는 AIMD 제어기가 이미 함).
+    반환: (검증된 값 또는 None, 마지막 응답 텍스트 — None 이면 API 실패)
+    """
+    value = text = None
+    attempts = 0
+    for attempt in range(STRUCTURED_RETRIES + 1):
+        text = call(True if attempt == 0 else REFRESH)
+        if text is None:
+            break
+        attempts += 1
+        value = decode(text, schema)
+        if value is not None:
+            break
+    if attempts:
+        with _lock:
+            s = _stats.setdefault(task, {"responses": 0, "failed": 0, "retried": 0, "unresolved": 0})
+            s["responses"] += 1
+            s["failed"] += attempts > 1 or value is None
+            s["retried"] += attempts - 1
+            s["unresolved"] += value is None
+    return value, text
+
+
+def structured_batch(call, schema, task):
+    """
+    배치 요청(answer_batch 의 call_batch)용 structured_call — 같은 검증 / 재요청 / 통계.
+    반환: 스키마를 만족하는 배치 배열 ({"answers": [...]} 로 감싼 응답이면 배열만),
+    재요청 후에도 스키마 위반이면 마지막 응답 텍스트 (answer_batch 가 맞는 행만 쓰고 나머지는 분할 재시도).
+    API 최종 실패면 RuntimeError (answer_batch 가 분할 재시도)
+    """
+    value, text = structured_call(call, schema, task)
+    if text is None:
+        raise RuntimeError("ERROR_API")
+    if value is None:
+        return text
+    return value["answers"] if schema.get("type") == "object" and "answers" in schema["properties"] else value
+
+
+def print_structured_stats():
+    with _lock:
+        stats = {k: dict(v) for k, v in _stats.items()}
+    for task, s in sorted(stats.items()):
+        print(f"🧾 구조화 출력 {task}: 응답 {s['responses']}개 중 파싱 실패 {s['failed']} "
+              f"({s['failed'] / max(1, s['responses']):.2%}) → 재요청 {s['retried']}회, 남은 실패 {s['unresolved']}")
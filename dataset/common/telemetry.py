@@ -0,0 +1,317 @@
+import cProfile
+import hashlib
+import json
+import os
+import pstats
+import threading
+import time
+import weakref
+from contextlib import contextmanager
+
+
+DATASET_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# LLM_TELEMETRY=0 으로 끄기, LLM_TELEMETRY_DIR 로 위치 변경
+TELEMETRY_ENABLED = os.environ.get("LLM_TELEMETRY", "1") != "0"
+TELEMETRY_DIR = os.environ.get("LLM_TELEMETRY_DIR", os.path.join(DATASET_DIR, "telemetry"))
+
+# 실행(run) 하나 = 같은 LLM_RUN_ID — Pool 자식 프로세스도 환경 변수를 물려받아 같은 run 으로 묶임
+RUN_ID = os.environ.setdefault("LLM_RUN_ID", time.strftime("%Y%m%d-%H%M%S"))
+
+# 1M 토큰당 USD (입력, 캐시된 입력, 출력) — 사고(thinking / reasoning) 토큰은 출력 단가로 계산, 요금표가 바뀌면 수정
+PRICES = {
+    "gemini-2.5-pro": (1.25, 0.31, 10.0),
+    "gemini-2.5-flash": (0.3, 0.03, 2.5),
+    "gemini-3.0-pro": (2.0, 0.2, 12.0),
+    "gemini-3-pro-preview": (2.0, 0.2, 12.0),
+    "gpt-5.1": (1.25, 0.125, 10.0),
+    "gpt-5-mini": (0.25, 0.025, 2.0),
+    "gpt-4.1-mini": (0.4, 0.1, 1.6),
+}
+
+EVENT_FIELDS = ["time", "run", "pid", "provider", "model", "job", "prompt", "cache", "status", "error",
+                "attempts", "retries", "wall_ms", "ttfb_ms", "prompt_tokens", "output_tokens",
+                "thinking_tokens", "cached_tokens", "cost_usd", "saved_usd", "hedge"]
+# 요청 하나가 채우는 필드 — hedge 로 따로 보낸 요청은 이 값들을 별도 이벤트에 모았다가 이긴 쪽만 호출 이벤트로 옮김
+USAGE_FIELDS = ["ttfb_ms", "prompt_tokens", "output_tokens", "thinking_tokens", "cached_tokens"]
+
+
+#############################################
+# 호출 하나의 기록 — 스레드별 현재 이벤트 (SDK 호출은 같은 스레드에서 끝까지 실행됨)
+#############################################
+_local = threading.local()
+_lock = threading.Lock()
+_sink = None
+_totals = {}
+_hedges = {}
+_instrumented = weakref.WeakSet()
+
+
+def _write(event):
+    global _sink
+    with _lock:
+        if _sink is None:
+            os.makedirs(TELEMETRY_DIR, exist_ok=True)
+            _sink = open(os.path.join(TELEMETRY_DIR, f"{RUN_ID}.{os.getpid()}.jsonl"), "a", encoding="utf-8")
+        _sink.write(json.dumps(event, ensure_ascii=False) + "\n")
+        _sink.flush()
+
+        key = (event["provider"], event["model"], event["job"])
+        t = _totals.setdefault(key, {"calls": 0, "hits": 0, "errors": 0, "attempts": 0, "wall_ms": 0.0,
+                                     "prompt_tokens": 0, "output_tokens": 0, "thinking_tokens": 0,
+                                     "cached_tokens": 0, "cost_usd": 0.0, "saved_usd": 0.0})
+        # hedge 로 진 요청은 호출 수 / 지연에는 넣지 않고 토큰 / 비용만
+        if event["hedge"] != "discarded":
+            t["calls"] += 1
+            t["hits"] += event["cache"] == "hit"
+            t["errors"] += event["status"] == "error"
+            t["attempts"] += event["attempts"]
+            t["wall_ms"] += event["wall_ms"]
+        elif event["cost_usd"]:
+            _hedge_totals(event["model"])["duplicate_usd"] += event["cost_usd"]
+        for k in ("prompt_tokens", "output_tokens", "thinking_tokens", "cached_tokens"):
+            t[k] += event[k] or 0
+        t["cost_usd"] += event["cost_usd"] or 0.0
+        t["saved_usd"] += event["saved_usd"] or 0.0
+
+
+def prompt_id(system, user=None):
+    """프롬프트 식별자 — system 프롬프트가 있으면 그것만, 없으면 user 앞부분 해시 (같은 템플릿끼리 묶음)"""
+    text = system if system else (user or "")[:200]
+    return hashlib.sha1(str(text).encode("utf-8")).hexdigest()[:8]
+
+
+def cost(model, prompt_tokens, output_tokens, thinking_tokens, cached_tokens=None):
+    """(예상 비용, 캐시 덕분에 아낀 금액) — prompt_tokens 에는 캐시된 토큰도 포함되어 있음"""
+    price = PRICES.get(model)
+    if price is None or prompt_tokens is None:
+        return None, None
+    cached = min(cached_tokens or 0, prompt_tokens)
+    billed_output = (output_tokens or 0) + (thinking_tokens or 0)
+    total = (prompt_tokens - cached) * price[0] + cached * price[1] + billed_output * price[2]
+    return round(total / 1_000_000, 6), round(cached * (price[0] - price[1]) / 1_000_000, 6)
+
+
+@contextmanager
+def track(provider, model, system=None, user=None):
+    """
+    with track(...) as event: — 캐시 조회 / 재시도를 포함한 호출 하나를 기록.
+    event["cache"] 는 호출한 쪽에서 채우고, 시도 횟수 / TTFB / 토큰은 attempt() / record_usage() 가 채움
+    """
+    if not TELEMETRY_ENABLED:
+        yield {}
+        return
+    event = {"time": time.strftime("%Y-%m-%dT%H:%M:%S"), "run": RUN_ID, "pid": os.getpid(),
+             "provider": provider, "model": model, "job": getattr(_local, "job", None),
+             "prompt": prompt_id(system, user), "cache": "off", "status": "ok", "error": None,
+             "attempts": 0, "retries": 0, "wall_ms": None, "ttfb_ms": None, "prompt_tokens": None,
+             "output_tokens": None, "thinking_tokens": None, "cached_tokens": None, "cost_usd": None,
+             "saved_usd": None, "hedge": None}
+    previous = getattr(_local, "event", None)
+    _local.event = event
+    start = time.perf_counter()
+    try:
+        yield event
+    except Exception as e:
+        event["status"] = "error"
+        event["error"] = type(e).__name__
+        raise
+    finally:
+        _local.event = previous
+        event["wall_ms"] = round((time.perf_counter() - start) * 1000, 1)
+        event["retries"] = max(0, event["attempts"] - 1)
+        event["cost_usd"], event["saved_usd"] = cost(model, event["prompt_tokens"], event["output_tokens"],
+                                                     event["thinking_tokens"], event["cached_tokens"])
+        _write(event)
+
+
+def attempt():
+    """실제 API 요청 직전에 호출 (재시도마다 한 번)"""
+    event = getattr(_local, "event", None)
+    if event is not None:
+        event["attempts"] += 1
+        _local.sent = time.perf_counter()
+
+
+def record_usage(prompt_tokens=None, output_tokens=None, thinking_tokens=None, cached_tokens=None):
+    event = getattr(_local, "event", None)
+    if event is not None:
+        event.update(prompt_tokens=prompt_tokens, output_tokens=output_tokens,
+                     thinking_tokens=thinking_tokens, cached_tokens=cached_tokens)
+
+
+def current_event():
+    return getattr(_local, "event", None)
+
+
+def shadow_event(event):
+    """
+    event 와 같은 호출에서 따로 보내는 요청 하나의 기록 (common/hedging.py) — 끝나면 이긴 쪽은 merge_event,
+    진 쪽은 write_discarded. telemetry 가 꺼져 있으면 None
+    """
+    if event is None:
+        return None
+    return dict(event, attempts=0, status="ok", error=None, hedge=None, **{k: None for k in USAGE_FIELDS})
+
+
+def merge_event(event, shadow):
+    """이긴 요청의 시도 횟수 / TTFB / 토큰을 호출 이벤트로"""
+    if event is None or shadow is None:
+        return
+    event["attempts"] += shadow["attempts"]
+    event.update({k: shadow[k] for k in USAGE_FIELDS if shadow[k] is not None})
+
+
+def write_discarded(shadow, wall_ms, error=None):
+    """hedge 로 진 요청 — 응답은 버려도 쓴 토큰 / 비용은 따로 이벤트로 기록 (hedge="discarded")"""
+    if shadow is None:
+        return
+    shadow.update(time=time.strftime("%Y-%m-%dT%H:%M:%S"), hedge="discarded", wall_ms=round(wall_ms, 1),
+                  retries=0, status="error" if error else "ok", error=type(error).__name__ if error else None)
+    shadow["cost_usd"], shadow["saved_usd"] = cost(shadow["model"], shadow["prompt_tokens"], shadow["output_tokens"],
+                                                   shadow["thinking_tokens"], shadow["cached_tokens"])
+    _write(shadow)
+
+
+def bind_event(func, event):
+    """func() 를 다른 스레드에서 실행해도 attempt() / record_usage() 가 event 에 기록되도록 감쌈 (common/hedging.py)"""
+
+    def run():
+        previous = getattr(_local, "event", None)
+        _local.event = event
+        try:
+            return func()
+        finally:
+            _local.event = previous
+
+    return run
+
+
+def _hedge_totals(model):
+    # _lock 안에서 호출
+    return _hedges.setdefault(model, {"primary": [], "effective": [], "hedged": 0, "won": 0, "pending": {},
+                                      "duplicate_usd": 0.0})
+
+
+def record_hedge(model, primary_ms=None, effective_ms=None, hedged=False, won=False, pending=None):
+    """
+    hedge 가 켜진 실제 요청 하나의 지연 — primary_ms: 첫 요청이 끝난 시간 (hedge 가 없었다면 기다렸을 시간),
+    effective_ms: 호출한 쪽이 실제로 기다린 시간. 둘은 다른 시각에 기록될 수 있으므로
+    중복 요청이 이긴 뒤에도 아직 끝나지 않은 첫 요청은 pending=(id, 시작 시각) 로 등록 → primary_ms 가 오면 제거
+    """
+    with _lock:
+        h = _hedge_totals(model)
+        if pending is not None and primary_ms is None:
+            h["pending"][pending[0]] = pending[1]
+        elif pending is not None:
+            h["pending"].pop(pending[0], None)
+        if primary_ms is not None:
+            h["primary"].append(primary_ms)
+        if effective_ms is not None:
+            h["effective"].append(effective_ms)
+        h["hedged"] += hedged
+        h["won"] += won
+
+
+def _on_response(response):
+    # httpx 응답 hook 은 헤더를 받은 직후 (본문을 읽기 전) 호출됨 → 첫 바이트까지 걸린 시간
+    event = getattr(_local, "event", None)
+    sent = getattr(_local, "sent", None)
+    if event is not None and sent is not None and event["ttfb_ms"] is None:
+        event["ttfb_ms"] = round((time.perf_counter() - sent) * 1000, 1)
+
+
+def instrument_client(client):
+    """SDK 클라이언트 안쪽의 httpx 클라이언트에 TTFB 측정 hook 을 한 번만 등록 (못 찾으면 TTFB 없이 진행)"""
+    if not TELEMETRY_ENABLED:
+        return
+    try:
+        if client in _instrumented:
+            return
+        api_client = getattr(client, "_api_client", None)
+        httpx_client = getattr(api_client, "_httpx_client", None) or getattr(client, "_client", None)
+        hooks = getattr(httpx_client, "event_hooks", None)
+        if hooks is not None:
+            httpx_client.event_hooks = dict(hooks, response=list(hooks.get("response", [])) + [_on_response])
+        _instrumented.add(client)
+    except TypeError:
+        # weakref 를 지원하지 않는 객체 (테스트용 가짜 클라이언트 등)
+        pass
+
+
+#############################################
+# 작업 이름 태그 — engine / scheduler 가 스레드에서 func 를 실행할 때 붙임
+# budget: 이 행의 RPM / TPM 버킷에서 기다리지 않고 요청 하나를 더 가져가는 함수 (engine.thread_budget)
+#############################################
+def run_tagged(job, func, item, budget=None):
+    previous = getattr(_local, "job", None), getattr(_local, "budget", None)
+    _local.job, _local.budget = job, budget
+    try:
+        return func(item)
+    finally:
+        _local.job, _local.budget = previous
+
+
+def try_budget():
+    """hedge 중복 요청 전에 호출 — 이 행의 버킷에 여유가 없으면 False (engine / scheduler 밖에서 부른 호출이면 True)"""
+    budget = getattr(_local, "budget", None)
+    return budget() if budget is not None else True
+
+
+def telemetry_totals():
+    """이 프로세스의 {(provider, 모델, 작업): 합계} 복사본"""
+    with _lock:
+        return {k: dict(v) for k, v in _totals.items()}
+
+
+def _percentile(values, q):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(q / 100 * (len(values) - 1))))]
+
+
+def print_telemetry_stats():
+    """이 프로세스의 (모델, 작업)별 호출 수 / 평균 지연 / 토큰 / 예상 비용"""
+    totals = telemetry_totals()
+    if not totals:
+        return
+    for (provider, model, job), t in sorted(totals.items(), key=lambda kv: -kv[1]["wall_ms"]):
+        real = t["calls"] - t["hits"]
+        print(f"📈 {model} [{job or '-'}]: 호출 {t['calls']}회 (캐시 hit {t['hits']}, 재시도 {t['attempts'] - real}회, "
+              f"실패 {t['errors']}) / 평균 {t['wall_ms'] / t['calls']:.0f} ms / 토큰 입력 {t['prompt_tokens']} "
+              f"(캐시 {t['cached_tokens']}), 출력 {t['output_tokens']}, 사고 {t['thinking_tokens']} / "
+              f"≈ ${t['cost_usd']:.4f}" + (f" (캐시 절약 ${t['saved_usd']:.4f})" if t["saved_usd"] else ""))
+    with _lock:
+        # 아직 끝나지 않은 첫 요청은 지금까지 걸린 시간으로 (실제 지연의 하한)
+        now = time.perf_counter()
+        hedges = {model: dict(h, effective=list(h["effective"]),
+                              primary=h["primary"] + [(now - start) * 1000 for start in h["pending"].values()])
+                  for model, h in _hedges.items()}
+    for model, h in sorted(hedges.items()):
+        if not h["effective"] or not h["primary"]:
+            continue
+        # hedge 없이 첫 요청만 기다렸을 때의 p99 vs 실제로 기다린 p99
+        before, after = _percentile(h["primary"], 99), _percentile(h["effective"], 99)
+        print(f"🪁 {model} hedge: 요청 {len(h['effective'])}회 중 중복 {h['hedged']}회 "
+              f"({h['hedged'] / len(h['effective']):.1%}), 중복 응답 채택 {h['won']}회, "
+              f"버린 응답 비용 ≈ ${h['duplicate_usd']:.4f} / "
+              f"p99 {before:.0f} → {after:.0f} ms ({(after - before) / max(before, 1.0):+.1%}), "
+              f"p50 {_percentile(h['primary'], 50):.0f} → {_percentile(h['effective'], 50):.0f} ms")
+    print(f"   이벤트 로그 → {os.path.join(TELEMETRY_DIR, RUN_ID)}.*.jsonl (telemetry_report.py 로 집계)")
+
+
+#############################################
+# 로컬 CPU 경로 프로파일링 — LLM_PROFILE=1 일 때만
+#############################################
+def profile_main(main, name=None):
+    """LLM_PROFILE=1 이면 main() 을 cProfile 로 실행하고 누적 시간 상위 함수 출력 + .prof 저장"""
+    if os.environ.get("LLM_PROFILE", "0") == "0":
+        return main()
+    profiler = cProfile.Profile()
+    try:
+        return profiler.runcall(main)
+    finally:
+        os.makedirs(TELEMETRY_DIR, exist_ok=True)
+        path = os.path.join(TELEMETRY_DIR, f"{RUN_ID}.{name or main.__module__}.prof")
+        profiler.dump_stats(path)
+        pstats.Stats(profiler).sort_stats("cumulative").print_stats(20)
+        print(f"🔬 프로파일 → {path}  (python -m pstats {path})")
@@ -0,0 +1,126 @@
+import ast
+import os
+
+
+#############################################
+# 번역 실패 표시 — API 오류로 원문을 그대로 돌려준 값 / 그 행 번호를 남기는 기록 파일
+#############################################
+class Untranslated(str):
+    """번역하지 못해 원문을 그대로 돌려준 값 (str 이라 쓰는 쪽은 그대로, isinstance 로만 구분)"""
+
+
+def fallback_path(output_csv):
+    return f"{output_csv}.fallback"
+
+
+def read_fallbacks(output_csv):
+    """{출력}.fallback 에 기록된 행 번호 집합 (파일이 없으면 빈 집합)"""
+    path = fallback_path(output_csv)
+    if not os.path.exists(path):
+        return set()
+    with open(path, encoding="utf-8") as f:
+        return {int(line) for line in f if line.strip().isdigit()}
+
+
+def write_fallbacks(output_csv, rows):
+    """행 번호 목록으로 기록 파일을 다시 씀 (비어 있으면 파일 삭제)"""
+    path = fallback_path(output_csv)
+    if not rows:
+        if os.path.exists(path):
+            os.remove(path)
+        return
+    with open(path, "w", encoding="utf-8") as f:
+        f.writelines(f"{i}\n" for i in sorted(rows))
+
+
+class FallbackLog:
+    """
+    번역 CSV 옆 {출력}.fallback — 원문이 그대로 들어간 셀이 있는 행 번호를 한 줄에 하나씩 추가.
+    원문을 그대로 쓴 셀은 번역 CSV 에서는 구분되지 않으므로 repair.py 가 이 파일로 다시 번역할 행을 찾음.
+    처음부터 다시 쓰는 출력(이어쓰기 행 0)이면 예전 기록은 지움
+    """
+
+    def __init__(self, output_csv, fresh):
+        self.path = fallback_path(output_csv)
+        self.count = 0
+        if fresh and os.path.exists(self.path):
+            os.remove(self.path)
+
+    def check(self, i, translated):
+        """translated ({컬럼: 번역}) 에 원문을 그대로 쓴 셀이 있으면 행 번호 기록"""
+        if any(isinstance(v, Untranslated) for v in translated.values()):
+            self.count += 1
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(f"{i}\n")
+
+
+#############################################
+# 번역 단위 — 셀을 문장 / 선택지 단위로 쪼개서 중복 제거
+#############################################
+def split_cell(value):
+    """"['a', 'b']" 형태의 선택지 리스트면 ("list", [a, b]), 아니면 ("text", [value])"""
+    text = str(value or "").strip()
+    if text.startswith("[") and text.endswith("]"):
+        try:
+            items = ast.literal_eval(text)
+        except (ValueError, SyntaxError):
+            items = None
+        if isinstance(items, list) and all(isinstance(x, str) for x in items):
+            return "list", items
+    return "text", [value or ""]
+
+
+class TranslationUnits:
+    """
+    rows[start:]의 columns 셀을 번역 단위로 쪼개 고유 문장 목록(units)을 만든다.
+    같은 (문장, 방언)은 한 번만 번역하고, assemble()로 원래 셀 형태로 다시 조립한다.
+    """
+
+    def __init__(self, rows, columns, start=0):
+        self.units = []
+        self.total = 0
+        self._index = {}
+        self._cells = {}
+        # ready_at[i] = 행 i를 조립하는 데 필요한 마지막 unit 번호 (-1 이면 번역할 것 없음)
+        self.ready_at = {}
+
+        for i in range(start, len(rows)):
+            last = -1
+            cells = {}
+            for col in columns:
+                kind, texts = split_cell(rows[i].get(col, ""))
+                ids = []
+                for text in texts:
+                    if not str(text).strip():
+                        ids.append(None)
+                        continue
+                    self.total += 1
+                    if text not in self._index:
+                        self._index[text] = len(self.units)
+                        self.units.append(text)
+                    ids.append(self._index[text])
+                    last = max(last, self._index[text])
+                cells[col] = (kind, ids)
+            self._cells[i] = cells
+            self.ready_at[i] = last
+
+    @property
+    def dedup_ratio(self):
+        """고유 단위 / 전체 단위 (낮을수록 중복이 많음)"""
+        return len(self.units) / self.total if self.total else 1.0
+
+    def assemble(self, i, lookup):
+        """lookup(unit 번호) → 번역문, 행 i의 {컬럼: 번역된 셀} 반환 (Untranslated 표시는 셀까지 유지)"""
+        result = {}
+        for col, (kind, ids) in self._cells[i].items():
+            values = [lookup(k) if k is not None else "" for k in ids]
+            cell = str(values) if kind == "list" else values[0]
+            # 선택지 하나라도 원문 그대로면 셀 전체를 번역 실패로 표시
+            if kind == "list" and any(isinstance(v, Untranslated) for v in values):
+                cell = Untranslated(cell)
+            result[col] = cell
+        return result
+
+    def report(self, name):
+        print(f"🔁 {name}: 번역 단위 {self.total}개 → 고유 {len(self.units)}개 "
+              f"(중복 제거 후 {self.dedup_ratio:.1%}, 요청 {self.total - len(self.units)}회 절약)")
@@ -0,0 +1,155 @@
+import argparse
+import csv
+import json
+import os
+
+import numpy as np
+
+from common.corpus import DATASET_DIR, describe_file
+from common.divergence import METRICS, micro_chrf, pair_divergence
+from common.stats import paired_length
+from common.telemetry import profile_main
+from repair import find_translation_files
+from rescore import DIALECT_ORDER, find_result_files, rescore_file
+from run_plan import SPEC_PATH, spec_path
+
+
+SUMMARY_FIELDS = ["dataset", "stage", "model", "translator", "dialect", "rows",
+                  "cosine", "chrf", "jamo_chrf", "chrf_median", "chrf_micro", "jamo_chrf_micro",
+                  "metric", "n", "accuracy", "correlation", "accuracy_near", "accuracy_far", "source", "reference"]
+ROW_FIELDS = ["source", "dataset", "stage", "model", "translator", "dialect", "row"] + list(METRICS)
+
+
+#############################################
+# 비교 쌍 — 평가 결과는 같은 (dataset, 단계, 모델)의 ko 결과 파일, 번역 파일은 실행 명세의 원문
+#############################################
+def result_pairs(paths, candidates=None):
+    """
+    [(방언 파일, ko 파일, 메타데이터, 재채점 레코드)] — 파일에 방언 문장이 그대로 들어 있으므로 정답 여부와 행 번호로 바로 조인.
+    ko 파일은 candidates (기본: dataset/ 아래 전체 평가 결과) 에서 찾음
+    """
+    files = [(path, describe_file(path)) for path in candidates or find_result_files()]
+    pairs = []
+    for path in paths:
+        meta = describe_file(path)
+        if meta["dialect"] in (None, "ko") or meta["dataset"] not in ("mednli", "truthfulqa"):
+            continue
+        group = (meta["dataset"], meta["stage"], meta["model"])
+        references = [p for p, m in files if m["dialect"] == "ko" and (m["dataset"], m["stage"], m["model"]) == group]
+        if not references:
+            continue
+        # 같은 폴더의 ko 파일을 우선 (chatgpt / gemini 결과가 같은 조합으로 잡히는 경우)
+        references.sort(key=lambda p: os.path.dirname(p) != os.path.dirname(path))
+        pairs.append((path, references[0], meta, rescore_file(path)))
+    return pairs
+
+
+def translation_pairs(spec):
+    sources = {dataset: spec_path(info["source"]) for dataset, info in spec["datasets"].items()}
+    pairs = []
+    for path in find_translation_files():
+        meta = describe_file(path)
+        if meta["dataset"] in sources and meta["dialect"] not in (None, "ko"):
+            pairs.append((path, sources[meta["dataset"]], meta, []))
+    return pairs
+
+
+#############################################
+# 거리 ↔ 정답 여부 조인
+#############################################
+def join_correctness(distance, correct, invalid, what="거리 ↔ 정답"):
+    """(n, 정확도, 점-이연 상관계수, 거리 중앙값 이하 행 정확도, 초과 행 정확도) — 거리가 클수록 틀리면 상관계수 < 0"""
+    paired_length(distance, correct, what)
+    correct = correct.astype(np.float64)
+    valid = ~invalid & np.isfinite(distance)
+    d, c = distance[valid], correct[valid]
+    if len(d) < 2:
+        return len(d), np.nan, np.nan, np.nan, np.nan
+    r = np.corrcoef(d, c)[0, 1] if d.std() > 0 and c.std() > 0 else np.nan
+    near = d <= np.median(d)
+    far_acc = c[~near].mean() if (~near).any() else np.nan
+    return len(d), c.mean(), r, c[near].mean(), far_acc
+
+
+def analyze(pairs, use_cache=True):
+    """→ (요약 행 목록, 행별 행 목록)"""
+    summary, per_row = [], []
+    for path, reference, meta, records in pairs:
+        result = pair_divergence(reference, path, meta["dataset"], use_cache=use_cache)
+        if result is None:
+            print(f"⚠ {os.path.relpath(path, DATASET_DIR)}: 문장 컬럼을 원문과 짝지을 수 없어 건너뜀")
+            continue
+        source = os.path.relpath(path, DATASET_DIR)
+        base = {k: meta[k] for k in ("dataset", "stage", "model", "translator", "dialect")}
+        chrf = result["chrf"]
+        stats = dict(base, rows=len(chrf), source=source, reference=os.path.relpath(reference, DATASET_DIR),
+                     chrf_median=np.nanmedian(chrf) if len(chrf) else np.nan,
+                     chrf_micro=micro_chrf(result["chrf_totals"]), jamo_chrf_micro=micro_chrf(result["jamo_chrf_totals"]),
+                     **{m: np.nanmean(result[m]) if len(result[m]) else np.nan for m in METRICS})
+
+        rows = [dict(base, source=source, row=i, **{m: round(float(result[m][i]), 4) for m in METRICS})
+                for i in range(len(chrf))]
+        if not records:
+            summary.append(stats)
+        for record, correct, invalid in records:
+            n, accuracy, r, near, far = join_correctness(chrf, correct, invalid, f"{source} ({record['metric']})")
+            summary.append(dict(stats, metric=record["metric"], n=n, accuracy=accuracy, correlation=r,
+                                accuracy_near=near, accuracy_far=far))
+            for i, row in enumerate(rows):
+                row[record["metric"]] = "" if invalid[i] else int(correct[i])
+        per_row.extend(rows)
+    return summary, per_row
+
+
+#############################################
+# 출력
+#############################################
+def write_csv(rows, fieldnames, output):
+    with open(output, "w", encoding="utf-8", newline="") as out:
+        writer = csv.DictWriter(out, fieldnames=fieldnames, extrasaction="ignore")
+        writer.writeheader()
+        writer.writerows(rows)
+
+
+def print_summary(rows):
+    order = {d: i for i, d in enumerate(DIALECT_ORDER)}
+    fmt = lambda v, spec: "-" if v is None or (isinstance(v, float) and np.isnan(v)) else format(v, spec)
+    header = (f"{'dataset':<11}{'stage':<14}{'translator':<16}{'dialect':<13}{'cosine':>8}{'chrF':>8}{'jamo':>8}"
+              f"{'micro':>8}   {'metric':<8}{'acc':>7}{'r':>8}{'near':>8}{'far':>8}")
+    print(header)
+    print("-" * len(header))
+    key = lambda r: (r["dataset"], r["stage"], str(r["translator"]), order.get(r["dialect"], 99), r.get("metric") or "")
+    for r in sorted(rows, key=key):
+        print(f"{r['dataset']:<11}{r['stage']:<14}{str(r['translator']):<16}{r['dialect']:<13}"
+              f"{fmt(r['cosine'], '.3f'):>8}{fmt(r['chrf'], '.3f'):>8}{fmt(r['jamo_chrf'], '.3f'):>8}"
+              f"{fmt(r['chrf_micro'], '.3f'):>8}   {r.get('metric') or '-':<8}{fmt(r.get('accuracy'), '.1%'):>7}"
+              f"{fmt(r.get('correlation'), '+.3f'):>8}{fmt(r.get('accuracy_near'), '.1%'):>8}"
+              f"{fmt(r.get('accuracy_far'), '.1%'):>8}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="방언 문장이 표준말(ko) 원문에서 얼마나 멀어졌는지 (문자 n-gram 코사인 / chrF) + 정답 여부와의 관계")
+    parser.add_argument("paths", nargs="*", help="평가 결과 CSV (기본: dataset/ 아래 전체 평가 결과 + 번역 파일)")
+    parser.add_argument("--spec", default=SPEC_PATH, help="번역 파일의 원문 경로를 읽을 실행 명세")
+    parser.add_argument("--no-cache", action="store_true", help="corpus/divergence/ 캐시를 쓰지 않고 다시 계산")
+    parser.add_argument("--output", default=os.path.join(DATASET_DIR, "divergence_report.csv"))
+    parser.add_argument("--rows-output", default=os.path.join(DATASET_DIR, "divergence_rows.csv"))
+    args = parser.parse_args()
+
+    with open(args.spec, encoding="utf-8") as f:
+        spec = json.load(f)
+    pairs = result_pairs(args.paths or find_result_files())
+    if not args.paths:
+        pairs += translation_pairs(spec)
+
+    summary, per_row = analyze(pairs, use_cache=not args.no_cache)
+    metrics = sorted({k for row in per_row for k in row} - set(ROW_FIELDS))
+    write_csv(summary, SUMMARY_FIELDS, args.output)
+    write_csv(per_row, ROW_FIELDS + metrics, args.rows_output)
+    print_summary(summary)
+    print(f"\n🧭 {len(pairs)}개 파일, {len(per_row)}행 (거리 = 1 - 유사도, r = chrF 거리와 정답 여부의 상관, "
+          f"near / far = 거리 중앙값 이하 / 초과 행 정확도) → {args.output}, {args.rows_output}")
+
+
+if __name__ == "__main__":
+    profile_main(main, "dialect_divergence")
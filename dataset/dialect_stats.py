@@ -0,0 +1,109 @@
+import argparse
+import csv
+import os
+
+import numpy as np
+
+from common.corpus import DATASET_DIR
+from common.stats import DEFAULT_ALPHA, DEFAULT_RESAMPLES, bootstrap_ci, mcnemar, paired_bootstrap, paired_length
+from common.telemetry import profile_main
+from rescore import DIALECT_ORDER, rescore_all
+
+
+STATS_FIELDS = ["dataset", "stage", "model", "metric", "dialect", "baseline",
+                "n", "accuracy", "ci_low", "ci_high",
+                "paired_n", "diff", "diff_low", "diff_high", "bootstrap_p",
+                "only_dialect", "only_baseline", "mcnemar_p", "source", "baseline_source"]
+
+
+#############################################
+# 방언별 신뢰구간 + 표준말(ko) 대비 짝지은 검정
+#############################################
+def paired_arrays(target, baseline):
+    """같은 문항 번호(행 순서)끼리 짝지어, 둘 다 유효한 행의 정답 배열만 반환 (행 수가 다르면 ValueError)"""
+    (record, correct, invalid), (base_record, base_correct, base_invalid) = target, baseline
+    paired_length(correct, base_correct, f"{record['source']} ↔ {base_record['source']}")
+    valid = ~invalid & ~base_invalid
+    return correct[valid], base_correct[valid]
+
+
+def compare_dialects(records, resamples=DEFAULT_RESAMPLES, alpha=DEFAULT_ALPHA, seed=0):
+    groups = {}
+    for item in records:
+        record = item[0]
+        key = (record["dataset"], record["stage"], record["model"], record["metric"])
+        groups.setdefault(key, []).append(item)
+
+    rows = []
+    for key in sorted(groups):
+        items = groups[key]
+        baselines = [item for item in items if item[0]["dialect"] == "ko"]
+        for item in items:
+            record, correct, invalid = item
+            accuracy, low, high = bootstrap_ci(correct[~invalid], alpha=alpha, resamples=resamples, seed=seed)
+            row = dict(zip(["dataset", "stage", "model", "metric"], key), dialect=record["dialect"],
+                       n=int((~invalid).sum()), accuracy=accuracy, ci_low=low, ci_high=high,
+                       source=record["source"])
+            if record["dialect"] == "ko" or not baselines:
+                rows.append(row)
+                continue
+            # 같은 조합의 ko 결과 파일이 여러 개면 각각과 비교
+            for baseline in baselines:
+                a, b = paired_arrays(item, baseline)
+                diff, diff_low, diff_high, boot_p = paired_bootstrap(a, b, alpha=alpha, resamples=resamples, seed=seed)
+                only_a, only_b, mcnemar_p = mcnemar(a, b)
+                rows.append(dict(row, baseline="ko", baseline_source=baseline[0]["source"], paired_n=len(a),
+                                 diff=diff, diff_low=diff_low, diff_high=diff_high, bootstrap_p=boot_p,
+                                 only_dialect=only_a, only_baseline=only_b, mcnemar_p=mcnemar_p))
+    return rows
+
+
+#############################################
+# 출력
+#############################################
+def write_stats(rows, output):
+    with open(output, "w", encoding="utf-8", newline="") as out:
+        writer = csv.DictWriter(out, fieldnames=STATS_FIELDS, extrasaction="ignore")
+        writer.writeheader()
+        writer.writerows(rows)
+
+
+def print_stats(rows, alpha):
+    order = {d: i for i, d in enumerate(DIALECT_ORDER)}
+    level = f"{1 - alpha:.0%}"
+    header = (f"{'dataset':<11}{'stage':<14}{'metric':<9}{'dialect':<13}{'accuracy (' + level + ' CI)':<26}"
+              f"{'Δ vs ko (' + level + ' CI)':<28}{'boot p':>9}{'McNemar p':>11}")
+    print(header)
+    print("-" * len(header))
+    key = lambda r: (r["dataset"], r["stage"], str(r["model"]), r["metric"], order.get(r["dialect"], 99))
+    for r in sorted(rows, key=key):
+        if np.isnan(r["accuracy"]):
+            accuracy = "n/a"
+        else:
+            accuracy = f"{r['accuracy']:.1%} [{r['ci_low']:.1%}, {r['ci_high']:.1%}]"
+        if "diff" in r and not np.isnan(r["diff"]):
+            diff = f"{r['diff']:+.1%} [{r['diff_low']:+.1%}, {r['diff_high']:+.1%}]"
+            marker = " *" if r["mcnemar_p"] < alpha else ""
+            tests = f"{r['bootstrap_p']:>9.4f}{r['mcnemar_p']:>11.4f}{marker}"
+        else:
+            diff, tests = "-", ""
+        print(f"{r['dataset']:<11}{r['stage']:<14}{r['metric']:<9}{str(r['dialect']):<13}{accuracy:<26}{diff:<28}{tests}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="방언별 정확도 부트스트랩 신뢰구간 + 표준말(ko) 대비 짝지은 검정")
+    parser.add_argument("paths", nargs="*", help="결과 CSV (기본: dataset/ 아래 전체 평가 결과)")
+    parser.add_argument("--resamples", type=int, default=DEFAULT_RESAMPLES)
+    parser.add_argument("--alpha", type=float, default=DEFAULT_ALPHA)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default=os.path.join(DATASET_DIR, "dialect_stats.csv"))
+    args = parser.parse_args()
+
+    rows = compare_dialects(rescore_all(args.paths), resamples=args.resamples, alpha=args.alpha, seed=args.seed)
+    write_stats(rows, args.output)
+    print_stats(rows, args.alpha)
+    print(f"\n📈 부트스트랩 {args.resamples}회, {len(rows)}개 비교 → {args.output}  (* McNemar p < {args.alpha})")
+
+
+if __name__ == "__main__":
+    profile_main(main, "dialect_stats")
@@ -1,17 +1,39 @@
-import csv
-import time
+import sys
+from contextlib import ExitStack, contextmanager
 from google import genai  
 import multiprocessing
 import os 
-from tqdm import tqdm
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from common.adaptive import print_controller_stats
+from common.batching import parse_json_object
+from common.corpus import load_rows
+from common.engine import Job, SharedRateLimiter, estimate_tokens, install_shared_limiters, limiter_for, run_job
+from common.llm import gemini_generate, layout_prompt, print_cache_stats
+from common.resume import ResumableCSV
+from common.telemetry import print_telemetry_stats
+from common.translation_units import FallbackLog, TranslationUnits, Untranslated
 
 
 # ✅ Gemini API 설정
 client = genai.Client(api_key="")
+MODEL_NAME = "gemini-2.5-pro"
+
+# ✅ 동시 요청 / 속도 제한 설정 (RPM / TPM 은 전체 한도 — FANOUT=False 의 방언별 프로세스들이 공유 메모리 버킷으로 나눠 씀)
+CONCURRENCY = 4
+RPM = 30
+TPM = 60000
+
+# ✅ 기존 출력이 있으면 완료된 행은 건너뛰고 이어서 번역
+RESUME = True
+
+# ✅ True 면 한 번의 요청으로 4개 방언을 모두 받아서 방언별 CSV를 한 번에 작성 (공용 지시문 / JSON 응답이라 번역문이 달라짐)
+#    기본은 방언별 지시문으로 방언마다 따로 요청 — run_plan.py 는 run_spec.json 의 translator.fanout 으로 선택
+FANOUT = False
 
 
 # ✅ 방언 번역 함수 정의
-def translate_dialect(text, dialect="Jeju"):
+def translate_dialect(text, dialect="Jeju", model_name=MODEL_NAME):
     user_messages = {
         "Jeju": "다음 문장을 제주도 방언으로 자연스럽게 번역해줘, 만약 전문 언어라 해석이 어렵다면 영어로 남겨줘",
         "Gyeongsang": "다음 문장을 경상도 방언으로 자연스럽게 번역해줘, 만약 전문 언어라 해석이 어렵다면 영어로 남겨줘",
@@ -31,88 +53,218 @@ def translate_dialect(text, dialect="Jeju"):
     
     
     user_prompt = f"{user_messages[dialect]}\n{text}"
-    full_prompt = f"{system_message[dialect]}\n\n{user_prompt}"
+    # ✅ 고정 지시문은 system_instruction 으로 → 방언별로 접두부가 매 요청 동일 (컨텍스트 캐시 / 접두부 캐시 대상)
+    system_instruction, contents = layout_prompt(system_message[dialect], user_prompt)
     
     try:
-        response = client.models.generate_content(
-         model="gemini-2.5-pro",contents = full_prompt
-        )
-        return response.text.strip()
+        return gemini_generate(client, model_name, contents, system_instruction=system_instruction,
+                               prefix_cache=("translate", dialect)).strip()
     except Exception as e:
+        # 원문을 그대로 돌려주되 표시해 둠 → 출력 CSV 옆 .fallback 에 행 번호가 남아 repair.py 가 다시 번역
         print(f"번역 에러 발생 ({dialect}): {e}")
-        return text
+        return Untranslated(text)
+
+# ✅ 한 번의 호출로 모든 방언 번역 (fan-out)
+DIALECT_NAMES = {
+    "Jeju": "제주도 방언",
+    "Gyeongsang": "경상도 방언",
+    "Jeolla": "전라도 사투리",
+    "Chungcheong": "충청도 사투리"
+}
+
+
+def translate_all_dialects(text, dialects, model_name=MODEL_NAME):
+    """{방언: 번역} 반환 — 응답 JSON에 빠진 방언만 translate_dialect 로 따로 번역"""
+    
+    if not text or str(text).strip() == "":
+        return {dialect: "" for dialect in dialects}
+    
+    keys = ", ".join(f'"{d}": "<{DIALECT_NAMES[d]} 번역>"' for d in dialects)
+    system_message = "너는 한국 지역 방언 전문가야. 문장이 주어지면 요청한 각 지역 방언으로 정확하게 번역해야 해, 다른 설명은 절대 추가하지마"
+    user_prompt = (
+        f"다음 문장을 {', '.join(DIALECT_NAMES[d] for d in dialects)}으로 각각 자연스럽게 번역해줘, "
+        f"만약 전문 언어라 해석이 어렵다면 영어로 남겨줘. JSON 객체 {{{keys}}} 로만 답해줘\n{text}"
+    )
+    system_instruction, contents = layout_prompt(system_message, user_prompt)
+    
+    try:
+        data = parse_json_object(gemini_generate(client, model_name, contents, system_instruction=system_instruction,
+                                                 prefix_cache=("translate_fanout", "+".join(dialects)))) or {}
+    except Exception as e:
+        print(f"번역 에러 발생 (fan-out): {e}")
+        data = {}
+    
+    result = {}
+    for dialect in dialects:
+        value = data.get(dialect)
+        if isinstance(value, str) and value.strip():
+            result[dialect] = value.strip()
+        else:
+            result[dialect] = translate_dialect(text, dialect, model_name)
+    return result
+
+
+# ✅ 출력 행 형식 (방언별 / fan-out 공용)
+def truthfulqa_fieldnames(dialect):
+    return [f"question_{dialect}", f"mc1_choices_{dialect}",f"mc1_labels",f"mc2_choices_{dialect}",f"mc2_labels","ai_answer_mc1","mc1_result","ai_answer_mc2","mc2_result"]
+
+
+def truthfulqa_row(dialect, row, translated):
+    return {
+        f"question_{dialect}": translated["question_ko"],
+        f"mc1_choices_{dialect}": translated["mc1_choices_ko"],
+        f"mc1_labels":row.get("mc1_labels",""),
+        f"mc2_choices_{dialect}": translated["mc2_choices_ko"],
+        f"mc2_labels":row.get("mc2_labels",""),
+        f"ai_answer_mc1":"",
+        f"mc1_result":"",
+        f"ai_answer_mc2":"",
+        f"mc2_result":""
+    }
+
+
+def mednli_fieldnames(dialect):
+    return ["gold_label", f"sentence1_{dialect}", f"sentence2_{dialect}","ai_answer","result"]
+
+
+def mednli_row(dialect, row, translated):
+    return {
+        "gold_label": row.get("gold_label",""),
+        f"sentence1_{dialect}": translated["sentence1_ko"],
+        f"sentence2_{dialect}": translated["sentence2_ko"],
+        f"ai_answer":"",
+        f"result":""
+    }
+
+
+TRUTHFULQA_COLUMNS = ["question_ko", "mc1_choices_ko", "mc2_choices_ko"]
+MEDNLI_COLUMNS = ["sentence1_ko", "sentence2_ko"]
+
+
+# ✅ 번역 단위 동시 번역 — 셀을 문장/선택지로 쪼개 고유한 문장만 번역하고,
+#    한 행에 필요한 번역이 모두 끝나면 입력 순서대로 on_row(i, row, translated) 호출
+#    (dialects 를 주면 translate 결과가 {방언: 번역} 이고 translated 는 {컬럼: {방언: 번역}})
+@contextmanager
+def translation_job(data_rows, columns, translate, on_row, desc, start=0, dialects=None):
+    units = TranslationUnits(data_rows, columns, start)
+    units.report(desc)
+    results = [None] * len(units.units)
+    pending = list(range(start, len(data_rows)))
+
+    def flush(done_upto):
+        while pending and units.ready_at[pending[0]] <= done_upto:
+            i = pending.pop(0)
+            if dialects is None:
+                translated = units.assemble(i, results.__getitem__)
+            else:
+                per_dialect = {d: units.assemble(i, lambda k: results[k][d]) for d in dialects}
+                translated = {col: {d: per_dialect[d][col] for d in dialects} for col in columns}
+            on_row(i, data_rows[i], translated)
+
+    def on_unit(k, text, result):
+        results[k] = result
+        flush(k)
+
+    flush(-1)
+    yield Job(desc, units.units, translate, on_unit, estimate=lambda text: estimate_tokens(text) * 2)
+    flush(len(units.units))
+
+
+def translate_rows(data_rows, columns, translate, on_row, desc, start=0, dialects=None):
+    with translation_job(data_rows, columns, translate, on_row, desc, start, dialects) as job:
+        run_job(job, concurrency=CONCURRENCY, limiter=limiter_for(MODEL_NAME, rpm=RPM, tpm=TPM))
+
+
+def report_fallbacks(logs):
+    for d, log in logs.items():
+        if log.count:
+            print(f"⚠️ [{d}] 번역 실패로 원문을 그대로 쓴 행 {log.count}개 → {log.path} (repair.py 로 다시 번역)")
+
+
+# ✅ 파일 처리 (방언 하나) — 출력 파일을 열고 번역 Job 을 yield (run_plan.py 스케줄러에서도 사용)
+@contextmanager
+def dialect_job(input_csv, output_csv, dialect, columns, make_fieldnames, make_row, model_name=MODEL_NAME):
+    
+    fieldnames, data_rows = load_rows(input_csv, columns + ["gold_label", "mc1_labels", "mc2_labels"])
+    print(f"[{dialect}] CSV 컬럼:", fieldnames)
+    
+    with ResumableCSV(output_csv, resume=RESUME) as outfile:
+        
+        writer, done = outfile.start(make_fieldnames(dialect))
+        fallbacks = FallbackLog(output_csv, fresh=done == 0)
+        
+        def write_row(i, row, translated):
+            fallbacks.check(i, translated)
+            writer.writerow(make_row(dialect, row, translated))
+        
+        with translation_job(data_rows, columns, lambda text: translate_dialect(text, dialect, model_name),
+                             write_row, desc=f"[{dialect}]번역 진행", start=done) as job:
+            yield job
+    
+    print(f"\n[{dialect}] 모든 번역 완료! 저장 위치: {output_csv}")
+    report_fallbacks({dialect: fallbacks})
+
+
+def process_dialect(input_csv, output_csv, dialect, columns, make_fieldnames, make_row):
+    with dialect_job(input_csv, output_csv, dialect, columns, make_fieldnames, make_row) as job:
+        run_job(job, concurrency=CONCURRENCY, limiter=limiter_for(MODEL_NAME, rpm=RPM, tpm=TPM))
+    print_cache_stats()
+    print_controller_stats()
+    print_telemetry_stats()
+
 
 # ✅ 파일 처리(TruthfulQA) 
 def process_TruthfulQA(input_csv, output_csv, dialect):
-    
-        with open(input_csv, "r", encoding="utf-8") as infile, \
-             open(output_csv, "w", encoding="utf-8", newline="") as outfile:
-            
-            reader = csv.DictReader(infile)
-            data_rows = list(reader)
-            
-            
-            fieldnames = [f"question_{dialect}", f"mc1_choices_{dialect}",f"mc1_labels",f"mc2_choices_{dialect}",f"mc2_labels","ai_answer_mc1","mc1_result","ai_answer_mc2","mc2_result"]
-            writer = csv.DictWriter(outfile, fieldnames=fieldnames)
-            writer.writeheader()
-            
-            for i, row in enumerate(tqdm(data_rows, desc=f"[{dialect}]번역 진행")):
-                
-                question_dialect = translate_dialect(row.get("question_ko", ""), dialect)
-                mc1_choice_dialect = translate_dialect(row.get("mc1_choices_ko", ""), dialect)
-                mc1_labels = row.get("mc1_labels","")
-                mc2_choice_dialect = translate_dialect(row.get("mc2_choices_ko", ""), dialect)
-                mc2_labels = row.get("mc2_labels","")
-                writer.writerow({
-                    f"question_{dialect}": question_dialect,
-                    f"mc1_choices_{dialect}": mc1_choice_dialect,
-                    f"mc1_labels":mc1_labels,
-                    f"mc2_choices_{dialect}": mc2_choice_dialect,
-                    f"mc2_labels":mc2_labels,
-                    f"ai_answer_mc1":"",
-                    f"mc1_result":"",
-                    f"ai_answer_mc2":"",
-                    f"mc2_result":""
-                })
-                print(f"[{dialect}] {i+1}번째 문장 번역 완료")
-                
-                time.sleep(1.2)
-                
-        print(f"\n[{dialect}] 모든 번역 완료! 저장 위치: {output_csv}")
+    process_dialect(input_csv, output_csv, dialect, TRUTHFULQA_COLUMNS, truthfulqa_fieldnames, truthfulqa_row)
         
 
 # ✅ 파일 처리(MedNLI)
 def process_mednli(input_csv, output_csv, dialect):
+    process_dialect(input_csv, output_csv, dialect, MEDNLI_COLUMNS, mednli_fieldnames, mednli_row)
+
+
+# ✅ 파일 처리 (fan-out) — 한 번의 패스로 모든 방언 CSV 작성
+@contextmanager
+def fanout_job(input_csv, outputs, columns, make_fieldnames, make_row, model_name=MODEL_NAME):
+    """outputs: {방언: 출력 경로} — 출력 파일을 열고 번역 Job 을 yield (run_plan.py 스케줄러에서도 사용)"""
     
-        with open(input_csv, "r", encoding="utf-8") as infile, \
-             open(output_csv, "w", encoding="utf-8", newline="") as outfile:
-            
-            reader = csv.DictReader(infile)
-            print(f"[{dialect}] CSV 컬럼:", reader.fieldnames)
-            
-            
-            fieldnames = ["gold_label", f"sentence1_{dialect}", f"sentence2_{dialect}","ai_answer","result"]
-            writer = csv.DictWriter(outfile, fieldnames=fieldnames)
-            writer.writeheader()
-            
-            for i, row in enumerate(reader):
-                gold_label = row.get("gold_label","")
-                sentence1_dialect = translate_dialect(row.get("sentence1_ko", ""), dialect)
-                sentence2_dialect = translate_dialect(row.get("sentence2_ko", ""), dialect)
-                
-                
-                writer.writerow({
-                    "gold_label": gold_label,
-                    f"sentence1_{dialect}": sentence1_dialect,
-                    f"sentence2_{dialect}": sentence2_dialect,
-    		        f"ai_answer":"",
-		            f"result":""
-                })
-                print(f"[{dialect}] {i+1}번째 문장 번역 완료")
-                time.sleep(1.2)
-                
-        print(f"\n[{dialect}] 모든 번역 완료! 저장 위치: {output_csv}")
+    dialects = list(outputs)
+    
+    _, data_rows = load_rows(input_csv, columns + ["gold_label", "mc1_labels", "mc2_labels"])
+    
+    with ExitStack() as stack:
+        writers = {}
+        done = {}
+        fallbacks = {}
+        for d in dialects:
+            outfile = stack.enter_context(ResumableCSV(outputs[d], resume=RESUME))
+            writers[d], done[d] = outfile.start(make_fieldnames(d))
+            fallbacks[d] = FallbackLog(outputs[d], fresh=done[d] == 0)
         
+        def write_row(i, row, translated):
+            # translated: {컬럼: {방언: 번역}} — 이미 이어쓰기 된 방언은 건너뜀
+            for d in dialects:
+                if i >= done[d]:
+                    cells = {col: translated[col][d] for col in columns}
+                    fallbacks[d].check(i, cells)
+                    writers[d].writerow(make_row(d, row, cells))
+        
+        with translation_job(data_rows, columns, lambda text: translate_all_dialects(text, dialects, model_name),
+                             write_row, desc=f"[{'/'.join(dialects)}]번역 진행", start=min(done.values()),
+                             dialects=dialects) as job:
+            yield job
+    
+    print(f"\n[fan-out] 모든 번역 완료! 저장 위치: {', '.join(outputs.values())}")
+    report_fallbacks(fallbacks)
+
+
+def process_fanout(input_csv, outputs, columns, make_fieldnames, make_row):
+    with fanout_job(input_csv, outputs, columns, make_fieldnames, make_row) as job:
+        run_job(job, concurrency=CONCURRENCY, limiter=limiter_for(MODEL_NAME, rpm=RPM, tpm=TPM))
+    print_cache_stats()
+    print_controller_stats()
+    print_telemetry_stats()
+
 
 # ✅ 메인 실행부
 if __name__ == "__main__":
@@ -125,19 +277,31 @@ if __name__ == "__main__":
         pass
 
     dialects = ["Jeju", "Gyeongsang", "Jeolla", "Chungcheong"]   
-    truthfulqa_tasks = [
-        ("TruthfulQA_result-gpt4o-gpt4o.csv", f"truthfulqa_{dialect}-gemini-2.5-pro.csv", dialect) 
-        for dialect in dialects]
-    
     
-    with multiprocessing.Pool(processes=len(dialects)) as pool:
-        pool.starmap(process_TruthfulQA, truthfulqa_tasks)
+    if FANOUT:
+        # 원문 한 문장당 한 번만 요청 → 4개 방언 CSV 동시 작성
+        process_fanout("TruthfulQA_result-gpt4o-gpt4o.csv",
+                       {dialect: f"truthfulqa_{dialect}-gemini-2.5-pro.csv" for dialect in dialects},
+                       TRUTHFULQA_COLUMNS, truthfulqa_fieldnames, truthfulqa_row)
+        process_fanout("mednli_kor.csv",
+                       {dialect: f"mednli_{dialect}.gemini-2.5-pro.csv" for dialect in dialects},
+                       MEDNLI_COLUMNS, mednli_fieldnames, mednli_row)
+    else:
+        truthfulqa_tasks = [
+            ("TruthfulQA_result-gpt4o-gpt4o.csv", f"truthfulqa_{dialect}-gemini-2.5-pro.csv", dialect) 
+            for dialect in dialects]
+        
+        # 모든 워커가 같은 RPM / TPM 버킷을 공유 → 워커 수를 늘려도 전체 호출량은 한도 안
+        limiters = {MODEL_NAME: SharedRateLimiter(rpm=RPM, tpm=TPM)}
+        
+        with multiprocessing.Pool(processes=len(dialects), initializer=install_shared_limiters,
+                                  initargs=(limiters,)) as pool:
+            pool.starmap(process_TruthfulQA, truthfulqa_tasks)
         
         mednli_tasks = [
-    ("mednli_kor.csv", f"mednli_{dialect}.gemini-2.5-pro.csv", dialect) 
-    for dialect in dialects]
+            ("mednli_kor.csv", f"mednli_{dialect}.gemini-2.5-pro.csv", dialect) 
+            for dialect in dialects]
         
-    
-    with multiprocessing.Pool(processes=len(dialects)) as pool:
-        pool.starmap(process_mednli, mednli_tasks)
-    
\ No newline at end of file
+        with multiprocessing.Pool(processes=len(dialects), initializer=install_shared_limiters,
+                                  initargs=(limiters,)) as pool:
+            pool.starmap(process_mednli, mednli_tasks)
@@ -0,0 +1,98 @@
+import argparse
+import glob
+import json
+import os
+
+import pyarrow as pa
+from pyarrow import feather
+
+from common.corpus import (
+    CORPUS_DIR, DATASET_DIR, MANIFEST_PATH,
+    decode_bytes, describe_file, list_kind, parse_list, read_csv_rows, source_signature,
+)
+from common.telemetry import profile_main
+
+
+#############################################
+# CSV 한 개 → Arrow 테이블
+#############################################
+def build_table(fieldnames, rows):
+    arrays = []
+    for col in fieldnames:
+        values = [row[col] for row in rows]
+        kind = list_kind(col)
+        if kind:
+            parsed = [parse_list(v) if str(v).strip() else None for v in values]
+            # 비어있지 않은 값이 전부 리스트로 파싱될 때만 타입 있는 배열로 저장
+            if all(p is not None for p, v in zip(parsed, values) if str(v).strip()):
+                if kind == "labels":
+                    arrays.append(pa.array([[int(x) for x in p] if p is not None else None for p in parsed],
+                                           type=pa.list_(pa.int8())))
+                else:
+                    arrays.append(pa.array([[str(x) for x in p] if p is not None else None for p in parsed],
+                                           type=pa.list_(pa.string())))
+                continue
+        arrays.append(pa.array([str(v) for v in values], type=pa.string()))
+    return pa.Table.from_arrays(arrays, names=fieldnames)
+
+
+def ingest_file(path):
+    with open(path, "rb") as f:
+        _, encoding = decode_bytes(f.read())
+    fieldnames, rows = read_csv_rows(path)
+    meta = describe_file(path)
+
+    source = os.path.relpath(os.path.abspath(path), DATASET_DIR)
+    # 원본 경로에서 테이블 파일 이름 생성 (디렉터리 구분자 / 공백 제거)
+    table_name = source.replace(os.sep, "__").replace(" ", "_")[:-len(".csv")] + ".arrow"
+
+    table = build_table(fieldnames, rows)
+    feather.write_feather(table, os.path.join(CORPUS_DIR, table_name), compression="uncompressed")
+
+    return dict(meta, **{
+        "source": source,
+        "path": table_name,
+        "rows": table.num_rows,
+        "columns": fieldnames,
+        "source_encoding": encoding,
+        "signature": source_signature(path),
+    })
+
+
+#############################################
+# 실행부 — dataset/ 아래 모든 CSV 변환 + manifest 작성
+#############################################
+def main():
+    parser = argparse.ArgumentParser(description="CSV 코퍼스를 UTF-8 / Arrow 컬럼 저장소로 한 번에 변환")
+    parser.add_argument("paths", nargs="*", help="변환할 CSV (기본: dataset/ 아래 전체)")
+    args = parser.parse_args()
+
+    paths = args.paths or sorted(
+        p for p in glob.glob(os.path.join(DATASET_DIR, "**", "*.csv"), recursive=True)
+        if not os.path.abspath(p).startswith(CORPUS_DIR)
+    )
+
+    os.makedirs(CORPUS_DIR, exist_ok=True)
+    manifest = {"tables": []}
+    if os.path.exists(MANIFEST_PATH):
+        with open(MANIFEST_PATH, encoding="utf-8") as f:
+            manifest = json.load(f)
+    tables = {e["source"]: e for e in manifest["tables"]}
+
+    for path in paths:
+        entry = ingest_file(path)
+        tables[entry["source"]] = entry
+        flag = "" if entry["source_encoding"] != "mixed" else "  ⚠ 인코딩 혼재 — 일부 글자 복구 불가"
+        print(f"✓ {entry['source']} ({entry['source_encoding']}, {entry['rows']}행) → {entry['path']}{flag}")
+
+    manifest["tables"] = sorted(tables.values(), key=lambda e: e["source"])
+    tmp = MANIFEST_PATH + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+    os.replace(tmp, MANIFEST_PATH)
+
+    print(f"\n📚 {len(paths)}개 파일 변환 완료 → {MANIFEST_PATH}")
+
+
+if __name__ == "__main__":
+    profile_main(main, "ingest_corpus")
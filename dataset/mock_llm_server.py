@@ -0,0 +1,502 @@
+import argparse
+import json
+import math
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from common.engine import estimate_tokens
+
+
+#############################################
+# 로컬 모의 LLM 서버 — OpenAI chat.completions / Gemini generateContent 중
+# 스크립트들이 실제로 쓰는 부분만 흉내 냄 (할당량 소모 없이 속도 측정용)
+#############################################
+DEFAULT_CONFIG = {
+    "latency_ms": 300,        # 응답 지연 중앙값
+    "latency_sigma": 0.5,     # 로그정규 분포 모양 (0 = 고정 지연)
+    "rate_limit_rate": 0.0,   # 무작위 429 비율
+    "server_error_rate": 0.0, # 무작위 503 비율
+    "stall_rate": 0.0,        # 응답이 stall_ms 만큼 멈추는 요청 비율 (꼬리 지연 / 마감 시간 / hedge 확인용)
+    "stall_ms": 30000,
+    "retry_after": 1,         # 429 응답의 Retry-After (초)
+    "rpm": None,              # 서버 측 분당 요청 한도 (넘으면 429)
+    "mode": "auto",           # auto / echo / fixed
+    "fixed_text": "UNKNOWN",
+    "malformed_rate": 0.0,    # 스키마 응답 모드에서 깨진 JSON 을 돌려주는 비율 (구조화 출력 재요청 확인용)
+    "logprobs": True,         # logprobs 요청에 첫 토큰 상위 후보를 돌려줄지 (False = 미지원 모델처럼 무시)
+    "seed": 0,
+    "cache_min_tokens": 1024, # 컨텍스트 / 접두부 캐시 최소 길이 (이보다 짧으면 생성 거부 / 캐시 안 됨)
+}
+
+MEDNLI_ANSWERS = ("entailment", "neutral", "contradiction")
+LETTERS = "ABCD"
+
+
+#############################################
+# 응답 생성 — auto 는 프롬프트 형식을 보고 파싱 가능한 답을 만듦
+#############################################
+def auto_response(system, user, rng):
+    prompt = f"{system}\n{user}"
+    ids = re.findall(r"\[ID: (\d+)\]", prompt)
+
+    # 묶음 평가 — [{"id": n, ...}] JSON 배열
+    if ids:
+        if "ai_answer_mc1" in prompt:
+            items = [{"id": int(i), "ai_answer_mc1": rng.choice(LETTERS), "mc1_result": rng.choice(["True", "False"]),
+                      "ai_answer_mc2": sorted(rng.sample(LETTERS, rng.randint(1, 2))),
+                      "mc2_result": rng.choice(["True", "False"])} for i in ids]
+        else:
+            items = [{"id": int(i), "answer": rng.choice(MEDNLI_ANSWERS)} for i in ids]
+        return json.dumps(items, ensure_ascii=False)
+
+    # fan-out 번역 — {"방언": "..."} JSON 객체 (원문을 그대로 돌려줌)
+    keys = re.findall(r'"(\w+)": "<[^>]*번역>"', prompt)
+    if keys:
+        text = user.strip().splitlines()[-1] if user.strip() else ""
+        return json.dumps({k: text for k in keys}, ensure_ascii=False)
+
+    # 행 단위 평가 — 줄 형식
+    if "ai_answer_mc1:" in prompt:
+        lines = [f"ai_answer_mc1: {rng.choice(LETTERS)}"]
+        if "mc2_result:" in prompt:
+            lines += [f"mc1_result: {rng.choice(['True', 'False'])}",
+                      f"ai_answer_mc2: {sorted(rng.sample(LETTERS, 2))}",
+                      f"mc2_result: {rng.choice(['True', 'False'])}"]
+        return "\n".join(lines)
+    if "entailment" in prompt:
+        return rng.choice(MEDNLI_ANSWERS)
+
+    # 그 외 (방언 번역 등) — 마지막 줄 echo
+    return user.strip().splitlines()[-1] if user.strip() else ""
+
+
+def schema_response(schema, rng, ids, id_value=None):
+    """요청에 붙은 JSON 스키마 (Gemini responseSchema / OpenAI json_schema) 를 만족하는 값 생성"""
+    kind = str(schema.get("type", "")).lower()
+    if kind == "object":
+        return {k: id_value if k == "id" else schema_response(v, rng, ids)
+                for k, v in (schema.get("properties") or {}).items()}
+    if kind == "array":
+        items = schema.get("items") or {}
+        if "id" in (items.get("properties") or {}):
+            return [schema_response(items, rng, ids, int(i)) for i in ids]
+        return [schema_response(items, rng, ids) for _ in range(rng.randint(1, 2))]
+    if kind == "integer":
+        return id_value or 0
+    if schema.get("enum"):
+        # UNKNOWN 보다 실제 답을 고르도록 (자유 형식 auto 응답과 비슷한 분포)
+        choices = [v for v in schema["enum"] if v not in ("UNKNOWN", "unknown")] or schema["enum"]
+        return rng.choice(choices)
+    return ""
+
+
+def option_logprobs(user, rng, top):
+    """"A. ..." 줄로 나열된 선택지 글자들에 무작위 분포 → [(글자, logprob)] 확률 높은 순 top 개"""
+    letters = re.findall(r"^([A-Z])\. ", user, re.M) or list(LETTERS)
+    weights = [rng.random() ** 3 + 1e-3 for _ in letters]
+    total = sum(weights)
+    ranked = sorted(zip(letters, weights), key=lambda x: -x[1])[:top]
+    return [(letter, math.log(w / total)) for letter, w in ranked]
+
+
+def request_logprobs(api, body):
+    """요청한 상위 후보 수 (logprobs 요청이 아니면 0)"""
+    if api == "openai":
+        return int(body.get("top_logprobs") or 1) if body.get("logprobs") else 0
+    config = body.get("generationConfig") or body.get("generation_config") or {}
+    return int(config.get("logprobs") or 1) if config.get("responseLogprobs") else 0
+
+
+def rejected_param(api, body):
+    """
+    실제 API 처럼 reasoning 이 켜진 OpenAI 요청의 sampling 인자 (logprobs / temperature / top_p) 는 거부 → 인자 이름 또는 None.
+    gpt-5.1 은 reasoning_effort="none" (기본값) 일 때만 허용, 그 외 gpt-5 / o 계열은 항상 거부
+    """
+    model = str(body.get("model", ""))
+    if api != "openai" or not model.startswith(("gpt-5", "o1", "o3", "o4")):
+        return None
+    if model.startswith("gpt-5.1") and body.get("reasoning_effort", "none") == "none":
+        return None
+    for param in ("logprobs", "temperature", "top_p"):
+        value = body.get(param)
+        # 기본값(temperature / top_p = 1, logprobs = false)은 허용
+        if value is not None and value is not False and not (param != "logprobs" and value == 1):
+            return param
+    return None
+
+
+def thinking_tokens(api, body):
+    """
+    Gemini 사고 모델이 답 전에 쓰는 사고 토큰 수 흉내 — 출력 한도(maxOutputTokens)에 함께 들어감.
+    thinkingBudget 이 있으면 그만큼 (gemini-2.5-pro 는 최소 128), thinkingLevel low 는 128, 그 외 512
+    """
+    model = str(body.get("model", ""))
+    if api != "gemini" or not model.startswith(("gemini-2.5", "gemini-3")):
+        return 0
+    config = body.get("generationConfig") or body.get("generation_config") or {}
+    thinking = config.get("thinkingConfig") or config.get("thinking_config") or {}
+    budget = thinking.get("thinkingBudget", thinking.get("thinking_budget"))
+    if budget is not None and budget >= 0:
+        return max(budget, 128) if model.startswith(("gemini-2.5-pro", "gemini-3")) else budget
+    level = str(thinking.get("thinkingLevel", thinking.get("thinking_level", ""))).lower()
+    return 128 if level == "low" else 512
+
+
+def request_schema(api, body):
+    if api == "openai":
+        response_format = body.get("response_format") or {}
+        return (response_format.get("json_schema") or {}).get("schema")
+    config = body.get("generationConfig") or body.get("generation_config") or {}
+    return config.get("responseSchema") or config.get("responseJsonSchema")
+
+
+class MockState:
+    """설정 + 카운터 (요청 스레드 여러 개에서 공유)"""
+
+    def __init__(self, **config):
+        self.config = dict(DEFAULT_CONFIG, **{k: v for k, v in config.items() if v is not None})
+        self.rng = random.Random(self.config["seed"])
+        self.lock = threading.Lock()
+        self.window = []
+        self.cached_contents = {}
+        self.seen_prefixes = set()
+        self.reset()
+
+    def reset(self):
+        with self.lock:
+            self.counters = {"requests": 0, "ok": 0, "rate_limited": 0, "server_errors": 0,
+                             "openai": 0, "gemini": 0, "prompt_tokens": 0, "completion_tokens": 0,
+                             "cached_tokens": 0, "cache_creates": 0, "malformed": 0, "bad_requests": 0}
+
+    def count(self, **deltas):
+        with self.lock:
+            for k, v in deltas.items():
+                self.counters[k] += v
+
+    def stats(self):
+        with self.lock:
+            return dict(self.counters)
+
+    def decide(self):
+        """이번 요청의 (상태 코드, 지연 초) 결정"""
+        with self.lock:
+            now = time.monotonic()
+            rpm = self.config["rpm"]
+            if rpm:
+                self.window = [t for t in self.window if now - t < 60]
+                if len(self.window) >= rpm:
+                    return 429, 0.0
+                self.window.append(now)
+            roll = self.rng.random()
+            if roll < self.config["rate_limit_rate"]:
+                return 429, 0.0
+            if roll < self.config["rate_limit_rate"] + self.config["server_error_rate"]:
+                return 503, 0.0
+            median = self.config["latency_ms"] / 1000.0
+            sigma = self.config["latency_sigma"]
+            delay = median * math.exp(sigma * self.rng.gauss(0, 1)) if sigma else median
+            if self.rng.random() < self.config["stall_rate"]:
+                delay += self.config["stall_ms"] / 1000.0
+            return 200, delay
+
+    def create_cached_content(self, system):
+        """cachedContents 생성 — 너무 짧으면 None (실제 API 처럼 400)"""
+        if estimate_tokens(system) < self.config["cache_min_tokens"]:
+            return None
+        with self.lock:
+            name = f"cachedContents/mock-{len(self.cached_contents) + 1}"
+            self.cached_contents[name] = system
+            self.counters["cache_creates"] += 1
+        return name
+
+    def prefix_hit(self, system):
+        """OpenAI 자동 접두부 캐시 흉내 — 충분히 긴 system 이 두 번째로 보이면 그만큼 캐시됨"""
+        if not system or estimate_tokens(system) < self.config["cache_min_tokens"]:
+            return 0
+        with self.lock:
+            if system in self.seen_prefixes:
+                return estimate_tokens(system)
+            self.seen_prefixes.add(system)
+        return 0
+
+    def respond(self, system, user, schema=None):
+        mode = self.config["mode"]
+        if mode == "fixed":
+            return self.config["fixed_text"]
+        if mode == "echo":
+            return user
+        with self.lock:
+            seed = self.rng.random()
+        rng = random.Random(seed)
+        if schema:
+            if rng.random() < self.config["malformed_rate"]:
+                self.count(malformed=1)
+                return '{"label": '
+            return json.dumps(schema_response(schema, rng, re.findall(r"\[ID: (\d+)\]", f"{system}\n{user}")),
+                              ensure_ascii=False)
+        return auto_response(system, user, rng)
+
+
+#############################################
+# 요청 본문 → (system, user) 텍스트
+#############################################
+def openai_prompt(body):
+    system, user = [], []
+    for message in body.get("messages", []):
+        content = message.get("content", "")
+        if isinstance(content, list):
+            content = "".join(part.get("text", "") for part in content if isinstance(part, dict))
+        (system if message.get("role") in ("system", "developer") else user).append(content)
+    return "\n".join(system), "\n".join(user)
+
+
+def gemini_prompt(body):
+    def parts_text(content):
+        if isinstance(content, str):
+            return content
+        if isinstance(content, dict):
+            return "".join(p.get("text", "") for p in content.get("parts", []))
+        return "".join(parts_text(c) for c in content or [])
+
+    system = parts_text(body.get("systemInstruction") or body.get("system_instruction") or {})
+    return system, parts_text(body.get("contents"))
+
+
+class MockHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def send_json(self, status, payload, headers=None):
+        data = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        for k, v in (headers or {}).items():
+            self.send_header(k, str(v))
+        self.end_headers()
+        try:
+            self.wfile.write(data)
+        except (BrokenPipeError, ConnectionResetError):
+            # 클라이언트가 마감 시간으로 먼저 끊은 요청 (hedge 로 진 쪽 포함)
+            pass
+
+    def do_GET(self):
+        if self.path.rstrip("/") == "/stats":
+            self.send_json(200, self.server.state.stats())
+        else:
+            self.send_json(404, {"error": {"message": "not found"}})
+
+    def do_POST(self):
+        state = self.server.state
+        body = json.loads(self.rfile.read(int(self.headers.get("Content-Length") or 0)) or b"{}")
+        path = self.path.split("?")[0]
+
+        if path.rstrip("/") == "/reset":
+            state.reset()
+            return self.send_json(200, {})
+
+        if path.rstrip("/").endswith("/cachedContents"):
+            system, _ = gemini_prompt(body)
+            name = state.create_cached_content(system)
+            if name is None:
+                return self.send_json(400, {"error": {"code": 400, "status": "INVALID_ARGUMENT",
+                                                      "message": "Cached content is too small."}})
+            return self.send_json(200, {"name": name, "model": body.get("model"), "displayName": body.get("displayName"),
+                                        "usageMetadata": {"totalTokenCount": estimate_tokens(system)}})
+
+        if path.endswith("/chat/completions"):
+            api, (system, user) = "openai", openai_prompt(body)
+        elif ":generateContent" in path:
+            api, (system, user) = "gemini", gemini_prompt(body)
+            # 모델 이름은 경로에만 있음 (사고 모델 흉내용)
+            body.setdefault("model", path.split("/models/")[-1].split(":")[0])
+            cached_name = body.get("cachedContent")
+            if cached_name is not None:
+                if cached_name not in state.cached_contents:
+                    return self.send_json(404, {"error": {"code": 404, "status": "NOT_FOUND",
+                                                          "message": f"{cached_name} not found"}})
+                system = state.cached_contents[cached_name]
+        else:
+            return self.send_json(404, {"error": {"message": f"unsupported path {path}"}})
+
+        state.count(requests=1, **{api: 1})
+        status, delay = state.decide()
+        if status == 429:
+            state.count(rate_limited=1)
+            error = ({"error": {"message": "Rate limit reached", "type": "requests", "code": "rate_limit_exceeded"}}
+                     if api == "openai" else
+                     {"error": {"code": 429, "message": "Resource has been exhausted", "status": "RESOURCE_EXHAUSTED"}})
+            return self.send_json(429, error, {"Retry-After": state.config["retry_after"]})
+        if status == 503:
+            state.count(server_errors=1)
+            return self.send_json(503, {"error": {"code": 503, "message": "Service unavailable", "status": "UNAVAILABLE"}})
+
+        param = rejected_param(api, body)
+        if param is not None:
+            state.count(bad_requests=1)
+            return self.send_json(400, {"error": {"message": f"Unsupported parameter: '{param}' is not supported "
+                                                             "with this model.",
+                                                  "type": "invalid_request_error", "param": param}})
+
+        time.sleep(delay)
+        top = request_logprobs(api, body) if state.config["logprobs"] else 0
+        thoughts = thinking_tokens(api, body)
+        config = body.get("generationConfig") or body.get("generation_config") or {}
+        limit = config.get("maxOutputTokens") if api == "gemini" else None
+        truncated = limit is not None and limit <= thoughts
+        if truncated:
+            # 사고 토큰이 출력 한도를 다 써서 답이 없는 응답 (finishReason MAX_TOKENS)
+            top, text = 0, ""
+        elif top:
+            with state.lock:
+                seed = state.rng.random()
+            candidates = option_logprobs(user, random.Random(seed), top)
+            text = candidates[0][0]
+        else:
+            text = state.respond(system, user, request_schema(api, body))
+        prompt_tokens, completion_tokens = estimate_tokens(system, user), estimate_tokens(text)
+        if api == "gemini":
+            cached_tokens = estimate_tokens(system) if body.get("cachedContent") else 0
+        else:
+            cached_tokens = state.prefix_hit(system)
+        state.count(ok=1, prompt_tokens=prompt_tokens, completion_tokens=completion_tokens, cached_tokens=cached_tokens)
+
+        if api == "openai":
+            payload = {
+                "id": "chatcmpl-mock", "object": "chat.completion", "created": int(time.time()),
+                "model": body.get("model", "mock"),
+                "choices": [{"index": 0, "message": {"role": "assistant", "content": text}, "finish_reason": "stop",
+                             "logprobs": {"content": [{
+                                 "token": text, "logprob": candidates[0][1], "bytes": None,
+                                 "top_logprobs": [{"token": t, "logprob": lp, "bytes": None} for t, lp in candidates],
+                             }]} if top else None}],
+                "usage": {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens,
+                          "total_tokens": prompt_tokens + completion_tokens,
+                          "prompt_tokens_details": {"cached_tokens": cached_tokens}},
+            }
+        else:
+            payload = {
+                "candidates": [{"content": {"role": "model", "parts": [{"text": text}] if text else []},
+                                "finishReason": "MAX_TOKENS" if truncated else "STOP", "index": 0,
+                                **({"logprobsResult": {
+                                    "topCandidates": [{"candidates": [{"token": t, "logProbability": lp}
+                                                                      for t, lp in candidates]}],
+                                    "chosenCandidates": [{"token": text, "logProbability": candidates[0][1]}],
+                                }} if top else {})}],
+                "usageMetadata": {"promptTokenCount": prompt_tokens, "candidatesTokenCount": completion_tokens,
+                                  "thoughtsTokenCount": (min(thoughts, limit) if limit is not None else thoughts) or None,
+                                  "cachedContentTokenCount": cached_tokens or None,
+                                  "totalTokenCount": prompt_tokens + completion_tokens},
+                "modelVersion": path.split("/models/")[-1].split(":")[0],
+            }
+        self.send_json(200, payload)
+
+
+class MockLLMServer:
+    """with MockLLMServer(latency_ms=200) as server: ... server.url / server.stats()"""
+
+    def __init__(self, host="127.0.0.1", port=0, **config):
+        self.httpd = ThreadingHTTPServer((host, port), MockHandler)
+        self.httpd.daemon_threads = True
+        self.httpd.state = MockState(**config)
+        self.thread = None
+
+    @property
+    def url(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def state(self):
+        return self.httpd.state
+
+    def stats(self):
+        return self.state.stats()
+
+    def start(self):
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+#############################################
+# 클라이언트 — 스크립트의 client 대신 넣어서 사용
+#############################################
+def gemini_client(url):
+    from google import genai
+    from google.genai import types
+
+    return genai.Client(api_key="mock", http_options=types.HttpOptions(base_url=url))
+
+
+def openai_client(url, **kwargs):
+    from openai import OpenAI
+
+    return OpenAI(api_key="mock", base_url=f"{url}/v1", **kwargs)
+
+
+def add_config_arguments(parser):
+    parser.add_argument("--latency-ms", type=float, default=DEFAULT_CONFIG["latency_ms"])
+    parser.add_argument("--latency-sigma", type=float, default=DEFAULT_CONFIG["latency_sigma"])
+    parser.add_argument("--rate-limit-rate", type=float, default=DEFAULT_CONFIG["rate_limit_rate"], help="무작위 429 비율")
+    parser.add_argument("--server-error-rate", type=float, default=DEFAULT_CONFIG["server_error_rate"], help="무작위 503 비율")
+    parser.add_argument("--retry-after", type=float, default=DEFAULT_CONFIG["retry_after"])
+    parser.add_argument("--stall-rate", type=float, default=DEFAULT_CONFIG["stall_rate"], help="stall-ms 만큼 멈추는 요청 비율")
+    parser.add_argument("--stall-ms", type=float, default=DEFAULT_CONFIG["stall_ms"])
+    parser.add_argument("--server-rpm", type=int, default=None, help="서버 측 분당 요청 한도")
+    parser.add_argument("--mode", choices=["auto", "echo", "fixed"], default=DEFAULT_CONFIG["mode"])
+    parser.add_argument("--fixed-text", default=DEFAULT_CONFIG["fixed_text"])
+    parser.add_argument("--seed", type=int, default=DEFAULT_CONFIG["seed"])
+    parser.add_argument("--cache-min-tokens", type=int, default=DEFAULT_CONFIG["cache_min_tokens"],
+                        help="컨텍스트 / 접두부 캐시 최소 토큰 수")
+    parser.add_argument("--malformed-rate", type=float, default=DEFAULT_CONFIG["malformed_rate"],
+                        help="스키마 응답 모드에서 깨진 JSON 비율")
+    parser.add_argument("--no-logprobs", action="store_true", help="logprobs 요청을 무시 (미지원 모델 fallback 확인용)")
+
+
+def config_from_args(args):
+    return {
+        "latency_ms": args.latency_ms, "latency_sigma": args.latency_sigma,
+        "rate_limit_rate": args.rate_limit_rate, "server_error_rate": args.server_error_rate,
+        "retry_after": args.retry_after, "rpm": args.server_rpm,
+        "stall_rate": args.stall_rate, "stall_ms": args.stall_ms,
+        "mode": args.mode, "fixed_text": args.fixed_text, "seed": args.seed,
+        "cache_min_tokens": args.cache_min_tokens, "malformed_rate": args.malformed_rate,
+        "logprobs": not args.no_logprobs,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="OpenAI / Gemini 모의 서버 (로컬 속도 측정용)")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    add_config_arguments(parser)
+    args = parser.parse_args()
+
+    server = MockLLMServer(args.host, args.port, **config_from_args(args))
+    print(f"🧪 모의 서버 실행 중 → {server.url}  (GET /stats, POST /reset)")
+    print(f"   OpenAI: OpenAI(base_url=\"{server.url}/v1\")")
+    print(f"   Gemini: genai.Client(http_options=types.HttpOptions(base_url=\"{server.url}\"))")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        server.httpd.server_close()
+
+
+if __name__ == "__main__":
+    main()
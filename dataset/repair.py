@@ -0,0 +1,235 @@
+import argparse
+import csv
+import glob
+import json
+import os
+import re
+from collections import Counter
+
+from common.adaptive import print_controller_stats
+from common.corpus import DATASET_DIR, JUDGE_MODELS, column_dialect, describe_file, load_rows
+from common.engine import RateLimiter, run_ordered
+from common.llm import print_cache_stats, refreshed_cache
+from common.logprobs import print_logprob_stats
+from common.structured import PARSE_ERROR, print_structured_stats
+from common.telemetry import print_telemetry_stats, profile_main
+from common.translation_units import Untranslated, read_fallbacks, write_fallbacks
+from rescore import find_result_files
+from run_plan import SPEC_PATH, load_script, spec_path
+
+
+# 방언 번역이 원문과 문자 3-gram 기준으로 이만큼 겹치면 "번역되지 않음"으로 봄
+SIMILARITY_THRESHOLD = 0.9
+NGRAM = 3
+HANGUL = re.compile(r"[가-힣]")
+
+#############################################
+# 실패 행 판별 — 스크립트마다 실패를 기록하는 방식이 다름
+#############################################
+def _hallucination_failed(column):
+    return lambda row: row.get(column, "") in ("ERROR_API", PARSE_ERROR, "")
+
+
+# (프로바이더, 단계, 데이터셋) → (스크립트, 실패 판별, 방언 컬럼 접두어, 다시 평가하는 함수(모듈, row, 방언))
+EVALUATORS = {
+    ("gemini", "hallucination", "mednli"): (
+        "gemini/gemini _evaluation_Hallucination.py", _hallucination_failed("ai_answer"), "sentence1_",
+        lambda m, row, d: m.evaluate_mednli_row(m.get_client(), row, d, m.MODEL_NAME, m.MAX_RETRIES)),
+    ("gemini", "hallucination", "truthfulqa"): (
+        "gemini/gemini _evaluation_Hallucination.py", _hallucination_failed("ai_answer_mc1"), "question_",
+        lambda m, row, d: m.evaluate_truthfulqa_row(m.get_client(), row, d, m.MODEL_NAME, m.MAX_RETRIES)),
+    ("gemini", "accuracy", "mednli"): (
+        "gemini/gemini _evaluation_accuracy.py", lambda row: row.get("ai_answer", "") == "" or
+        row["ai_answer"].startswith("ERROR"), "sentence1_",
+        lambda m, row, d: m.evaluate_mednli_row(0, row, d, m.MODEL_NAME)),
+    ("gemini", "accuracy", "truthfulqa"): (
+        "gemini/gemini _evaluation_accuracy.py", lambda row: row.get("ai_answer_mc1", "") in ("ERROR", ""),
+        "question_", lambda m, row, d: m.evaluate_truthfulqa_row(0, row, d, m.MODEL_NAME)),
+    ("chatgpt", "hallucination", "truthfulqa"): (
+        "chatgpt/TruthfulQA_eval_Hallucination.py", _hallucination_failed("ai_answer_mc1"), "question_",
+        lambda m, row, d: m.evaluate_row(row, m.MODEL_NAME)),
+}
+
+TRANSLATOR_SCRIPT = "gemini/gemini_translate.py"
+# gemini_translate.py 의 MEDNLI_COLUMNS / TRUTHFULQA_COLUMNS 와 같음 (--dry-run 은 스크립트를 import 하지 않도록)
+TRANSLATION_COLUMNS = {"mednli": ["sentence1_ko", "sentence2_ko"],
+                       "truthfulqa": ["question_ko", "mc1_choices_ko", "mc2_choices_ko"]}
+
+
+def ngrams(text):
+    text = " ".join(str(text).split())
+    return {text[i:i + NGRAM] for i in range(max(1, len(text) - NGRAM + 1))}
+
+
+def similarity(a, b):
+    """문자 n-gram 집합의 Dice 계수 (0 ~ 1)"""
+    x, y = ngrams(a), ngrams(b)
+    return 2 * len(x & y) / max(1, len(x) + len(y))
+
+
+def untranslated(source, translated, threshold):
+    """번역 셀이 비었거나, 원문(한글 포함)과 같거나 거의 같으면 이유, 아니면 None"""
+    source, translated = str(source or "").strip(), str(translated or "").strip()
+    if not source:
+        return None
+    if not translated:
+        return "empty"
+    if not HANGUL.search(source):
+        # 영어 / 숫자만 있는 셀은 그대로 남기는 것이 정상
+        return None
+    if translated == source:
+        return "exact"
+    if similarity(source, translated) >= threshold:
+        return "similar"
+    return None
+
+
+def provider_of(path):
+    parts = os.path.abspath(path).split(os.sep)
+    return next((p for p in JUDGE_MODELS if p in parts), None)
+
+
+#############################################
+# 파일 하나 수리 — 실패 행만 다시 요청해서 같은 자리에 덮어씀
+#############################################
+def write_in_place(path, fieldnames, rows):
+    """임시 파일에 쓰고 fsync 후 교체 (중간에 죽어도 원본은 그대로)"""
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=fieldnames, extrasaction="ignore")
+        writer.writeheader()
+        writer.writerows(rows)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+def repair_evaluation(path, meta, scripts, dry_run):
+    key = (provider_of(path), meta["stage"], meta["dataset"])
+    if key not in EVALUATORS:
+        return None
+    script, failed, prefix, redo = EVALUATORS[key]
+    fieldnames, rows = load_rows(path)
+    bad = [i for i, row in enumerate(rows) if failed(row)]
+    if not bad or dry_run:
+        return {"rows": len(rows), "flagged": len(bad), "reasons": Counter(error=len(bad)), "fixed": 0}
+
+    if script not in scripts:
+        scripts[script] = load_script(script)
+    module = scripts[script]
+    dialect = column_dialect(fieldnames, prefix) or meta["dialect"]
+
+    def patch(k, item, result):
+        rows[item[0]] = result
+
+    # 실패한 응답이 캐시에 남아 있으면 그대로 다시 읽히므로 캐시를 읽지 않고 새로 요청 (새 응답으로 캐시도 덮어씀)
+    with refreshed_cache():
+        run_ordered([(i, dict(rows[i])) for i in bad], lambda item: redo(module, item[1], dialect), patch,
+                    concurrency=module.CONCURRENCY, limiter=RateLimiter(rpm=module.RPM, tpm=module.TPM),
+                    desc=f"수리 {os.path.basename(path)}")
+    write_in_place(path, fieldnames, rows)
+    fixed = sum(not failed(rows[i]) for i in bad)
+    return {"rows": len(rows), "flagged": len(bad), "reasons": Counter(error=len(bad)), "fixed": fixed}
+
+
+def repair_translation(path, meta, sources, scripts, threshold, dry_run):
+    source = sources.get(meta["dataset"])
+    if source is None or meta["dialect"] in (None, "ko"):
+        return None
+    columns = TRANSLATION_COLUMNS[meta["dataset"]]
+
+    fieldnames, rows = load_rows(path)
+    _, source_rows = load_rows(source, columns + ["gold_label", "mc1_labels", "mc2_labels"])
+    if len(source_rows) != len(rows):
+        print(f"⚠ {os.path.basename(path)}: 원문 {len(source_rows)}행 / 번역 {len(rows)}행 — 행 대응을 알 수 없어 건너뜀")
+        return None
+
+    # 번역 컬럼 이름은 파일에 적힌 방언 표기 그대로 (sentence1_jeju / question_Jeju ...)
+    spelled = column_dialect(fieldnames, columns[0].replace("ko", "")) or meta["dialect"]
+    target = {col: col.replace("_ko", f"_{spelled}") for col in columns}
+    # 번역 스크립트가 API 오류로 원문을 그대로 쓴 행 (문장 하나만 실패한 셀은 유사도로는 못 찾음)
+    fallbacks = read_fallbacks(path)
+    reasons = Counter()
+    bad = []
+    for i, (src, row) in enumerate(zip(source_rows, rows)):
+        found = [untranslated(src.get(col), row.get(target[col]), threshold) for col in columns]
+        found = [r for r in found if r] or (["fallback"] if i in fallbacks else [])
+        if found:
+            reasons.update(found)
+            bad.append(i)
+    if not bad or dry_run:
+        return {"rows": len(rows), "flagged": len(bad), "reasons": reasons, "fixed": 0}
+
+    if TRANSLATOR_SCRIPT not in scripts:
+        scripts[TRANSLATOR_SCRIPT] = load_script(TRANSLATOR_SCRIPT)
+    module = scripts[TRANSLATOR_SCRIPT]
+
+    failed = set()
+
+    def on_row(k, src, translated):
+        if any(isinstance(v, Untranslated) for v in translated.values()):
+            failed.add(bad[k])
+        for col in columns:
+            rows[bad[k]][target[col]] = translated[col]
+
+    # 행 전체를 다시 번역 (문장 단위로 나누는 것은 기존 번역 경로와 같음) — 원문을 그대로 돌려준 응답이 캐시에 있으므로 새로 요청
+    with refreshed_cache():
+        module.translate_rows([source_rows[i] for i in bad], columns,
+                              lambda text: module.translate_dialect(text, meta["dialect"]),
+                              on_row, desc=f"수리 {os.path.basename(path)}")
+    write_in_place(path, fieldnames, rows)
+    # 이번에도 API 오류로 원문을 그대로 쓴 행만 기록에 남김
+    write_fallbacks(path, (fallbacks - set(bad)) | failed)
+    fixed = sum(i not in failed and
+                not any(untranslated(source_rows[i].get(col), rows[i].get(target[col]), threshold) for col in columns)
+                for i in bad)
+    return {"rows": len(rows), "flagged": len(bad), "reasons": reasons, "fixed": fixed}
+
+
+def find_translation_files():
+    return sorted(p for p in glob.glob(os.path.join(DATASET_DIR, "**", "*.csv"), recursive=True)
+                  if describe_file(p)["stage"] == "translation" and "translation_dataset" in p)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="결과 / 번역 CSV 에서 실패하거나 번역되지 않은 행만 다시 요청해서 제자리 수리")
+    parser.add_argument("paths", nargs="*", help="수리할 CSV (기본: dataset/ 아래 번역 파일 + 평가 결과 전체)")
+    parser.add_argument("--spec", default=SPEC_PATH, help="번역 파일의 원문 경로를 읽을 실행 명세")
+    parser.add_argument("--threshold", type=float, default=SIMILARITY_THRESHOLD,
+                        help="원문과의 문자 n-gram 유사도가 이 이상이면 번역 안 됨으로 판단")
+    parser.add_argument("--dry-run", action="store_true", help="실패 행 수만 출력")
+    args = parser.parse_args()
+
+    with open(args.spec, encoding="utf-8") as f:
+        spec = json.load(f)
+    sources = {dataset: spec_path(info["source"]) for dataset, info in spec["datasets"].items()}
+    paths = args.paths or find_translation_files() + find_result_files()
+
+    scripts = {}
+    total = Counter()
+    for path in paths:
+        meta = describe_file(path)
+        if meta["stage"] == "translation":
+            result = repair_translation(path, meta, sources, scripts, args.threshold, args.dry_run)
+        else:
+            result = repair_evaluation(path, meta, scripts, args.dry_run)
+        if result is None or not result["flagged"]:
+            continue
+        total.update(flagged=result["flagged"], fixed=result["fixed"])
+        reasons = ", ".join(f"{k} {v}" for k, v in sorted(result["reasons"].items()))
+        fixed = "" if args.dry_run else f" → 수리 {result['fixed']}행"
+        print(f"🩹 {os.path.relpath(path, DATASET_DIR)}: {result['rows']}행 중 {result['flagged']}행 ({reasons}){fixed}")
+
+    if args.dry_run:
+        print(f"\n🔎 다시 요청할 행 {total['flagged']}개 (--dry-run)")
+        return
+    print(f"\n✅ 다시 요청 {total['flagged']}행, 수리 {total['fixed']}행 (나머지는 새로 요청해도 같은 답 / 번역되지 않은 문장이 나옴)")
+    print_cache_stats()
+    print_controller_stats()
+    print_telemetry_stats()
+    print_structured_stats()
+    print_logprob_stats()
+
+
+if __name__ == "__main__":
+    profile_main(main, "repair")
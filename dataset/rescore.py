@@ -0,0 +1,116 @@
+import argparse
+import csv
+import glob
+import os
+
+from common.corpus import DATASET_DIR, CORPUS_DIR, describe_file, find_table, list_kind, load_rows, read_table
+from common.scoring import padded_matrix, score_mednli, score_truthfulqa
+from common.telemetry import profile_main
+
+
+DIALECT_ORDER = ["ko", "Jeju", "Gyeongsang", "Jeolla", "Chungcheong"]
+REPORT_FIELDS = ["dataset", "stage", "model", "translator", "dialect", "metric",
+                 "n", "correct", "wrong", "unknown", "invalid", "accuracy", "unknown_rate", "score", "source"]
+
+
+#############################################
+# 결과 파일 탐색 / 재채점 (API 호출 없음)
+#############################################
+def find_result_files():
+    """평가 결과 CSV 목록 (번역 단계 파일 / 코퍼스 저장소 제외)"""
+    paths = []
+    for path in sorted(glob.glob(os.path.join(DATASET_DIR, "**", "*.csv"), recursive=True)):
+        if os.path.abspath(path).startswith(CORPUS_DIR):
+            continue
+        if describe_file(path)["stage"] != "translation":
+            paths.append(path)
+    return paths
+
+
+def stored_label_matrices(path):
+    """ingest 된 테이블이 있으면 라벨 list 컬럼을 평탄화된 numpy 배열에서 바로 행렬로 변환"""
+    entry = find_table(path)
+    if entry is None:
+        return {}
+    table = read_table(entry)
+    matrices = {}
+    for col in table.column_names:
+        if list_kind(col) == "labels" and str(table.schema.field(col).type).startswith("list"):
+            values = table.column(col).combine_chunks()
+            lengths = values.value_lengths().fill_null(0).to_numpy()
+            matrices[col] = padded_matrix(values.flatten().to_numpy(), lengths)
+    return matrices
+
+
+def rescore_file(path):
+    """파일 하나 → [(메타데이터 + 지표 집계, 행별 정답 bool 배열, 행별 무효 bool 배열)]"""
+    meta = describe_file(path)
+    fieldnames, rows = load_rows(path)
+    if meta["dataset"] == "mednli":
+        scores = score_mednli(rows, fieldnames)
+    else:
+        scores = score_truthfulqa(rows, fieldnames, stored_label_matrices(path))
+    records = []
+    for metric, (correct, invalid, summary) in scores.items():
+        record = dict(meta, metric=metric, source=os.path.relpath(path, DATASET_DIR), **summary)
+        records.append((record, correct, invalid))
+    return records
+
+
+def rescore_all(paths=None):
+    records = []
+    for path in paths or find_result_files():
+        records.extend(rescore_file(path))
+    return records
+
+
+#############################################
+# 출력 — long 형식 CSV + 방언별 정확도 행렬
+#############################################
+def write_report(records, output):
+    with open(output, "w", encoding="utf-8", newline="") as out:
+        writer = csv.DictWriter(out, fieldnames=REPORT_FIELDS, extrasaction="ignore")
+        writer.writeheader()
+        for record, *_ in records:
+            writer.writerow(record)
+
+
+def print_matrix(records):
+    groups = {}
+    for record, *_ in records:
+        key = (record["dataset"], record["stage"], record["model"], record["metric"])
+        groups.setdefault(key, {}).setdefault(record["dialect"], []).append(record)
+
+    header = f"{'dataset':<11}{'stage':<14}{'model':<14}{'metric':<9}" + "".join(f"{d:>13}" for d in DIALECT_ORDER)
+    print(header)
+    print("-" * len(header))
+    for key in sorted(groups):
+        # 같은 조합의 결과 파일이 여러 개면 줄을 나눠서 모두 표시
+        for n in range(max(len(v) for v in groups[key].values())):
+            cells = []
+            for dialect in DIALECT_ORDER:
+                found = groups[key].get(dialect, [])
+                r = found[n] if n < len(found) else None
+                if r is None:
+                    cells.append(f"{'-':>13}")
+                elif r["accuracy"] != r["accuracy"]:
+                    cells.append(f"{'n/a':>13}")
+                else:
+                    cells.append(f"{r['accuracy']:>7.1%} {r['score']:>+5d}")
+            print(f"{key[0]:<11}{key[1]:<14}{str(key[2]):<14}{key[3]:<9}" + "".join(cells))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="모든 평가 결과를 라벨 기준으로 재채점 (API 호출 없음)")
+    parser.add_argument("paths", nargs="*", help="결과 CSV (기본: dataset/ 아래 전체 평가 결과)")
+    parser.add_argument("--output", default=os.path.join(DATASET_DIR, "rescore_report.csv"))
+    args = parser.parse_args()
+
+    records = rescore_all(args.paths)
+    write_report(records, args.output)
+    print_matrix(records)
+    print(f"\n📊 {len(records)}개 (파일 × 지표) 재채점 완료 → {args.output}")
+
+
+if __name__ == "__main__":
+    profile_main(main, "rescore")
@@ -0,0 +1,522 @@
+import argparse
+import csv
+import importlib.util
+import json
+import os
+import time
+from collections import defaultdict
+
+from common.adaptive import print_controller_stats
+from common.cascade import print_cascade_stats
+from common.corpus import DATASET_DIR, find_inputs, load_rows
+from common.generation import GENERATION_PROFILES, active_profile, set_profile
+from common.llm import print_cache_stats
+from common.logprobs import print_logprob_stats
+from common.sampling import (SAMPLING_DEFAULTS, StreamMonitor, permuted_input, sampled_job, stratified_indices,
+                             take_rows, write_sampling_report)
+from common.scheduler import DEFAULT_BUDGET, Task, run_plan
+from common.structured import print_structured_stats
+from common.telemetry import print_telemetry_stats, profile_main, telemetry_totals
+from dialect_stats import compare_dialects, write_stats
+from rescore import rescore_all, rescore_file, write_report
+
+
+SPEC_PATH = os.path.join(DATASET_DIR, "run_spec.json")
+STAGES = ("translate", "evaluate", "summarize")
+
+# 요약 단계에서 무효(파싱 실패 / "Error") 비율이 이 이상이면 경고
+INVALID_WARN_RATE = 0.1
+PROJECTION_FIELDS = ["model", "sample_calls", "projected_calls", "projected_tokens", "projected_cost_usd",
+                     "projected_hours"]
+PROFILE_FIELDS = ["profile", "task", "dataset", "model", "metric", "n", "accuracy", "invalid_rate", "calls", "hits",
+                  "mean_latency_ms", "output_tokens", "thinking_tokens", "cost_usd", "elapsed_s"]
+
+
+#############################################
+# 실행 명세 → 작업 그래프 (translate → evaluate → summarize)
+#############################################
+def load_spec(path):
+    with open(path, encoding="utf-8") as f:
+        spec = json.load(f)
+    unknown = [s for s in spec.get("stages", STAGES) if s not in STAGES]
+    if unknown:
+        raise ValueError(f"알 수 없는 단계: {unknown}")
+    return spec
+
+
+def load_script(relpath):
+    path = os.path.join(DATASET_DIR, relpath)
+    name = "plan_" + os.path.basename(path).replace(" ", "_").replace(".py", "")
+    spec = importlib.util.spec_from_file_location(name, path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def spec_path(path):
+    return path if os.path.isabs(path) else os.path.join(DATASET_DIR, path)
+
+
+def output_dir(workdir, provider, stage):
+    # describe_file 이 (프로바이더, 단계)를 경로에서 읽을 수 있도록 기존 디렉터리 구조를 그대로 사용
+    return os.path.join(workdir, provider, f"{stage}_eval_dataset" if stage != "translation" else "translation_dataset")
+
+
+def sampling_config(spec):
+    """명세의 sampling 항목 (enabled 가 아니면 None) — 빠진 값은 SAMPLING_DEFAULTS"""
+    sampling = spec.get("sampling") or {}
+    if not sampling.get("enabled"):
+        return None
+    return {**SAMPLING_DEFAULTS, **{k: v for k, v in sampling.items() if k != "enabled"}}
+
+
+def subset_config(spec):
+    """명세의 subset 항목 (rows 가 없으면 None)"""
+    subset = spec.get("subset") or {}
+    return subset if subset.get("rows") else None
+
+
+def build_plan(spec, scripts=None, monitors=None, subsets=None, outputs=None, dry_run=False):
+    """
+    (작업 목록, 모델별 예산). scripts 는 {스크립트 경로: 모듈} — 비어 있으면 필요할 때 import
+    (benchmark 처럼 client 를 바꿔 끼운 모듈을 넘길 수도 있음).
+    적응 샘플링이 켜져 있으면 평가 작업마다 StreamMonitor 를 만들어 monitors 목록에 추가,
+    층화 표본(subset)이면 원문 / 번역 파일을 표본으로 잘라 쓰고 subsets 에 {데이터셋: (표본 행 수, 전체 행 수)} 기록,
+    outputs 에는 {평가 작업 이름: 결과 파일} 기록.
+    dry_run 이면 표본 행은 고르기만 하고 파일은 쓰지 않음 (작업 그래프의 경로는 실제 실행과 같음)
+    """
+    scripts = {} if scripts is None else scripts
+    monitors = [] if monitors is None else monitors
+    subsets = {} if subsets is None else subsets
+    outputs = {} if outputs is None else outputs
+    stages = spec.get("stages", list(STAGES))
+    dialects = spec["dialects"]
+    workdir = spec_path(spec.get("workdir", "runs"))
+    sampling = sampling_config(spec)
+    if sampling:
+        # 행 순서가 다른 결과 파일과 섞이지 않도록 별도 디렉터리 (이어서 실행하면 같은 시드 → 같은 순서)
+        workdir = os.path.join(workdir, "adaptive")
+    subset = subset_config(spec)
+    if subset:
+        workdir = os.path.join(workdir, "subset")
+        subset_dir = os.path.join(workdir, "sources")
+        if not dry_run:
+            os.makedirs(subset_dir, exist_ok=True)
+
+    def cut(path, indices):
+        """표본 행만 subset_dir 에 잘라 쓴 파일 경로 (dry_run 이면 경로만)"""
+        output = os.path.join(subset_dir, os.path.basename(path))
+        return output if dry_run else take_rows(path, output, indices)
+
+    def script(relpath):
+        if relpath not in scripts:
+            scripts[relpath] = load_script(relpath)
+        return scripts[relpath]
+
+    tasks = []
+    # (데이터셋, 방언) → (입력 경로, 번역 작업 이름 또는 None)
+    inputs = {}
+
+    for dataset, info in spec["datasets"].items():
+        source = spec_path(info["source"])
+        indices = None
+        if subset:
+            _, rows = load_rows(source)
+            indices = stratified_indices(dataset, rows, subset["rows"], subset.get("seed", 0))
+            subsets[dataset] = (len(indices), len(rows))
+            source = cut(source, indices)
+        inputs[dataset, "ko"] = (source, None)
+
+        if "translate" in stages:
+            translator = spec["translator"]
+            out_dir = output_dir(workdir, "gemini", "translation")
+            translation_outputs = {d: os.path.join(out_dir, f"{dataset}_{d}.{translator['model']}.csv")
+                                   for d in dialects}
+
+            if translator.get("fanout"):
+                # 한 요청으로 모든 방언 (공용 지시문 + JSON 응답) — 명세에서 직접 켰을 때만
+                name = f"translate:{dataset}"
+
+                def open_translation(dataset=dataset, source=source, translation_outputs=translation_outputs,
+                                     translator=translator, out_dir=out_dir):
+                    module = script(translator["script"])
+                    os.makedirs(out_dir, exist_ok=True)
+                    return module.fanout_job(source, translation_outputs,
+                                             getattr(module, f"{dataset.upper()}_COLUMNS"),
+                                             getattr(module, f"{dataset}_fieldnames"),
+                                             getattr(module, f"{dataset}_row"), model_name=translator["model"])
+
+                tasks.append(Task(name, translator["model"], job=open_translation))
+                for d in dialects:
+                    inputs[dataset, d] = (translation_outputs[d], name)
+            else:
+                # 기본: 방언별 지시문으로 방언마다 따로 번역 (방언 평가는 그 방언 번역만 기다림)
+                for d in dialects:
+                    name = f"translate:{dataset}:{d}"
+
+                    def open_translation(dataset=dataset, source=source, d=d, output=translation_outputs[d],
+                                         translator=translator, out_dir=out_dir):
+                        module = script(translator["script"])
+                        os.makedirs(out_dir, exist_ok=True)
+                        return module.dialect_job(source, output, d, getattr(module, f"{dataset.upper()}_COLUMNS"),
+                                                  getattr(module, f"{dataset}_fieldnames"),
+                                                  getattr(module, f"{dataset}_row"), model_name=translator["model"])
+
+                    tasks.append(Task(name, translator["model"], job=open_translation))
+                    inputs[dataset, d] = (translation_outputs[d], name)
+        else:
+            # 번역 단계를 빼면 이미 있는 번역 파일 사용 (파일 이름 철자가 달라도 방언으로 찾음)
+            found = dict(find_inputs(spec_path(spec.get("translation_dir", "gemini/translation_dataset")), dataset))
+            for d in dialects:
+                if d in found and indices is not None:
+                    # 번역 파일은 원문과 행 순서가 같으므로 같은 행 번호로 자름
+                    inputs[dataset, d] = (cut(found[d], indices), None)
+                elif d in found:
+                    inputs[dataset, d] = (found[d], None)
+                else:
+                    print(f"⚠ {dataset} {d} 번역 파일이 없어 평가에서 제외")
+
+    if "evaluate" in stages:
+        for key, evaluator in spec["evaluators"].items():
+            summary_deps = []
+            summary_outputs = []
+            out_dir = output_dir(workdir, evaluator["provider"], evaluator["stage"])
+
+            for dataset in evaluator.get("datasets", list(spec["datasets"])):
+                baseline = None
+                for d in ["ko"] + dialects:
+                    if (dataset, d) not in inputs:
+                        continue
+                    input_file, dep = inputs[dataset, d]
+                    output_file = os.path.join(out_dir, f"{dataset}_{d}_eval_{evaluator['stage']}.csv")
+                    name = f"evaluate:{key}:{dataset}:{d}"
+                    monitor = None
+                    if sampling:
+                        # ko 흐름이 방언 흐름들의 짝 비교 기준 (같은 row_id 끼리 비교)
+                        monitor = StreamMonitor(dataset, d, key, sampling, baseline=baseline)
+                        baseline = baseline or monitor
+                        monitors.append(monitor)
+
+                    def open_evaluation(evaluator=evaluator, dataset=dataset, d=d,
+                                        input_file=input_file, output_file=output_file, monitor=monitor):
+                        module = script(evaluator["script"])
+                        if "batch_size" in evaluator:
+                            # 묶음 평가는 명세에서 평가자마다 직접 켬 (스크립트 기본값은 행 단위)
+                            module.BATCH_SIZE = evaluator["batch_size"]
+                        os.makedirs(os.path.dirname(output_file), exist_ok=True)
+                        if monitor is None:
+                            return getattr(module, f"{dataset}_job")(input_file, output_file, d,
+                                                                     model_name=evaluator["model"])
+                        # 모든 방언 파일을 같은 시드로 섞음 → n 번째 행은 방언마다 같은 문항
+                        shuffled_dir = os.path.join(workdir, "shuffled")
+                        os.makedirs(shuffled_dir, exist_ok=True)
+                        shuffled = permuted_input(input_file, os.path.join(shuffled_dir, os.path.basename(input_file)),
+                                                  sampling["seed"])
+                        monitor.resume_from(output_file)
+                        return sampled_job(getattr(module, f"{dataset}_job")(shuffled, output_file, d,
+                                                                             model_name=evaluator["model"]), monitor)
+
+                    deps = [dep] if dep else []
+                    if monitor is not None and d == "ko":
+                        # ko 도 번역이 끝난 뒤 방언 흐름과 함께 돌아야 방언 흐름이 멈출 때 같이 멈출 수 있음
+                        deps = sorted({inputs[dataset, x][1] for x in dialects
+                                       if inputs.get((dataset, x), (None, None))[1]})
+                    tasks.append(Task(name, evaluator["model"], deps=deps, job=open_evaluation))
+                    summary_deps.append(name)
+                    summary_outputs.append(output_file)
+                    outputs[name] = output_file
+
+            if "summarize" in stages and summary_deps:
+                tasks.append(Task(f"summarize:{key}", deps=summary_deps,
+                                  run=lambda key=key, paths=summary_outputs: summarize(key, paths, workdir)))
+
+    return tasks, spec.get("budgets", {})
+
+
+def summarize(key, paths, workdir):
+    """평가 결과 재채점 리포트 + 방언 vs 표준말 신뢰구간 / 검정"""
+    records = rescore_all([p for p in paths if os.path.exists(p)])
+    if not records:
+        print(f"⚠ {key}: 재채점할 결과 파일 없음")
+        return
+    write_report(records, os.path.join(workdir, f"{key}_report.csv"))
+    write_stats(compare_dialects(records), os.path.join(workdir, f"{key}_stats.csv"))
+    print(f"📊 {key}: {len(records)}개 지표 → {workdir}/{key}_report.csv, {key}_stats.csv")
+    for record, *_ in records:
+        if record["n"] and record["invalid"] / record["n"] >= INVALID_WARN_RATE:
+            print(f"⚠ {key}: {record['dataset']} {record['dialect']} {record['metric']} 무효 응답 "
+                  f"{record['invalid']}/{record['n']} — 프롬프트 / 파싱 확인 ({record['source']})")
+
+
+#############################################
+# 표본 실행 → 전체 실행 시간 / 비용 추정
+#############################################
+def task_dataset(name):
+    """계획의 작업 이름 (translate:{데이터셋}[:{방언}] / evaluate:{평가자}:{데이터셋}:{방언}) → 데이터셋"""
+    parts = (name or "").split(":")
+    if parts[0] == "translate" and len(parts) in (2, 3):
+        return parts[1]
+    if parts[0] == "evaluate" and len(parts) == 4:
+        return parts[2]
+    return None
+
+
+def project_full_run(subsets, elapsed, budgets, path):
+    """
+    표본 실행의 telemetry 합계를 데이터셋별 (전체 행 수 / 표본 행 수) 배로 늘려 모델별 호출 / 토큰 / 비용 추정.
+    시간은 표본 실행 시간을 같은 비율로 늘린 값과 모델별 RPM / TPM 한도로 걸리는 시간 중 큰 값
+    """
+    scale = {dataset: total / max(1, n) for dataset, (n, total) in subsets.items()}
+    per_model = defaultdict(lambda: {"sample_calls": 0, "calls": 0.0, "requests": 0.0, "tokens": 0.0,
+                                     "cost": 0.0, "wall_ms": 0.0, "sample_wall_ms": 0.0, "hits": 0})
+    for (provider, model, job), t in telemetry_totals().items():
+        f = scale.get(task_dataset(job))
+        if f is None:
+            continue
+        m = per_model[model]
+        m["sample_calls"] += t["calls"]
+        m["hits"] += t["hits"]
+        m["calls"] += t["calls"] * f
+        m["requests"] += t["attempts"] * f
+        m["tokens"] += (t["prompt_tokens"] + t["output_tokens"] + t["thinking_tokens"]) * f
+        m["cost"] += t["cost_usd"] * f
+        m["wall_ms"] += t["wall_ms"] * f
+        m["sample_wall_ms"] += t["wall_ms"]
+    if not per_model:
+        print("⚠ 표본 실행의 telemetry 가 없어 전체 실행을 추정할 수 없음 (LLM_TELEMETRY=0?)")
+        return
+
+    sample_wall = sum(m["sample_wall_ms"] for m in per_model.values())
+    time_scale = sum(m["wall_ms"] for m in per_model.values()) / max(1.0, sample_wall)
+    records = []
+    for model, m in sorted(per_model.items()):
+        budget = budgets.get(model, {})
+        # 모델 하나가 낼 수 있는 속도의 한계: 동시 요청 수 / 분당 요청 / 분당 토큰
+        bounds = [m["wall_ms"] / 1000 / (budget.get("concurrency") or DEFAULT_BUDGET["concurrency"])]
+        if budget.get("rpm"):
+            bounds.append(m["requests"] / budget["rpm"] * 60)
+        if budget.get("tpm"):
+            bounds.append(m["tokens"] / budget["tpm"] * 60)
+        records.append({"model": model, "sample_calls": m["sample_calls"], "projected_calls": round(m["calls"]),
+                        "projected_tokens": round(m["tokens"]), "projected_cost_usd": round(m["cost"], 2),
+                        "projected_hours": round(max(bounds) / 3600, 2)})
+
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=PROJECTION_FIELDS)
+        writer.writeheader()
+        writer.writerows(records)
+
+    hours = max(elapsed * time_scale / 3600, max(r["projected_hours"] for r in records))
+    print("\n🔭 전체 실행 추정 (표본 → 전체):")
+    for r in records:
+        print(f"  {r['model']:<22} 호출 {r['sample_calls']} → {r['projected_calls']}회, 토큰 {r['projected_tokens']}, "
+              f"≈ ${r['projected_cost_usd']:.2f}, 한도 기준 {r['projected_hours']:.2f}시간")
+    print(f"  합계 ≈ ${sum(r['projected_cost_usd'] for r in records):.2f}, 약 {hours:.1f}시간 "
+          f"(표본 {elapsed / 60:.1f}분 × {time_scale:.1f}) → {path}")
+    if any(m["hits"] for m in per_model.values()):
+        print("  ⚠ 응답 캐시 hit 이 있어 비용이 적게 추정됨 — 정확한 추정은 LLM_CACHE=0 으로 실행")
+
+
+#############################################
+# 생성 프로필 비교 — 같은 고정 표본을 프로필마다 실행해 정확도 / 지연 / 토큰 비교
+#############################################
+def _telemetry_delta(before, after, prefix):
+    """작업 이름이 prefix 로 시작하는 telemetry 합계의 (after - before) → (모델, 합계)"""
+    fields = ("calls", "hits", "wall_ms", "output_tokens", "thinking_tokens", "cost_usd")
+    delta = dict.fromkeys(fields, 0)
+    model = None
+    for key, t in after.items():
+        if not (key[2] or "").startswith(prefix):
+            continue
+        model = key[1]
+        old = before.get(key, {})
+        for f in fields:
+            delta[f] += t[f] - old.get(f, 0)
+    return model, delta
+
+
+def profile_records(profile, outputs, before, after, elapsed):
+    """프로필 한 번 실행 → 평가자 / 데이터셋 / 지표별 행 (방언을 합친 정확도) + 번역 작업 행 (지연만)"""
+    groups = defaultdict(list)
+    for name, path in outputs.items():
+        _, key, dataset, _ = name.split(":")
+        groups[key, dataset].append(path)
+
+    records = []
+    base = {"profile": profile, "elapsed_s": round(elapsed, 1)}
+    for (key, dataset), paths in sorted(groups.items()):
+        model, t = _telemetry_delta(before, after, f"evaluate:{key}:{dataset}:")
+        usage = {"model": model, "calls": t["calls"], "hits": t["hits"],
+                 "mean_latency_ms": round(t["wall_ms"] / t["calls"]) if t["calls"] else None,
+                 "output_tokens": t["output_tokens"], "thinking_tokens": t["thinking_tokens"],
+                 "cost_usd": round(t["cost_usd"], 4)}
+        pooled = defaultdict(lambda: [0, 0, 0])
+        for path in paths:
+            if not os.path.exists(path):
+                continue
+            for record, correct, invalid in rescore_file(path):
+                p = pooled[record["metric"]]
+                p[0] += len(correct)
+                p[1] += int(correct[~invalid].sum())
+                p[2] += int(invalid.sum())
+        for metric, (n, c, bad) in sorted(pooled.items()):
+            records.append(dict(base, task=key, dataset=dataset, metric=metric, n=n,
+                                accuracy=round(c / (n - bad), 4) if n > bad else None,
+                                invalid_rate=round(bad / n, 4) if n else None, **usage))
+        if not pooled:
+            records.append(dict(base, task=key, dataset=dataset, **usage))
+
+    for key in sorted({k[2] for k in after if (k[2] or "").startswith("translate:")}):
+        model, t = _telemetry_delta(before, after, key)
+        if t["calls"]:
+            records.append(dict(base, task="translate", dataset=task_dataset(key), model=model, calls=t["calls"],
+                                hits=t["hits"], mean_latency_ms=round(t["wall_ms"] / t["calls"]),
+                                output_tokens=t["output_tokens"], thinking_tokens=t["thinking_tokens"],
+                                cost_usd=round(t["cost_usd"], 4)))
+    return records
+
+
+def compare_profiles(spec, profiles, path, scripts=None):
+    """
+    프로필마다 workdir/profiles/<프로필>/ 에 같은 계획을 실행 (결과 파일 / 이어쓰기가 섞이지 않음).
+    응답 캐시 키에 생성 설정이 들어가므로 프로필끼리 캐시 응답을 공유하지 않음
+    """
+    workdir = spec_path(spec.get("workdir", "runs"))
+    previous = active_profile()
+    records = []
+    try:
+        for profile in profiles:
+            set_profile(profile)
+            outputs = {}
+            tasks, budgets = build_plan(dict(spec, workdir=os.path.join(workdir, "profiles", profile)), scripts,
+                                        outputs=outputs)
+            print(f"\n🎛️ 생성 프로필 {profile}: 작업 {len(tasks)}개")
+            before = telemetry_totals()
+            start = time.perf_counter()
+            run_plan(tasks, budgets)
+            elapsed = time.perf_counter() - start
+            records.extend(profile_records(profile, outputs, before, telemetry_totals(), elapsed))
+    finally:
+        set_profile(previous)
+
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=PROFILE_FIELDS, extrasaction="ignore")
+        writer.writeheader()
+        writer.writerows(records)
+
+    # 첫 프로필이 비교 기준 — 같은 (작업, 데이터셋, 지표) 행과의 정확도 / 평균 지연 차이
+    baseline = {(r["task"], r["dataset"], r.get("metric")): r for r in records if r["profile"] == profiles[0]}
+    fmt = lambda v, spec: "-" if v is None else format(v, spec)
+    header = (f"{'profile':<10}{'task':<24}{'dataset':<12}{'metric':<8}{'acc':>8}{'Δacc':>8}{'invalid':>9}"
+              f"{'ms/call':>9}{'Δms':>8}{'thinking':>10}{'output':>9}{'cost':>9}")
+    print("\n🎛️ 생성 프로필 비교 (방언 합산, Δ = 첫 프로필 대비):")
+    print(header)
+    print("-" * len(header))
+    for r in sorted(records, key=lambda r: (r["task"], r["dataset"], r.get("metric") or "", profiles.index(r["profile"]))):
+        b = baseline.get((r["task"], r["dataset"], r.get("metric")), {})
+        d_acc = r.get("accuracy") - b["accuracy"] if r.get("accuracy") is not None and b.get("accuracy") is not None else None
+        d_ms = (r["mean_latency_ms"] - b["mean_latency_ms"]
+                if r.get("mean_latency_ms") is not None and b.get("mean_latency_ms") is not None else None)
+        print(f"{r['profile']:<10}{r['task']:<24}{str(r['dataset']):<12}{r.get('metric') or '-':<8}"
+              f"{fmt(r.get('accuracy'), '.1%'):>8}{fmt(d_acc, '+.1%'):>8}{fmt(r.get('invalid_rate'), '.1%'):>9}"
+              f"{fmt(r.get('mean_latency_ms'), 'd'):>9}{fmt(d_ms, '+d'):>8}{r['thinking_tokens']:>10}"
+              f"{r['output_tokens']:>9}{fmt(r['cost_usd'], '.4f'):>9}")
+    print(f"→ {path}")
+    if any(r["hits"] for r in records):
+        print("⚠ 응답 캐시 hit 이 있어 지연 / 토큰이 실제보다 적게 잡힘 — 정확한 비교는 LLM_CACHE=0 으로 실행")
+
+
+def print_plan(tasks, budgets):
+    for t in tasks:
+        kind = "job" if t.job else "run"
+        if not t.deps:
+            deps = ""
+        else:
+            deps = f"  ← {', '.join(t.deps)}" if len(t.deps) <= 2 else f"  ← 작업 {len(t.deps)}개"
+        print(f"  [{kind}] {t.name:<52} {t.model or '-':<22}{deps}")
+    print("\n모델별 예산:")
+    for model in sorted({t.model for t in tasks if t.model}):
+        print(f"  {model:<22} {budgets.get(model, '(기본값)')}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="실행 명세(run_spec.json) → 번역 / 평가 / 요약 작업 그래프 실행")
+    parser.add_argument("--spec", default=SPEC_PATH)
+    parser.add_argument("--stages", default=None, help="명세의 stages 덮어쓰기 (예: evaluate,summarize)")
+    parser.add_argument("--dry-run", action="store_true", help="작업 그래프만 출력")
+    parser.add_argument("--subset", type=int, default=None,
+                        help="데이터셋마다 N 행 층화 표본으로 전체 경로 smoke test + 전체 실행 시간 / 비용 추정")
+    parser.add_argument("--adaptive", action="store_true",
+                        help="순차 적응 샘플링 — 방언 정확도가 통계적으로 정해지면 그 흐름의 남은 행은 평가하지 않음")
+    parser.add_argument("--profile", default=None, choices=list(GENERATION_PROFILES),
+                        help="작업별 생성 프로필 (사고 예산 / 최대 출력 토큰 / stop) — 명세의 generation_profile 덮어쓰기")
+    parser.add_argument("--compare-profiles", default=None,
+                        help="쉼표로 나눈 프로필들을 --subset 고정 표본에서 하나씩 실행해 정확도 / 지연 비교 (예: default,lean)")
+    args = parser.parse_args()
+
+    spec = load_spec(args.spec)
+    if args.stages:
+        spec["stages"] = [s.strip() for s in args.stages.split(",") if s.strip()]
+        unknown = [s for s in spec["stages"] if s not in STAGES]
+        if unknown:
+            parser.error(f"알 수 없는 단계: {', '.join(unknown)}")
+
+    if args.adaptive:
+        spec["sampling"] = dict(spec.get("sampling") or {}, enabled=True)
+
+    if args.subset:
+        spec["subset"] = dict(spec.get("subset") or {}, rows=args.subset)
+
+    set_profile(args.profile or spec.get("generation_profile") or active_profile())
+    if args.compare_profiles:
+        profiles = [p.strip() for p in args.compare_profiles.split(",") if p.strip()]
+        unknown = [p for p in profiles if p not in GENERATION_PROFILES]
+        if unknown:
+            parser.error(f"알 수 없는 생성 프로필: {', '.join(unknown)}")
+        if not subset_config(spec):
+            parser.error("--compare-profiles 는 고정 표본이 필요함 — --subset N 과 함께 실행")
+        if args.dry_run:
+            print(f"🎛️ 생성 프로필 {', '.join(profiles)} × 표본 {spec['subset']['rows']}행")
+            return
+        compare_profiles(spec, profiles, os.path.join(spec_path(spec.get("workdir", "runs")), "profile_comparison.csv"))
+        print_cache_stats()
+        print_structured_stats()
+        print_logprob_stats()
+        return
+
+    monitors = []
+    subsets = {}
+    tasks, budgets = build_plan(spec, monitors=monitors, subsets=subsets, dry_run=args.dry_run)
+    for dataset, (n, total) in subsets.items():
+        print(f"🧪 {dataset}: 층화 표본 {n}/{total}행")
+    print(f"🗺️ 작업 {len(tasks)}개 ({args.spec}, 생성 프로필 {active_profile()})")
+    print_plan(tasks, budgets)
+    if args.dry_run:
+        return
+
+    start = time.perf_counter()
+    status = run_plan(tasks, budgets)
+    elapsed = time.perf_counter() - start
+    print_cache_stats()
+    print_controller_stats()
+    print_telemetry_stats()
+    print_cascade_stats()
+    print_structured_stats()
+    print_logprob_stats()
+    if monitors:
+        write_sampling_report(monitors, os.path.join(spec_path(spec.get("workdir", "runs")), "sampling_report.csv"))
+    if subsets:
+        project_full_run(subsets, elapsed, budgets, os.path.join(spec_path(spec.get("workdir", "runs")),
+                                                                 "subset_projection.csv"))
+
+    failed = [name for name, s in status.items() if s != "done"]
+    if failed:
+        print(f"\n⚠ 완료되지 않은 작업 {len(failed)}개:")
+        for name in failed:
+            print(f"  {status[name]:<8} {name}")
+    else:
+        print(f"\n🎉 전체 {len(status)}개 작업 완료")
+
+
+if __name__ == "__main__":
+    profile_main(main, "run_plan")
@@ -0,0 +1,191 @@
+import argparse
+import glob
+import json
+import os
+from collections import defaultdict
+
+import numpy as np
+
+from common.telemetry import EVENT_FIELDS, TELEMETRY_DIR
+
+
+GROUP_FIELDS = ["provider", "model", "job", "prompt", "error", "cache", "status", "hedge"]
+QUANTILES = (0.5, 0.95, 0.99)
+
+
+#############################################
+# 이벤트 로그 읽기 — run 하나 = {run}.{pid}.jsonl 여러 개 (Pool 자식 프로세스 포함)
+#############################################
+def list_runs(directory):
+    runs = {os.path.basename(p).split(".")[0] for p in glob.glob(os.path.join(directory, "*.jsonl"))}
+    return sorted(runs)
+
+
+def load_events(directory, run):
+    events = []
+    for path in sorted(glob.glob(os.path.join(directory, f"{run}.*.jsonl"))):
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    events.append(json.loads(line))
+                except json.JSONDecodeError:
+                    # 강제 종료로 마지막 줄이 잘린 경우
+                    continue
+    return events
+
+
+def summarize(events, by):
+    """by 필드 조합별 집계 → [(키 dict, 요약 dict)] (총 소요 시간 큰 순)"""
+    groups = defaultdict(list)
+    for e in events:
+        groups[tuple(e.get(f) for f in by)].append(e)
+
+    rows = []
+    for key, group in groups.items():
+        # hedge 로 진 요청 (hedge="discarded") 은 토큰 / 비용에만 — 호출 수 / 지연은 호출한 쪽 이벤트로
+        calls = [e for e in group if e.get("hedge") != "discarded"] or group
+        wall = np.array([e["wall_ms"] for e in calls if e.get("wall_ms") is not None], dtype=float)
+        real = [e for e in calls if e.get("cache") != "hit"]
+        ttfb = np.array([e["ttfb_ms"] for e in real if e.get("ttfb_ms") is not None], dtype=float)
+        total = lambda field: sum(e.get(field) or 0 for e in group)
+        rows.append((dict(zip(by, key)), {
+            "calls": len(calls),
+            "hit_rate": sum(e.get("cache") == "hit" for e in calls) / len(calls),
+            "errors": sum(e.get("status") == "error" for e in calls),
+            "retries": sum(e.get("retries") or 0 for e in calls),
+            "wall_s": float(wall.sum()) / 1000,
+            "p50_ms": float(np.percentile(wall, 50)) if len(wall) else None,
+            "p95_ms": float(np.percentile(wall, 95)) if len(wall) else None,
+            "p99_ms": float(np.percentile(wall, 99)) if len(wall) else None,
+            "hedged": sum(e.get("hedge") in ("sent", "won") for e in group),
+            "ttfb_p50_ms": float(np.percentile(ttfb, 50)) if len(ttfb) else None,
+            "prompt_tokens": total("prompt_tokens"),
+            "output_tokens": total("output_tokens"),
+            "thinking_tokens": total("thinking_tokens"),
+            "cached_tokens": total("cached_tokens"),
+            "cost_usd": total("cost_usd"),
+            "saved_usd": total("saved_usd"),
+        }))
+    return sorted(rows, key=lambda r: -r[1]["wall_s"])
+
+
+def print_summary(rows, by):
+    def fmt(v, spec):
+        return "-" if v is None else format(v, spec)
+
+    header = "".join(f"{f:<28}" for f in by) + f"{'calls':>7}{'hit%':>7}{'err':>6}{'retry':>7}" \
+             f"{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'hedge':>7}{'ttfb':>8}{'in tok':>10}{'cached':>10}{'out tok':>10}{'think':>9}{'USD':>10}{'saved':>9}"
+    print(header)
+    print("-" * len(header))
+    for key, s in rows:
+        print("".join(f"{str(key[f])[:27]:<28}" for f in by)
+              + f"{s['calls']:>7}{s['hit_rate']:>7.0%}{s['errors']:>6}{s['retries']:>7}"
+              + f"{fmt(s['p50_ms'], '.0f'):>9}{fmt(s['p95_ms'], '.0f'):>9}{fmt(s['p99_ms'], '.0f'):>9}{s['hedged']:>7}"
+              + f"{fmt(s['ttfb_p50_ms'], '.0f'):>8}"
+              + f"{s['prompt_tokens']:>10}{s['cached_tokens']:>10}{s['output_tokens']:>10}{s['thinking_tokens']:>9}"
+              + f"{s['cost_usd']:>10.4f}{s['saved_usd']:>9.4f}")
+
+
+#############################################
+# Prometheus textfile (node_exporter textfile collector 형식)
+#############################################
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(**labels):
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in labels.items() if v is not None) + "}"
+
+
+def prometheus_text(events, run):
+    counters = defaultdict(float)
+    durations = defaultdict(list)
+    ttfbs = defaultdict(list)
+    for e in events:
+        base = {"run": run, "provider": e.get("provider"), "model": e.get("model"), "job": e.get("job")}
+        key = tuple(base.items())
+        if e.get("hedge"):
+            counters["llm_hedged_requests_total", tuple(dict(base, outcome=e["hedge"]).items())] += 1
+        for kind in ("prompt", "output", "thinking", "cached"):
+            counters["llm_tokens_total", tuple(dict(base, kind=kind).items())] += e.get(f"{kind}_tokens") or 0
+        counters["llm_cost_usd_total", key] += e.get("cost_usd") or 0.0
+        if e.get("hedge") == "discarded":
+            # 버린 중복 응답은 비용만 (호출 / 지연은 호출한 쪽 이벤트에)
+            counters["llm_hedge_discarded_usd_total", key] += e.get("cost_usd") or 0.0
+            continue
+        counters["llm_requests_total", tuple(dict(base, cache=e.get("cache"), status=e.get("status"),
+                                                  error=e.get("error")).items())] += 1
+        counters["llm_retries_total", key] += e.get("retries") or 0
+        counters["llm_cache_saved_usd_total", key] += e.get("saved_usd") or 0.0
+        if e.get("wall_ms") is not None:
+            durations[key].append(e["wall_ms"] / 1000)
+        if e.get("ttfb_ms") is not None:
+            ttfbs[key].append(e["ttfb_ms"] / 1000)
+
+    lines = []
+    for name, kind, help_text in [
+        ("llm_requests_total", "counter", "LLM 호출 수 (캐시 hit 포함)"),
+        ("llm_retries_total", "counter", "429 / 일시 오류 재시도 수"),
+        ("llm_hedged_requests_total", "counter",
+         "p95 를 넘겨 중복 요청을 보낸 호출 수 (outcome=won: 중복 응답 채택, discarded: 진 쪽 요청)"),
+        ("llm_hedge_discarded_usd_total", "counter", "hedge 로 진 요청의 비용 (USD, llm_cost_usd_total 에 포함)"),
+        ("llm_tokens_total", "counter", "usage metadata 토큰 수"),
+        ("llm_cost_usd_total", "counter", "예상 비용 (USD)"),
+        ("llm_cache_saved_usd_total", "counter", "캐시된 입력 토큰으로 아낀 비용 (USD)"),
+    ]:
+        lines += [f"# HELP {name} {help_text}", f"# TYPE {name} {kind}"]
+        for (metric, labels), value in sorted(counters.items(), key=lambda kv: str(kv[0])):
+            if metric == name:
+                lines.append(f"{name}{_labels(**dict(labels))} {value:g}")
+
+    for name, series, help_text in [("llm_request_duration_seconds", durations, "캐시 / 재시도 포함 호출 시간"),
+                                    ("llm_ttfb_seconds", ttfbs, "요청 후 첫 응답 바이트까지 시간")]:
+        lines += [f"# HELP {name} {help_text}", f"# TYPE {name} summary"]
+        for key, values in sorted(series.items(), key=lambda kv: str(kv[0])):
+            labels = dict(key)
+            for q in QUANTILES:
+                lines.append(f"{name}{_labels(**labels, quantile=q)} {np.quantile(values, q):.6f}")
+            lines.append(f"{name}_sum{_labels(**labels)} {sum(values):.6f}")
+            lines.append(f"{name}_count{_labels(**labels)} {len(values)}")
+    return "\n".join(lines) + "\n"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="LLM 호출 telemetry 이벤트 로그(JSONL) 집계 + Prometheus textfile 작성")
+    parser.add_argument("--dir", default=TELEMETRY_DIR)
+    parser.add_argument("--run", default=None, help="run id (기본: 가장 최근 run)")
+    parser.add_argument("--by", default="model,job", help=f"묶을 필드 ({', '.join(GROUP_FIELDS)})")
+    parser.add_argument("--prom", default=None, help="Prometheus textfile 경로 (기본: <dir>/<run>.prom)")
+    parser.add_argument("--list", action="store_true", help="기록된 run id 목록")
+    args = parser.parse_args()
+
+    runs = list_runs(args.dir)
+    if args.list:
+        print("\n".join(runs) or "(기록 없음)")
+        return
+    if not runs:
+        parser.error(f"{args.dir} 에 이벤트 로그가 없음")
+    run = args.run or runs[-1]
+    by = [f.strip() for f in args.by.split(",") if f.strip()]
+    unknown = [f for f in by if f not in EVENT_FIELDS]
+    if unknown:
+        parser.error(f"알 수 없는 필드: {', '.join(unknown)}")
+
+    events = load_events(args.dir, run)
+    if not events:
+        parser.error(f"run {run} 의 이벤트가 없음")
+
+    print(f"🧾 run {run}: 이벤트 {len(events)}개\n")
+    print_summary(summarize(events, by), by)
+
+    prom = args.prom or os.path.join(args.dir, f"{run}.prom")
+    with open(prom, "w", encoding="utf-8") as f:
+        f.write(prometheus_text(events, run))
+    print(f"\n📡 Prometheus textfile → {prom}")
+
+
+if __name__ == "__main__":
+    main()
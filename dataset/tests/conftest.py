@@ -0,0 +1,13 @@
+import os
+import sys
+import tempfile
+
+# 스크립트들과 같은 방식으로 dataset/ 를 import 경로에 (common.*, run_plan, rescore ...)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# 응답 캐시 / telemetry 는 저장소 밖 임시 디렉터리에, 스크립트가 import 시점에 만드는 클라이언트에는 더미 키 (모듈 import 전에 설정)
+_scratch = tempfile.mkdtemp(prefix="dialect-tests-")
+os.environ.setdefault("LLM_CACHE_PATH", os.path.join(_scratch, "llm_cache.sqlite"))
+os.environ.setdefault("LLM_TELEMETRY_DIR", os.path.join(_scratch, "telemetry"))
+os.environ.setdefault("GOOGLE_API_KEY", "mock")
+os.environ.setdefault("OPENAI_API_KEY", "mock")
@@ -0,0 +1,91 @@
+import time
+
+import pytest
+
+from common import adaptive, llm
+from common.adaptive import AIMDController, classify_error
+from common.llm import openai_chat
+from mock_llm_server import MockLLMServer, openai_client
+
+
+class APIError(Exception):
+    def __init__(self, status_code, message=""):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+class ResourceExhausted(Exception):
+    pass
+
+
+def test_classify_error():
+    assert classify_error(APIError(429)) == ("throttle", None)
+    assert classify_error(ResourceExhausted("quota, retryDelay: '12s'")) == ("throttle", 12.0)
+    assert classify_error(APIError(502)) == ("transient", None)
+    assert classify_error(APIError(400)) == (None, None)
+    assert classify_error(ValueError("bad")) == (None, None)
+
+
+def test_additive_increase_multiplicative_decrease():
+    controller = AIMDController("test", initial=4, cooldown=0)
+    for _ in range(4):
+        controller.on_success(1.0)
+    # 한도만큼 성공하면 약 +1
+    assert 4.9 < controller.limit < 5.0
+
+    controller.on_error("throttle", retry_after=0)
+    assert 2.4 < controller.limit < 2.5
+    # 같은 왕복 시간 (평균 응답 1초) 안에 연달아 온 429 는 한 번만 줄임
+    controller.on_error("throttle", retry_after=0)
+    assert 2.4 < controller.limit < 2.5
+    assert controller.counters["cuts"] == 1 and controller.counters["throttle"] == 2
+
+
+def test_limit_never_drops_below_min():
+    controller = AIMDController("test", initial=1)
+    controller.on_error("throttle", retry_after=0)
+    assert controller.limit == 1
+
+
+def test_retry_after_pauses_new_requests():
+    controller = AIMDController("test", initial=4)
+    controller.on_error("transient", retry_after=0.2)
+    assert not controller.try_slot()
+
+    start = time.monotonic()
+    with controller.slot():
+        assert time.monotonic() - start >= 0.15
+
+
+def test_call_retries_throttles_and_passes_other_errors_through():
+    controller = AIMDController("test", cooldown=0)
+    attempts = []
+
+    def flaky():
+        attempts.append(1)
+        if len(attempts) < 3:
+            raise APIError(429)
+        return "ok"
+
+    assert controller.call(flaky) == "ok" and len(attempts) == 3
+    with pytest.raises(APIError):
+        controller.call(lambda: (_ for _ in ()).throw(APIError(400)))
+    assert controller.counters["failed"] == 1
+    with pytest.raises(APIError):
+        controller.call(lambda: (_ for _ in ()).throw(APIError(503)), max_retries=2)
+    assert controller.inflight == 0
+
+
+def test_provider_calls_back_off_and_recover_on_mock_429s(monkeypatch):
+    monkeypatch.setattr(llm, "CACHE_ENABLED", False)
+    adaptive.reset_controllers()
+    with MockLLMServer(latency_ms=1, latency_sigma=0, rate_limit_rate=0.5, retry_after=0) as server:
+        client = openai_client(server.url, max_retries=0)
+        answers = [openai_chat(client, "gpt-4.1-mini", "Answer.", f"q{i}", max_retries=20) for i in range(10)]
+        stats = server.stats()
+
+    assert all(answers)
+    assert stats["ok"] == 10 and stats["rate_limited"] > 0
+    controller = adaptive.controller_for("gpt-4.1-mini")
+    assert controller.counters["throttle"] == stats["rate_limited"] and controller.counters["cuts"] >= 1
+    adaptive.reset_controllers()
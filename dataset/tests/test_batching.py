@@ -0,0 +1,79 @@
+import json
+
+from common.batching import answer_batch, chunk, parse_json_array
+
+
+def parse_label(obj):
+    label = obj.get("label")
+    return label if label in ("entailment", "neutral", "contradiction") else None
+
+
+def items(n):
+    return [(str(i), f"payload {i}") for i in range(n)]
+
+
+def test_chunk_and_parse_json_array():
+    assert chunk(range(5), 2) == [[0, 1], [2, 3], [4]]
+    assert parse_json_array('설명\n```json\n[{"id": "0"}]\n```') == [{"id": "0"}]
+    assert parse_json_array('{"id": "0"}') is None
+    assert parse_json_array(None) is None
+
+
+def test_one_call_when_every_row_is_answered():
+    calls = []
+
+    def call_batch(batch):
+        calls.append([row_id for row_id, _ in batch])
+        return json.dumps([{"id": row_id, "label": "neutral"} for row_id, _ in batch])
+
+    stats = {}
+    answers = answer_batch(items(4), call_batch, parse_label, lambda *_: "fallback", stats)
+
+    assert answers == {str(i): "neutral" for i in range(4)}
+    assert calls == [["0", "1", "2", "3"]]
+    assert stats == {"calls": 1}
+
+
+def test_missing_and_malformed_rows_are_split_and_retried():
+    calls = []
+
+    def call_batch(batch):
+        ids = [row_id for row_id, _ in batch]
+        calls.append(ids)
+        if len(batch) == 4:
+            # 1 은 빠지고 2 는 형식 오류 — 나머지는 그대로 사용
+            return json.dumps([{"id": "0", "label": "neutral"}, {"id": "2", "label": "maybe"},
+                               {"id": 3, "label": "entailment"}])
+        return json.dumps([{"id": row_id, "label": "contradiction"} for row_id in ids])
+
+    stats = {}
+    answers = answer_batch(items(4), call_batch, parse_label, lambda *_: "fallback", stats)
+
+    assert answers == {"0": "neutral", "1": "contradiction", "2": "contradiction", "3": "entailment"}
+    assert calls == [["0", "1", "2", "3"], ["1"], ["2"]]
+    assert stats == {"calls": 3, "retried_rows": 2}
+
+
+def test_single_row_falls_back_after_failed_batch():
+    fallbacks = []
+
+    def call_batch(batch):
+        raise RuntimeError("ERROR_API")
+
+    def fallback(row_id, payload):
+        fallbacks.append((row_id, payload))
+        return "single"
+
+    stats = {}
+    answers = answer_batch(items(2), call_batch, parse_label, fallback, stats)
+
+    assert answers == {"0": "single", "1": "single"}
+    assert fallbacks == items(2)
+    assert stats == {"calls": 3, "retried_rows": 2, "fallback": 2}
+
+
+def test_validated_list_from_structured_call_is_used_as_is():
+    def call_batch(batch):
+        return [{"id": row_id, "label": "entailment"} for row_id, _ in batch]
+
+    assert answer_batch(items(3), call_batch, parse_label, lambda *_: None) == {str(i): "entailment" for i in range(3)}
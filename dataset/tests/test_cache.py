@@ -0,0 +1,66 @@
+import itertools
+
+import pytest
+
+from common import cache as cache_module
+from common import llm
+from common.cache import ResponseCache, make_key
+from common.llm import gemini_generate
+from mock_llm_server import MockLLMServer, gemini_client
+
+
+@pytest.fixture
+def ticking(monkeypatch):
+    # last_used 가 호출 순서대로 증가하도록 (같은 시각이면 LRU 순서가 정해지지 않음)
+    counter = itertools.count(1)
+    monkeypatch.setattr(cache_module.time, "time", lambda: float(next(counter)))
+
+
+def test_key_covers_every_part_of_the_request():
+    base = ("gemini", "gemini-2.5-pro", "system", "user", {"temperature": 0, "max_output_tokens": 64})
+    key = make_key(*base)
+
+    assert key == make_key("gemini", "gemini-2.5-pro", "system", "user", {"max_output_tokens": 64, "temperature": 0})
+    for i, changed in enumerate(["openai", "gemini-3.0-pro", "other system", "other user", {"temperature": 1}]):
+        assert make_key(*base[:i], changed, *base[i + 1:]) != key
+    # system 없음 / 빈 system 은 같은 요청
+    assert make_key("gemini", "m", None, "u") == make_key("gemini", "m", "", "u")
+
+
+def test_entries_survive_reopening_and_count_hits(tmp_path):
+    path = str(tmp_path / "cache.sqlite")
+    ResponseCache(path).put("k", "응답")
+
+    cache = ResponseCache(path)
+    assert cache.get("k") == "응답"
+    assert cache.get("missing") is None
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["entries"]) == (1, 1, 1)
+    assert stats["bytes"] == len("응답".encode("utf-8"))
+
+
+def test_evicts_least_recently_used_down_to_ninety_percent(tmp_path, ticking):
+    cache = ResponseCache(str(tmp_path / "cache.sqlite"), max_bytes=30)
+    for key in "abc":
+        cache.put(key, key * 10)
+    cache.get("a")
+
+    # 40 바이트 > 30 → 27 바이트 이하가 될 때까지 오래 안 쓴 b, c 삭제 (방금 읽은 a 는 남음)
+    cache.put("d", "d" * 10)
+
+    assert [k for k in "abcd" if cache.get(k) is not None] == ["a", "d"]
+    assert cache.stats()["bytes"] == 20
+
+
+def test_provider_calls_read_the_cache_instead_of_the_api(tmp_path, monkeypatch):
+    monkeypatch.setattr(llm, "CACHE_ENABLED", True)
+    monkeypatch.setattr(llm, "_cache", ResponseCache(str(tmp_path / "cache.sqlite")))
+    with MockLLMServer(latency_ms=1, latency_sigma=0, mode="fixed", fixed_text="neutral") as server:
+        client = gemini_client(server.url)
+        first = gemini_generate(client, "gemini-3.0-pro", "premise / hypothesis", "Answer one word.")
+        second = gemini_generate(client, "gemini-3.0-pro", "premise / hypothesis", "Answer one word.")
+        gemini_generate(client, "gemini-3.0-pro", "premise / hypothesis", "Answer one word.", use_cache=False)
+
+        assert first == second == "neutral"
+        # 두 번째는 캐시, use_cache=False 는 캐시를 건너뜀
+        assert server.stats()["requests"] == 2
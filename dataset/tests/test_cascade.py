@@ -0,0 +1,65 @@
+import pytest
+
+from common import cascade
+from common.cascade import DECIDED_BY, cascade_rows, sample_params
+
+
+MODEL = "gemini-2.5-pro"
+CHEAP = "gemini-2.5-flash"
+
+# 행 번호 → 싼 모델의 투표별 답 (None = UNKNOWN / 파싱 실패)
+CHEAP_ANSWERS = {0: ["A", "A"], 1: [None, None], 2: ["A", "B"], 3: ["C", "C"]}
+
+
+@pytest.fixture(autouse=True)
+def isolated_stats(monkeypatch):
+    monkeypatch.setattr(cascade, "_stats", {})
+
+
+class Evaluator:
+    """(모델, 투표 번호, 행 번호) 호출을 기록하고 행에 answer 를 채워 돌려줌 (원본 행 dict 를 직접 수정)"""
+
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, model, items, sample):
+        for key, row in items:
+            self.calls.append((model, sample, key))
+            row["answer"] = CHEAP_ANSWERS[key][sample] if model == CHEAP else "pro"
+        return [row for _, row in items]
+
+
+def test_only_unsure_or_inconsistent_rows_are_escalated():
+    rows = [{"question": f"q{i}"} for i in CHEAP_ANSWERS]
+    items = list(enumerate(rows))
+    evaluate = Evaluator()
+
+    results = cascade_rows(items, evaluate, lambda row: row["answer"], MODEL, votes=2)
+
+    assert [r["answer"] for r in results] == ["A", "pro", "pro", "C"]
+    assert [r[DECIDED_BY] for r in results] == [CHEAP, MODEL, MODEL, CHEAP]
+    # 두 번째 투표는 첫 답이 UNKNOWN 인 행에는 묻지 않고, 원래 모델은 승급한 행에만
+    assert [c for c in evaluate.calls if c[1] == 1] == [(CHEAP, 1, 0), (CHEAP, 1, 2), (CHEAP, 1, 3)]
+    assert [c for c in evaluate.calls if c[0] == MODEL] == [(MODEL, 0, 1), (MODEL, 0, 2)]
+    # 투표 / 승급마다 복사본을 넘기므로 원본 행은 그대로
+    assert all(set(row) == {"question"} for row in rows)
+    assert cascade._stats[(CHEAP, MODEL)] == {"rows": 4, "escalated": 2, "unsure": 1}
+
+
+def test_model_without_cheap_tier_is_evaluated_once():
+    evaluate = Evaluator()
+
+    results = cascade_rows([(0, {"question": "q"})], evaluate, lambda row: row["answer"], "gpt-4.1-mini")
+
+    assert evaluate.calls == [("gpt-4.1-mini", 0, 0)]
+    assert results[0][DECIDED_BY] == "gpt-4.1-mini"
+    assert cascade._stats == {}
+
+
+def test_votes_differ_only_in_sampling_params():
+    base = {"temperature": 0.0}
+    assert sample_params(0, CHEAP, base) == base
+    assert sample_params(1, CHEAP, base) == {"temperature": 1.0, "seed": 1}
+    assert sample_params(2, CHEAP, base) != sample_params(1, CHEAP, base)
+    # sampling 인자를 거부하는 reasoning 모델에는 보내지 않음
+    assert sample_params(1, "gpt-5-mini", base) == {}
@@ -0,0 +1,64 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from common import llm
+from common.llm import ContextCaches, gemini_generate, layout_prompt
+from mock_llm_server import MockLLMServer, gemini_client
+
+
+MODEL = "gemini-2.5-pro"
+LONG_SYSTEM = "다음 문장을 제주 방언으로 번역하세요. " * 40
+SHORT_SYSTEM = "번역하세요."
+
+
+@pytest.fixture
+def caches(monkeypatch):
+    # 테스트마다 새 handle 목록, 모의 서버와 같은 최소 길이
+    caches = ContextCaches()
+    monkeypatch.setattr(llm, "context_caches", caches)
+    monkeypatch.setattr(llm, "CONTEXT_CACHE_MIN_TOKENS", 64)
+    monkeypatch.setattr(llm, "CACHE_ENABLED", False)
+    with MockLLMServer(latency_ms=1, latency_sigma=0, mode="fixed", fixed_text="번역", cache_min_tokens=64) as server:
+        yield server, caches
+
+
+def test_layout_keeps_instructions_in_front(monkeypatch):
+    assert layout_prompt("지시문", "문장") == ("지시문", "문장")
+    # inline 은 예전 요청과 바이트 단위로 같은 형태
+    monkeypatch.setattr(llm, "PROMPT_LAYOUT", "inline")
+    assert layout_prompt("지시문", "문장") == (None, "지시문\n\n문장")
+
+
+def test_context_cache_is_created_once_per_task_and_reused(caches):
+    server, caches = caches
+    client = gemini_client(server.url)
+    generate = lambda i: gemini_generate(client, MODEL, f"문장 {i}", system_instruction=LONG_SYSTEM,
+                                         prefix_cache=("translate", "Jeju"))
+
+    with ThreadPoolExecutor(4) as pool:
+        assert list(pool.map(generate, range(8))) == ["번역"] * 8
+
+    stats = server.stats()
+    assert stats["cache_creates"] == caches.created == 1
+    assert caches.active() == 1
+    # 모든 요청이 캐시된 지시문을 참조
+    assert stats["cached_tokens"] > 0 and stats["bad_requests"] == 0
+
+    # 다른 방언은 handle 을 따로 만듦
+    gemini_generate(client, MODEL, "문장", system_instruction=LONG_SYSTEM, prefix_cache=("translate", "Gyeongsang"))
+    assert server.stats()["cache_creates"] == caches.created == 2
+
+
+def test_short_instructions_are_sent_without_context_cache(caches):
+    server, caches = caches
+    client = gemini_client(server.url)
+
+    for i in range(3):
+        gemini_generate(client, MODEL, f"문장 {i}", system_instruction=SHORT_SYSTEM, prefix_cache=("translate", "Jeju"))
+
+    stats = server.stats()
+    # 너무 짧은 지시문은 생성을 시도하지도 않고, 그 결정을 기억함
+    assert stats["cache_creates"] == caches.created == caches.active() == 0
+    assert (stats["requests"], stats["cached_tokens"]) == (3, 0)
+    assert len(caches.handles) == 1
@@ -0,0 +1,66 @@
+import os
+import sys
+
+import pytest
+
+import ingest_corpus
+from common import corpus
+from common.corpus import decode_bytes, describe_file, find_table, load_rows, read_csv_rows
+
+
+@pytest.fixture
+def corpus_dir(tmp_path, monkeypatch):
+    """코퍼스 저장소 / manifest 를 tmp_path 아래로"""
+    directory = tmp_path / "corpus"
+    manifest = str(directory / "manifest.json")
+    for module in (corpus, ingest_corpus):
+        monkeypatch.setattr(module, "CORPUS_DIR", str(directory))
+        monkeypatch.setattr(module, "MANIFEST_PATH", manifest)
+    return directory
+
+
+def test_decode_utf8_cp949_and_mixed_lines():
+    assert decode_bytes("﻿제주".encode("utf-8")) == ("제주", "utf-8-sig")
+    assert decode_bytes("경상".encode("cp949")) == ("경상", "cp949")
+    # 줄마다 인코딩이 다른 파일은 줄 단위로 복구
+    text, encoding = decode_bytes("전라\n".encode("utf-8") + "충청\n".encode("cp949"))
+    assert (text, encoding) == ("전라\n충청\n", "mixed")
+
+
+def test_read_csv_rows_drops_unnamed_columns_and_pads_short_rows(tmp_path):
+    path = tmp_path / "mednli_ko.csv"
+    path.write_bytes("gold_label,sentence1_ko,,sentence2_ko\r\nneutral,문장,x\r\n,,,\r\n".encode("cp949"))
+
+    fieldnames, rows = read_csv_rows(str(path))
+
+    assert fieldnames == ["gold_label", "sentence1_ko", "sentence2_ko"]
+    assert rows == [{"gold_label": "neutral", "sentence1_ko": "문장", "sentence2_ko": ""}]
+
+
+def test_describe_file_normalizes_misspelled_dialects():
+    meta = describe_file(os.path.join("gemini", "translation_dataset", "truthfulqa_jeol1lra-gemini-2.5-pro.csv"))
+    assert meta == {"dataset": "truthfulqa", "dialect": "Jeolla", "model": "gemini-2.5-pro",
+                    "stage": "translation", "translator": "gemini-2.5-pro"}
+    meta = describe_file(os.path.join("chatgpt", "hallucination_eval_dataset", "mednli_ko_eval.csv"))
+    assert (meta["dataset"], meta["dialect"], meta["stage"], meta["model"]) == ("mednli", "ko", "hallucination", "gpt-5.1")
+
+
+def test_ingested_table_loads_like_the_csv(tmp_path, corpus_dir, monkeypatch):
+    path = tmp_path / "TruthfulQA_ko.csv"
+    path.write_text("question_ko,mc1_choices_ko,mc1_labels\n질문,\"['가', '나']\",\"[1, 0]\"\n빈 질문,,\n",
+                    encoding="utf-8")
+    expected = load_rows(str(path))
+    monkeypatch.setattr(sys, "argv", ["ingest_corpus.py", str(path)])
+
+    ingest_corpus.main()
+
+    entry = find_table(str(path))
+    assert entry is not None and entry["rows"] == 2 and entry["source_encoding"] == "utf-8-sig"
+    # 리스트 컬럼도 원래 CSV 와 같은 "[...]" 문자열로, 필요한 컬럼만
+    assert load_rows(str(path)) == expected
+    assert load_rows(str(path), ["mc1_labels"]) == (["mc1_labels"], [{"mc1_labels": "[1, 0]"}, {"mc1_labels": ""}])
+
+    # 원본이 바뀌면 (크기 / 수정 시각) 예전 테이블은 쓰지 않음
+    path.write_text("question_ko\n바뀐 질문\n", encoding="utf-8")
+    assert find_table(str(path)) is None
+    assert load_rows(str(path))[1] == [{"question_ko": "바뀐 질문"}]
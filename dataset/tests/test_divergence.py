@@ -0,0 +1,87 @@
+import csv
+from collections import Counter
+
+import numpy as np
+import pytest
+
+from common import divergence
+from common.divergence import CHRF_BETA, CHRF_ORDERS, micro_chrf, pair_divergence
+
+
+KO = [("환자는 어제부터 가슴 통증을 호소했다.", "환자는 통증이 있다."),
+      ("혈압은 정상 범위였다.", "환자는 내일 퇴원한다."),
+      ("산소 포화도가 떨어졌다.", "환자는 숨이 차다.")]
+JEJU = [KO[0],
+        ("혈압은 정상 범위였수다.", "환자는 내일 퇴원햄수다."),
+        ("COPD 악화 소견 없음", "X-ray normal")]
+
+
+@pytest.fixture(autouse=True)
+def isolated_cache(tmp_path, monkeypatch):
+    monkeypatch.setattr(divergence, "DIVERGENCE_DIR", str(tmp_path / "divergence"))
+
+
+def write_pairs(path, dialect, pairs):
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["gold_label", f"sentence1_{dialect}", f"sentence2_{dialect}"])
+        writer.writerows([["neutral", a, b] for a, b in pairs])
+    return str(path)
+
+
+def reference_chrf(ref_cells, hyp_cells):
+    """해시 없이 문자 n-gram 을 직접 세는 chrF (beta=2) — 셀 경계를 넘는 n-gram 은 없음"""
+    def grams(cells, n):
+        counts = Counter()
+        for cell in cells:
+            cell = "".join(cell.split())
+            counts.update(cell[i:i + n] for i in range(len(cell) - n + 1))
+        return counts
+
+    precisions, recalls = [], []
+    for n in range(1, CHRF_ORDERS + 1):
+        ref, hyp = grams(ref_cells, n), grams(hyp_cells, n)
+        if not ref and not hyp:
+            continue
+        overlap = sum((ref & hyp).values())
+        precisions.append(overlap / sum(hyp.values()) if hyp else 0.0)
+        recalls.append(overlap / sum(ref.values()) if ref else 0.0)
+    p, r = np.mean(precisions), np.mean(recalls)
+    b2 = CHRF_BETA ** 2
+    return (1 + b2) * p * r / (b2 * p + r) if p + r else 0.0
+
+
+def test_hashed_distances_match_exact_chrf_and_order_rows(tmp_path):
+    ko = write_pairs(tmp_path / "mednli_ko.csv", "ko", KO)
+    jeju = write_pairs(tmp_path / "mednli_Jeju.csv", "Jeju", JEJU)
+
+    result = pair_divergence(ko, jeju, "mednli")
+
+    for metric in ("cosine", "chrf", "jamo_chrf"):
+        assert result[metric][0] == pytest.approx(0.0, abs=1e-6), metric
+        assert 0 < result[metric][1] < result[metric][2] <= 1, metric
+    for i in range(len(KO)):
+        assert result["chrf"][i] == pytest.approx(1 - reference_chrf(KO[i], JEJU[i]))
+    # 어미의 받침 / 모음만 바뀐 경우 자모 단위로 보면 더 가까움
+    assert result["jamo_chrf"][1] < result["chrf"][1]
+    assert 0 < micro_chrf(result["chrf_totals"]) < 1
+
+
+def test_results_are_cached_per_file_pair(tmp_path):
+    ko = write_pairs(tmp_path / "mednli_ko.csv", "ko", KO)
+    jeju = write_pairs(tmp_path / "mednli_Jeju.csv", "Jeju", JEJU)
+    first = pair_divergence(ko, jeju, "mednli")
+
+    cached = list((tmp_path / "divergence").iterdir())
+    assert len(cached) == 1 and cached[0].suffix == ".npz"
+    second = pair_divergence(ko, jeju, "mednli")
+    assert set(second) == set(first)
+    assert all(np.allclose(second[k], first[k], equal_nan=True) for k in first)
+
+
+def test_row_count_mismatch_is_refused(tmp_path):
+    ko = write_pairs(tmp_path / "mednli_ko.csv", "ko", KO)
+    jeju = write_pairs(tmp_path / "mednli_Jeju.csv", "Jeju", JEJU[:2])
+
+    with pytest.raises(ValueError):
+        pair_divergence(ko, jeju, "mednli", use_cache=False)
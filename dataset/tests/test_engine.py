@@ -0,0 +1,131 @@
+import multiprocessing
+import threading
+import time
+
+import pytest
+
+from common import engine
+from common.engine import (RateLimiter, SharedRateLimiter, TokenBucket, estimate_tokens, install_shared_limiters,
+                           limiter_for, run_ordered)
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(engine.time, "monotonic", clock)
+    return clock
+
+
+#############################################
+# 토큰 버킷
+#############################################
+def test_bucket_bursts_ten_seconds_then_refills_at_the_minute_rate(clock):
+    bucket = TokenBucket(60)
+    # 기본 버스트는 10초 분량 (60 RPM → 10개)
+    assert bucket.capacity == 10
+    assert sum(bucket.try_take() for _ in range(12)) == 10
+
+    clock.now += 2.0
+    assert sum(bucket.try_take() for _ in range(5)) == 2
+
+    # 오래 쉬어도 버킷 크기 이상은 쌓이지 않음
+    clock.now += 600
+    assert sum(bucket.try_take() for _ in range(12)) == 10
+
+
+def test_request_larger_than_bucket_only_waits_for_a_full_bucket(clock):
+    bucket = TokenBucket(600, capacity=50)
+    assert bucket.try_take(10_000)
+    assert not bucket.try_take(1)
+
+
+def test_limiter_gives_the_request_token_back_when_tpm_is_short(clock):
+    limiter = RateLimiter(rpm=60, tpm=600)
+    assert limiter.try_acquire(tokens=100)
+    requests_left = limiter.requests.tokens
+    # TPM 버킷 (10초 분량 = 100) 이 비었으므로 RPM 버킷에서 가져간 요청도 돌려줌
+    assert not limiter.try_acquire(tokens=100)
+    assert limiter.requests.tokens == requests_left
+
+
+def test_estimate_tokens_is_never_zero():
+    assert estimate_tokens("") == 1
+    assert estimate_tokens("가나다라", "마바") == 3
+
+
+#############################################
+# 순서 보장 동시 실행
+#############################################
+def test_results_come_back_in_input_order_with_bounded_concurrency():
+    lock = threading.Lock()
+    running, peak = [0], [0]
+
+    def func(i):
+        with lock:
+            running[0] += 1
+            peak[0] = max(peak[0], running[0])
+        # 앞 항목일수록 늦게 끝남
+        time.sleep(0.02 * (8 - i % 8))
+        with lock:
+            running[0] -= 1
+        return i * 10
+
+    seen = []
+    results = run_ordered(range(16), func, lambda i, item, result: seen.append((i, item, result)), concurrency=4)
+
+    assert results == [i * 10 for i in range(16)]
+    assert seen == [(i, i, i * 10) for i in range(16)]
+    assert peak[0] == 4
+
+
+def test_limiter_paces_calls_after_the_burst():
+    limiter = RateLimiter(rpm=600)
+    limiter.requests = TokenBucket(600, capacity=2)
+    start = time.perf_counter()
+
+    run_ordered(range(5), lambda i: i, concurrency=5, limiter=limiter)
+
+    # 버스트 2개 뒤에는 초당 10개 → 나머지 3개에 0.3초
+    assert time.perf_counter() - start >= 0.25
+
+
+#############################################
+# 프로세스 간 공유 제한기
+#############################################
+def take_shared(n):
+    # Pool 워커 — 설치된 공유 제한기에서 기다리지 않고 가져간 요청 수
+    limiter = limiter_for("gemini-2.5-pro", rpm=60)
+    return sum(limiter.requests.try_take() for _ in range(n))
+
+
+def test_pool_workers_share_one_request_budget(monkeypatch):
+    monkeypatch.setattr(engine, "_shared_limiters", {})
+    limiter = SharedRateLimiter(rpm=60)
+    ctx = multiprocessing.get_context("fork")
+
+    start = time.monotonic()
+    with ctx.Pool(3, initializer=install_shared_limiters, initargs=({"gemini-2.5-pro": limiter},)) as pool:
+        taken = pool.map(take_shared, [10, 10, 10])
+    elapsed = time.monotonic() - start
+
+    # 프로세스마다 10개 (버스트 10초 분량) 를 따로 갖는 것이 아니라 셋이 합쳐서 10개 + 그동안 다시 찬 만큼
+    assert 10 <= sum(taken) <= 10 + int(elapsed) + 1
+    assert sum(taken) < 30
+
+
+def test_limiter_for_falls_back_to_a_local_limiter(monkeypatch):
+    monkeypatch.setattr(engine, "_shared_limiters", {})
+    shared = SharedRateLimiter(rpm=60, tpm=1000)
+    install_shared_limiters({"gpt-5.1": shared})
+
+    assert limiter_for("gpt-5.1", rpm=1) is shared
+    local = limiter_for("gemini-2.5-pro", rpm=60)
+    assert type(local) is RateLimiter and local.requests.rate == 1.0 and local.tokens is None
@@ -0,0 +1,98 @@
+import pytest
+
+from common import llm
+from common.adaptive import reset_controllers
+from common.corpus import load_rows
+from common.generation import GENERATION_PROFILES, active_profile, drop_rejected_sampling, openai_settings, set_profile
+from common.scheduler import run_plan
+from mock_llm_server import MockLLMServer, gemini_client, openai_client
+from run_plan import SPEC_PATH, build_plan, load_script, load_spec
+
+
+SUBSET_ROWS = 4
+
+
+@pytest.fixture(scope="module")
+def server():
+    with MockLLMServer(latency_ms=1, latency_sigma=0) as server:
+        yield server
+
+
+@pytest.fixture(scope="module")
+def judges(server):
+    """실행 명세의 평가 스크립트들 — 클라이언트를 모의 서버로, 속도 제한 / 이어쓰기는 끔"""
+    spec = load_spec(SPEC_PATH)
+    scripts = {}
+    for evaluator in spec["evaluators"].values():
+        module = load_script(evaluator["script"])
+        module.RESUME = False
+        module.RPM = module.TPM = None
+        if evaluator["provider"] == "chatgpt":
+            module.client = openai_client(server.url, max_retries=0)
+        elif hasattr(module, "get_client"):
+            client = gemini_client(server.url)
+            module.get_client = lambda client=client: client
+        else:
+            module.client = gemini_client(server.url)
+        scripts[evaluator["script"]] = module
+    return spec, scripts
+
+
+@pytest.fixture(autouse=True)
+def restore_profile(monkeypatch):
+    monkeypatch.setattr(llm, "CACHE_ENABLED", False)
+    previous = active_profile()
+    yield
+    set_profile(previous)
+
+
+def test_sampling_params_are_dropped_only_when_reasoning_is_on():
+    params = {"temperature": 0.0, "seed": 1, "max_completion_tokens": 64}
+
+    assert drop_rejected_sampling("gpt-5.1", params) == params
+    assert drop_rejected_sampling("gpt-5.1", dict(params, reasoning_effort="none")) == dict(params, reasoning_effort="none")
+    assert drop_rejected_sampling("gpt-5.1", dict(params, reasoning_effort="low")) == \
+           {"max_completion_tokens": 64, "reasoning_effort": "low"}
+    assert drop_rejected_sampling("gpt-5-mini", params) == {"max_completion_tokens": 64}
+    assert drop_rejected_sampling("gpt-4.1-mini", params) == params
+
+
+def test_lean_profile_turns_reasoning_on_for_gpt_5_1():
+    # 이 조합 (reasoning_effort="low" + temperature=0.0) 이 실제 API 에서 400 이던 경우
+    set_profile("lean")
+    assert openai_settings("gpt-5.1", "truthfulqa", {})["reasoning_effort"] == "low"
+
+
+@pytest.mark.parametrize("batch_size", [1, 5])
+@pytest.mark.parametrize("profile", list(GENERATION_PROFILES))
+def test_every_profile_and_judge_model_is_accepted_by_the_mock(server, judges, tmp_path, profile, batch_size):
+    spec, scripts = judges
+    # 묶음 평가는 명세의 평가자별 batch_size 로 켬
+    evaluators = {key: dict(evaluator, batch_size=batch_size) for key, evaluator in spec["evaluators"].items()}
+    set_profile(profile)
+    reset_controllers()
+    server.state.reset()
+
+    outputs = {}
+    tasks, budgets = build_plan(dict(spec, workdir=str(tmp_path), stages=["evaluate"], evaluators=evaluators,
+                                     subset={"rows": SUBSET_ROWS, "seed": 0}), scripts, outputs=outputs)
+    # 모의 서버에는 할당량이 없으므로 RPM / TPM 버킷은 끔 (동시 요청 수만 명세대로)
+    status = run_plan(tasks, {model: dict(budget, rpm=None, tpm=None) for model, budget in budgets.items()})
+
+    assert set(status.values()) == {"done"}
+    assert server.stats()["bad_requests"] == 0
+    models = {spec["evaluators"][name.split(":")[1]]["model"] for name in outputs}
+    assert models == {evaluator["model"] for evaluator in spec["evaluators"].values()}
+    assert {module.BATCH_SIZE for module in scripts.values()} == {batch_size}
+    for name, path in outputs.items():
+        _, rows = load_rows(path)
+        assert len(rows) == SUBSET_ROWS, name
+        errors = [row for row in rows if any(str(v).startswith("ERROR") for v in row.values())]
+        assert not errors, f"{name} ({profile}, batch {batch_size})"
+
+
+def test_scripts_default_to_row_by_row_evaluation(judges):
+    spec, _ = judges
+    for evaluator in spec["evaluators"].values():
+        assert load_script(evaluator["script"]).BATCH_SIZE == 1
+        assert evaluator.get("batch_size", 1) == 1
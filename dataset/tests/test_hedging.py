@@ -0,0 +1,136 @@
+import threading
+import time
+
+import pytest
+
+from common import hedging, telemetry
+from common.adaptive import AIMDController
+from common.hedging import HEDGE_MIN_SAMPLES, Hedger
+from common.telemetry import attempt, record_usage, run_tagged, track
+
+
+MODEL = "gemini-2.5-pro"
+TEMPLATE = "t"
+SLOW_S = 0.4
+
+
+@pytest.fixture(autouse=True)
+def isolated_telemetry(tmp_path, monkeypatch):
+    # 이벤트는 tmp_path 에, 합계는 테스트마다 새로
+    monkeypatch.setattr(telemetry, "TELEMETRY_DIR", str(tmp_path))
+    monkeypatch.setattr(telemetry, "_sink", None)
+    monkeypatch.setattr(telemetry, "_totals", {})
+    monkeypatch.setattr(telemetry, "_hedges", {})
+    monkeypatch.setattr(hedging, "HEDGE_MAX_RATE", 1.0)
+
+
+def warmed_hedger(ms=10):
+    """기준 지연 (p95) 이 ms 인 Hedger"""
+    hedger = Hedger(MODEL)
+    for _ in range(HEDGE_MIN_SAMPLES):
+        hedger.observe(TEMPLATE, ms)
+    return hedger
+
+
+def slow_then_fast(usage=(1000, 100)):
+    """첫 요청만 SLOW_S 초 걸리는 request — 끝난 요청 이름을 finished 에 기록"""
+    lock, calls, finished = threading.Lock(), [], []
+
+    def request():
+        with lock:
+            name = "primary" if not calls else "backup"
+            calls.append(name)
+        attempt()
+        if name == "primary":
+            time.sleep(SLOW_S)
+        record_usage(*usage)
+        finished.append(name)
+        return name
+
+    return request, calls, finished
+
+
+def wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+
+
+def test_no_backup_until_enough_latency_samples():
+    hedger = Hedger(MODEL)
+    request, calls, _ = slow_then_fast()
+
+    assert hedger.call(request, TEMPLATE) == "primary"
+    assert calls == ["primary"] and hedger.hedged == 0
+    assert len(hedger.latencies[TEMPLATE]) == 1
+
+
+def test_backup_wins_and_holds_aimd_slots_until_both_finish():
+    hedger = warmed_hedger()
+    controller = AIMDController("test", initial=4)
+    request, calls, finished = slow_then_fast()
+
+    with controller.slot():
+        result = hedger.call(request, TEMPLATE, controller)
+        assert controller.inflight >= 2
+
+    assert result == "backup"
+    assert calls == ["primary", "backup"] and hedger.hedged == 1
+    # 진 첫 요청은 바깥 slot 을 반납한 뒤에도 끝날 때까지 자리 하나를 차지
+    assert controller.inflight == 1
+    wait_for(lambda: "primary" in finished)
+    wait_for(lambda: controller.inflight == 0)
+
+
+def test_no_backup_without_free_aimd_slot():
+    hedger = warmed_hedger()
+    controller = AIMDController("test", initial=1)
+    request, calls, _ = slow_then_fast()
+
+    with controller.slot():
+        assert hedger.call(request, TEMPLATE, controller) == "primary"
+
+    assert calls == ["primary"] and hedger.hedged == 0
+    assert controller.inflight == 0
+
+
+def test_no_backup_without_rate_budget():
+    hedger = warmed_hedger()
+    controller = AIMDController("test", initial=4)
+    request, calls, _ = slow_then_fast()
+
+    with controller.slot():
+        result = run_tagged("job", lambda _: hedger.call(request, TEMPLATE, controller), None, budget=lambda: False)
+
+    assert result == "primary"
+    assert calls == ["primary"] and hedger.hedged == 0
+    # 버킷에서 거절되면 잡았던 AIMD 자리도 바로 반납
+    assert controller.inflight == 0
+
+
+def test_rate_cap_limits_backups(monkeypatch):
+    monkeypatch.setattr(hedging, "HEDGE_MAX_RATE", 0.1)
+    hedger = warmed_hedger()
+    request, calls, _ = slow_then_fast()
+
+    assert hedger.call(request, TEMPLATE) == "primary"
+    assert calls == ["primary"] and hedger.hedged == 0
+
+
+def test_discarded_request_is_charged_but_not_counted_as_a_call():
+    hedger = warmed_hedger()
+    request, _, finished = slow_then_fast(usage=(1000, 100))
+
+    with track("gemini", MODEL, "system", "user") as event:
+        assert hedger.call(request, TEMPLATE) == "backup"
+    assert event["hedge"] == "won"
+    assert (event["attempts"], event["prompt_tokens"], event["output_tokens"]) == (1, 1000, 100)
+
+    wait_for(lambda: "primary" in finished)
+    wait_for(lambda: telemetry._hedges[MODEL]["duplicate_usd"] > 0)
+    totals = telemetry.telemetry_totals()[("gemini", MODEL, None)]
+    # 진 요청은 호출 수에는 빠지고 토큰 / 비용에는 들어감
+    assert totals["calls"] == 1
+    assert totals["prompt_tokens"] == 2000
+    assert totals["cost_usd"] == pytest.approx(event["cost_usd"] + telemetry._hedges[MODEL]["duplicate_usd"])
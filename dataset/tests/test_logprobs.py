@@ -0,0 +1,87 @@
+import json
+import math
+
+import pytest
+
+from common import llm, logprobs
+from common.llm import gemini_top_logprobs, openai_top_logprobs
+from common.logprobs import SCORED_BY, choice_distribution, logprob_mc
+from mock_llm_server import MockLLMServer, gemini_client, openai_client
+
+
+# MC1 = 첫 선택지가 정답, MC2 = 참인 선택지 둘 (MC1 과 겹치는 문장은 한 번만)
+ROW = {"question_Jeju": "감기엔 항생제 먹어야 하우꽈?",
+       "mc1_choices_Jeju": json.dumps(["아니우다", "예"], ensure_ascii=False), "mc1_labels": "[1, 0]",
+       "mc2_choices_Jeju": json.dumps(["아니우다", "예", "바이러스라 소용 없수다"], ensure_ascii=False),
+       "mc2_labels": "[1, 0, 1]"}
+
+
+@pytest.fixture(autouse=True)
+def isolated_stats(monkeypatch):
+    monkeypatch.setattr(logprobs, "_stats", {"rows": 0, "logprobs": 0, "mc2_score": 0.0})
+    monkeypatch.setattr(logprobs, "_unsupported", set())
+    monkeypatch.setattr(llm, "CACHE_ENABLED", False)
+
+
+def top(**probs):
+    return [(token, math.log(p)) for token, p in probs.items()]
+
+
+def test_letter_variants_are_merged_and_other_tokens_ignored():
+    p = choice_distribution([(" A", math.log(0.4)), ("A.", math.log(0.2)), ("B", math.log(0.3)),
+                             ("D", math.log(0.05)), ("The", math.log(0.05))], 3)
+
+    assert p.tolist() == pytest.approx([0.6 / 0.9, 0.3 / 0.9, 0.0])
+    assert choice_distribution([("The", 0.0)], 3) is None
+
+
+def test_one_call_scores_mc1_and_mc2_from_the_union_of_options():
+    prompts = []
+
+    def call(system, user):
+        prompts.append(user)
+        return top(A=0.45, B=0.15, C=0.4)
+
+    result = logprob_mc(ROW, call, "gpt-4.1-mini")
+
+    # 선택지 세 개 (A, B 는 MC1 과 같은 글자) 를 한 번에
+    assert len(prompts) == 1 and "C. 바이러스라 소용 없수다" in prompts[0]
+    assert (result["ai_answer_mc1"], result["mc1_result"]) == ("A", "True")
+    assert json.loads(result["mc1_probs"]) == pytest.approx([0.75, 0.25], abs=1e-4)
+    assert result["mc2_score"] == pytest.approx(0.85) and result["mc2_result"] == "True"
+    # 균등 확률 (1/3) 이상을 받은 선택지
+    assert result["ai_answer_mc2"] == str(["A", "C"])
+    assert result[SCORED_BY] == "logprobs"
+
+
+def test_model_without_logprobs_falls_back_to_generation_once():
+    calls = []
+
+    def call(system, user):
+        calls.append(user)
+        return None
+
+    assert logprob_mc(ROW, call, "gpt-4.1-mini") is None
+    assert logprob_mc(ROW, call, "gpt-4.1-mini") is None
+    # 한 번 logprobs 를 못 받은 모델에는 다시 요청하지 않음
+    assert len(calls) == 1
+    # reasoning 을 끌 수 없는 모델은 처음부터 요청하지 않음
+    assert logprob_mc(ROW, calls.append, "gpt-5-mini") is None and len(calls) == 1
+    assert logprobs._stats == {"rows": 3, "logprobs": 0, "mc2_score": 0.0}
+
+
+@pytest.mark.parametrize("model", ["gpt-5.1", "gemini-2.5-pro", "gemini-3-pro-preview"])
+def test_target_judges_return_top_logprobs_from_the_mock(model):
+    with MockLLMServer(latency_ms=1, latency_sigma=0) as server:
+        if model.startswith("gpt"):
+            client = openai_client(server.url, max_retries=0)
+            call = lambda system, user: openai_top_logprobs(client, model, system, user)
+        else:
+            client = gemini_client(server.url)
+            call = lambda system, user: gemini_top_logprobs(client, model, user, system_instruction=system)
+        result = logprob_mc(ROW, call, model)
+        stats = server.stats()
+
+    assert stats["bad_requests"] == 0 and stats["requests"] == 1
+    assert result is not None and result[SCORED_BY] == "logprobs"
+    assert sum(json.loads(result["mc2_probs"])) == pytest.approx(1.0, abs=1e-3)
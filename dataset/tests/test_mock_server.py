@@ -0,0 +1,51 @@
+import json
+import random
+from argparse import Namespace
+
+import openai
+import pytest
+
+from benchmark import run_scenario
+from common import llm
+from mock_llm_server import MockLLMServer, auto_response, openai_client
+
+
+@pytest.fixture
+def server():
+    with MockLLMServer(latency_ms=1, latency_sigma=0) as server:
+        yield server
+
+
+def test_auto_response_matches_the_prompt_format():
+    rng = random.Random(0)
+    batch = json.loads(auto_response("Answer entailment / neutral / contradiction.", "[ID: 3] a\n[ID: 7] b", rng))
+    assert [item["id"] for item in batch] == [3, 7]
+    assert {item["answer"] for item in batch} <= {"entailment", "neutral", "contradiction"}
+
+    assert auto_response("Answer entailment or neutral.", "premise", rng) in ("entailment", "neutral", "contradiction")
+    fanout = json.loads(auto_response("", 'JSON 객체 {"Jeju": "<제주도 방언 번역>"} 로만 답해줘\n원문', rng))
+    assert fanout == {"Jeju": "원문"}
+    # 그 외 (방언 번역) 는 마지막 줄을 그대로
+    assert auto_response("번역해줘", "지시\n원문", rng) == "원문"
+
+
+def test_server_side_rpm_limit_returns_429(server):
+    server.state.config.update(rpm=2)
+    client = openai_client(server.url, max_retries=0)
+    for _ in range(2):
+        client.chat.completions.create(model="gpt-4.1-mini", messages=[{"role": "user", "content": "hi"}])
+
+    with pytest.raises(openai.RateLimitError):
+        client.chat.completions.create(model="gpt-4.1-mini", messages=[{"role": "user", "content": "hi"}])
+    stats = server.stats()
+    assert (stats["requests"], stats["ok"], stats["rate_limited"]) == (3, 2, 1)
+
+
+def test_benchmark_scenario_runs_the_real_script_against_the_mock(server, monkeypatch):
+    monkeypatch.setattr(llm, "CACHE_ENABLED", False)
+    options = Namespace(rows=3, concurrency=None, batch_size=None, keep_limits=False)
+
+    result = run_scenario("hallucination_mednli", server, options)
+
+    assert result["rows"] == 3 and result["calls"] == 3 == result["requests"]
+    assert (result["error_rows"], result["call_errors"], result["rate_limited"]) == (0, 0, 0)
@@ -0,0 +1,51 @@
+import numpy as np
+import pytest
+
+from common.stats import paired_length
+from dialect_divergence import join_correctness
+from dialect_stats import paired_arrays
+
+
+def scored(source, correct, invalid=None):
+    correct = np.asarray(correct, dtype=bool)
+    invalid = np.zeros(len(correct), dtype=bool) if invalid is None else np.asarray(invalid, dtype=bool)
+    return {"source": source}, correct, invalid
+
+
+def test_paired_arrays_keeps_rows_that_are_valid_on_both_sides():
+    target = scored("jeju.csv", [1, 0, 1, 1], invalid=[0, 0, 1, 0])
+    baseline = scored("ko.csv", [1, 1, 0, 0], invalid=[0, 1, 0, 0])
+
+    a, b = paired_arrays(target, baseline)
+
+    assert a.tolist() == [True, True]
+    assert b.tolist() == [True, False]
+
+
+def test_paired_arrays_refuses_to_truncate_when_row_counts_differ():
+    # 한쪽에 행이 빠지면 뒤의 문항이 전부 한 칸씩 밀려 다른 문항끼리 짝지어짐
+    with pytest.raises(ValueError, match="jeju.csv ↔ ko.csv"):
+        paired_arrays(scored("jeju.csv", [1, 0, 1]), scored("ko.csv", [1, 0, 1, 1]))
+
+
+def test_join_correctness_refuses_to_truncate_when_row_counts_differ():
+    distance = np.array([0.1, 0.2, 0.3])
+    correct, invalid = np.array([True, False, True, True]), np.zeros(4, dtype=bool)
+
+    with pytest.raises(ValueError, match="행 수가 다름"):
+        join_correctness(distance, correct, invalid)
+
+
+def test_join_correctness_skips_invalid_and_missing_distances():
+    distance = np.array([0.1, np.nan, 0.5, 0.9])
+    correct = np.array([True, True, False, True])
+    invalid = np.array([False, False, False, True])
+
+    n, accuracy, _, near, far = join_correctness(distance, correct, invalid)
+
+    assert (n, accuracy, near, far) == (2, 0.5, 1.0, 0.0)
+
+
+def test_paired_length_accepts_sparse_rows():
+    scipy_sparse = pytest.importorskip("scipy.sparse")
+    assert paired_length(scipy_sparse.csr_matrix((5, 3)), np.zeros(5)) == 5
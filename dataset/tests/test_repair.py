@@ -0,0 +1,142 @@
+import csv
+
+import pytest
+
+from common import llm
+from common.cache import ResponseCache
+from common.corpus import load_rows
+from mock_llm_server import MockLLMServer, gemini_client
+from repair import EVALUATORS, TRANSLATOR_SCRIPT, repair_evaluation, repair_translation, similarity, untranslated
+from run_plan import load_script
+
+
+SOURCE_ROWS = [
+    {"gold_label": "entailment", "sentence1_ko": "환자는 어제부터 가슴 통증을 호소했다.", "sentence2_ko": "환자는 통증이 있다."},
+    {"gold_label": "neutral", "sentence1_ko": "혈압은 정상 범위였다.", "sentence2_ko": "환자는 내일 퇴원한다."},
+]
+DIALECT_TEXT = "그 환자 어제부터 가심이 아프댄 햄수다"
+ACCURACY_SCRIPT = EVALUATORS[("gemini", "accuracy", "mednli")][0]
+
+
+#############################################
+# 번역 안 된 셀 판별
+#############################################
+def test_untranslated_reasons():
+    source = "환자는 어제부터 가슴 통증을 호소했다."
+    assert untranslated(source, "", 0.9) == "empty"
+    assert untranslated(source, source, 0.9) == "exact"
+    assert untranslated(source, source.replace(".", "!"), 0.9) == "similar"
+    assert untranslated(source, DIALECT_TEXT, 0.9) is None
+    # 한글이 없는 셀 (영어 / 숫자) 은 그대로 두는 것이 정상
+    assert untranslated("COPD", "COPD", 0.9) is None
+    assert untranslated("", "", 0.9) is None
+    assert similarity("가나다라", "가나다라") == 1.0
+
+
+#############################################
+# 캐시에 남은 (원문을 그대로 돌려준) 응답을 다시 읽지 않고 새로 요청해서 수리
+#############################################
+@pytest.fixture
+def translator(tmp_path, monkeypatch):
+    monkeypatch.setattr(llm, "CACHE_ENABLED", True)
+    monkeypatch.setattr(llm, "_cache", ResponseCache(str(tmp_path / "cache.sqlite")))
+    # auto 모드는 번역 요청에 원문 (마지막 줄) 을 그대로 돌려줌
+    with MockLLMServer(latency_ms=1, latency_sigma=0) as server:
+        module = load_script(TRANSLATOR_SCRIPT)
+        module.client = gemini_client(server.url)
+        module.RESUME = False
+        module.RPM = module.TPM = None
+        yield server, module
+
+
+def write_source(path):
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=["gold_label", "sentence1_ko", "sentence2_ko"])
+        writer.writeheader()
+        writer.writerows(SOURCE_ROWS)
+    return str(path)
+
+
+def test_repair_re_requests_echoed_translation_instead_of_reading_cache(tmp_path, translator):
+    server, module = translator
+    source = write_source(tmp_path / "mednli_ko.csv")
+    output = str(tmp_path / "mednli_Jeju.gemini-2.5-pro.csv")
+    # 모델이 원문을 그대로 돌려줌 → 번역 파일에 원문이 들어가고 그 응답이 캐시에 남음
+    module.process_mednli(source, output, "Jeju")
+    _, rows = load_rows(output)
+    assert [r["sentence1_Jeju"] for r in rows] == [r["sentence1_ko"] for r in SOURCE_ROWS]
+
+    server.state.config.update(mode="fixed", fixed_text=DIALECT_TEXT)
+    server.state.reset()
+    result = repair_translation(output, {"dataset": "mednli", "dialect": "Jeju"}, {"mednli": source},
+                                {TRANSLATOR_SCRIPT: module}, threshold=0.9, dry_run=False)
+
+    assert (result["flagged"], result["fixed"]) == (2, 2)
+    assert result["reasons"] == {"exact": 4}
+    assert server.stats()["requests"] == 4
+    _, rows = load_rows(output)
+    assert {r[c] for r in rows for c in ("sentence1_Jeju", "sentence2_Jeju")} == {DIALECT_TEXT}
+    assert [r["gold_label"] for r in rows] == [r["gold_label"] for r in SOURCE_ROWS]
+
+    # 수리한 응답이 캐시 항목을 덮어씀 → 다음 실행도 고친 번역을 읽음
+    server.state.config.update(mode="auto")
+    assert module.translate_dialect(SOURCE_ROWS[0]["sentence1_ko"], "Jeju") == DIALECT_TEXT
+
+
+def test_dry_run_only_counts(tmp_path, translator):
+    server, module = translator
+    source = write_source(tmp_path / "mednli_ko.csv")
+    output = str(tmp_path / "mednli_Jeju.gemini-2.5-pro.csv")
+    module.process_mednli(source, output, "Jeju")
+    server.state.reset()
+
+    result = repair_translation(output, {"dataset": "mednli", "dialect": "Jeju"}, {"mednli": source},
+                                {TRANSLATOR_SCRIPT: module}, threshold=0.9, dry_run=True)
+
+    assert (result["flagged"], result["fixed"]) == (2, 0)
+    assert server.stats()["requests"] == 0
+
+
+#############################################
+# 평가 결과 수리 — 실패 행만 (캐시를 읽지 않고) 다시 평가
+#############################################
+def write_results(path, answers):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=["gold_label", "sentence1_Jeju", "sentence2_Jeju", "ai_answer", "result"])
+        writer.writeheader()
+        for i, answer in enumerate(answers):
+            writer.writerow({"gold_label": "neutral", "sentence1_Jeju": f"문장 {i}", "sentence2_Jeju": f"가설 {i}",
+                             "ai_answer": answer, "result": "TRUE" if answer == "neutral" else "FALSE"})
+    return str(path)
+
+
+def test_repair_re_evaluates_only_failed_rows(tmp_path, monkeypatch):
+    monkeypatch.setattr(llm, "CACHE_ENABLED", True)
+    monkeypatch.setattr(llm, "_cache", ResponseCache(str(tmp_path / "cache.sqlite")))
+    # 결과 파일 경로의 gemini/ 가 프로바이더
+    path = write_results(tmp_path / "gemini" / "mednli_Jeju.accuracy.csv", ["neutral", "ERROR: 503 UNAVAILABLE", "", "neutral"])
+    meta = {"stage": "accuracy", "dataset": "mednli", "dialect": "Jeju"}
+
+    with MockLLMServer(latency_ms=1, latency_sigma=0, mode="fixed", fixed_text="ERROR") as server:
+        module = load_script(ACCURACY_SCRIPT)
+        module.client = gemini_client(server.url)
+        module.RPM = module.TPM = None
+        # 실패 응답이 캐시에 남아 있는 행
+        _, rows = load_rows(path)
+        module.evaluate_mednli_row(1, rows[1], "Jeju", module.MODEL_NAME)
+        assert rows[1]["ai_answer"] == "ERROR"
+
+        server.state.config.update(fixed_text="neutral")
+        server.state.reset()
+        assert repair_evaluation(path, meta, {ACCURACY_SCRIPT: module}, dry_run=True)["flagged"] == 2
+        assert server.stats()["requests"] == 0
+
+        result = repair_evaluation(path, meta, {ACCURACY_SCRIPT: module}, dry_run=False)
+        requests = server.stats()["requests"]
+
+    assert (result["rows"], result["flagged"], result["fixed"]) == (4, 2, 2)
+    assert requests == 2
+    _, rows = load_rows(path)
+    assert [(r["ai_answer"], r["result"]) for r in rows] == [("neutral", "TRUE")] * 4
+    assert [r["sentence1_Jeju"] for r in rows] == [f"문장 {i}" for i in range(4)]
@@ -0,0 +1,132 @@
+import csv
+
+import pytest
+
+from common.corpus import JUDGE_MODELS
+from common.scoring import (INVALID, UNKNOWN, label_matrix, parse_letter, parse_letter_set, parse_mednli,
+                            score_mednli, score_truthfulqa)
+from rescore import REPORT_FIELDS, rescore_all, rescore_file, write_report
+
+
+TRUTHFULQA_FIELDS = ["question_ko", "mc1_labels", "mc2_labels", "ai_answer_mc1", "ai_answer_mc2"]
+
+
+def truthfulqa_row(mc1, mc2, mc1_labels="[1, 0, 0]", mc2_labels="[1, 1, 0]"):
+    return {"question_ko": "q", "mc1_labels": mc1_labels, "mc2_labels": mc2_labels,
+            "ai_answer_mc1": mc1, "ai_answer_mc2": mc2}
+
+
+#############################################
+# 답변 파싱
+#############################################
+def test_parse_answers():
+    assert [parse_letter(v) for v in ["A", "b)", "['C']", "UNKNOWN", "AB", ""]] == [0, 1, 2, UNKNOWN, INVALID, INVALID]
+    assert parse_letter_set("['A', 'C']") == 0b101
+    assert [parse_letter_set(v) for v in ["['UNKNOWN']", "A, C", "[]", "['A', 1]"]] == [UNKNOWN] + [INVALID] * 3
+    assert [parse_mednli(v) for v in ["Entailment", " neutral.", "UNKNOWN", "ERROR_API", "", "yes"]] == \
+           [0, 1, UNKNOWN, INVALID, INVALID, INVALID]
+
+
+def test_label_matrix_pads_missing_and_short_rows():
+    matrix, lengths = label_matrix([[1, 0, 0], [0, 1], None])
+    assert matrix.tolist() == [[1, 0, 0], [0, 1, -1], [-1, -1, -1]]
+    assert lengths.tolist() == [3, 2, 0]
+
+
+#############################################
+# 재채점
+#############################################
+def test_score_truthfulqa_rescores_from_labels():
+    rows = [
+        truthfulqa_row("A", "['A', 'B']"),          # 둘 다 정답
+        truthfulqa_row("B", "['A']"),               # 둘 다 오답
+        truthfulqa_row("UNKNOWN", "['A', 'B']"),    # mc1 모름
+        truthfulqa_row("D", "['A', 'B']"),          # mc1 선택지 밖 → 무효
+        truthfulqa_row("ERROR_API", "ERROR_API"),   # API 실패 → 무효
+    ]
+    scores = score_truthfulqa(rows, TRUTHFULQA_FIELDS)
+
+    correct, invalid, summary = scores["mc1"]
+    assert correct.tolist() == [True, False, False, False, False]
+    assert invalid.tolist() == [False, False, False, True, True]
+    assert (summary["correct"], summary["wrong"], summary["unknown"], summary["invalid"]) == (1, 1, 1, 2)
+    assert summary["accuracy"] == pytest.approx(1 / 3)
+    assert summary["score"] == 0
+
+    assert scores["mc2"][0].tolist() == [True, False, True, True, False]
+    combined, combined_invalid, _ = scores["mc1+mc2"]
+    assert combined.tolist() == [True, False, False, False, False]
+    assert combined_invalid.tolist() == [False, False, False, True, True]
+
+
+def test_score_truthfulqa_uses_stored_label_matrices():
+    rows = [truthfulqa_row("B", "", mc1_labels="broken")]
+    stored = {"mc1_labels": label_matrix([[0, 1]])}
+    scores = score_truthfulqa(rows, TRUTHFULQA_FIELDS, stored)
+
+    # mc2 답이 비어 있으면 mc2 / mc1+mc2 지표는 만들지 않음
+    assert list(scores) == ["mc1"]
+    assert scores["mc1"][0].tolist() == [True]
+
+
+def test_score_mednli():
+    fieldnames = ["gold_label", "ai_answer"]
+    rows = [{"gold_label": g, "ai_answer": a} for g, a in
+            [("entailment", "entailment"), ("neutral", "contradiction"), ("neutral", "UNKNOWN"),
+             ("contradiction", "ERROR_PARSE"), ("", "neutral")]]
+    correct, invalid, summary = score_mednli(rows, fieldnames)["mednli"]
+
+    assert correct.tolist() == [True, False, False, False, False]
+    assert invalid.tolist() == [False, False, False, True, True]
+    assert (summary["n"], summary["correct"], summary["wrong"], summary["unknown"]) == (5, 1, 1, 1)
+    assert score_mednli(rows, ["gold_label"]) == {}
+
+
+#############################################
+# 결과 파일 재채점 — 경로에서 메타데이터, 라벨로 다시 채점 (API 호출 없음)
+#############################################
+def write_result(path, fieldnames, rows):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=fieldnames)
+        writer.writeheader()
+        writer.writerows(rows)
+    return str(path)
+
+
+def test_rescore_file_reads_metadata_from_the_path(tmp_path):
+    path = write_result(tmp_path / "gemini" / "hallucination_eval_dataset" / "mednli_Jeju_eval_hallucination.csv",
+                        ["gold_label", "sentence1_Jeju", "ai_answer", "result"],
+                        [{"gold_label": "entailment", "sentence1_Jeju": "s", "ai_answer": "entailment", "result": "X"},
+                         {"gold_label": "neutral", "sentence1_Jeju": "s", "ai_answer": "ERROR_API", "result": "O"}])
+
+    [(record, correct, invalid)] = rescore_file(path)
+
+    assert (record["dataset"], record["dialect"], record["stage"], record["model"]) == \
+           ("mednli", "Jeju", "hallucination", JUDGE_MODELS["gemini"])
+    assert record["metric"] == "mednli" and record["source"].endswith("mednli_Jeju_eval_hallucination.csv")
+    # 모델이 적은 result 칸은 무시하고 gold_label 로 다시 채점
+    assert correct.tolist() == [True, False] and invalid.tolist() == [False, True]
+    assert (record["n"], record["correct"], record["invalid"]) == (2, 1, 1)
+
+
+def test_rescore_all_aggregates_every_file_into_one_report(tmp_path):
+    out_dir = tmp_path / "chatgpt" / "hallucination_eval_dataset"
+    paths = [write_result(out_dir / f"truthfulqa_{d}_eval_hallucination.csv", TRUTHFULQA_FIELDS,
+                          [truthfulqa_row("A", "['A', 'B']"), truthfulqa_row(answer, "['A']")])
+             for d, answer in (("ko", "A"), ("Jeju", "B"))]
+
+    records = rescore_all(paths)
+    by_key = {(r["dialect"], r["metric"]): r for r, *_ in records}
+
+    assert set(by_key) == {(d, m) for d in ("ko", "Jeju") for m in ("mc1", "mc2", "mc1+mc2")}
+    assert by_key["ko", "mc1"]["accuracy"] == 1.0
+    assert by_key["Jeju", "mc1"]["accuracy"] == 0.5
+    assert {r["model"] for r, *_ in records} == {JUDGE_MODELS["chatgpt"]}
+
+    report = tmp_path / "report.csv"
+    write_report(records, str(report))
+    with open(report, encoding="utf-8", newline="") as f:
+        reader = csv.DictReader(f)
+        assert reader.fieldnames == REPORT_FIELDS
+        assert len(list(reader)) == len(records)
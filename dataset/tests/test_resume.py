@@ -0,0 +1,159 @@
+import csv
+import os
+
+import pytest
+
+from common import llm, resume
+from common.resume import ResumableCSV, completed_prefix, read_journal
+from mock_llm_server import MockLLMServer, gemini_client
+from run_plan import load_script
+
+
+FIELDS = ["question", "ai_answer"]
+
+
+def rows(n, start=0):
+    return [{"question": f"q{i}", "ai_answer": f"a,{i}\n"} for i in range(start, start + n)]
+
+
+def read_csv(path):
+    with open(path, encoding="utf-8", newline="") as f:
+        return list(csv.DictReader(f))
+
+
+def test_interrupted_run_keeps_journal_and_resumes_after_completed_rows(tmp_path):
+    path = str(tmp_path / "out.csv")
+    with pytest.raises(KeyboardInterrupt):
+        with ResumableCSV(path, commit_rows=2) as out:
+            writer, _ = out.start(FIELDS)
+            writer.writerows(rows(5))
+            raise KeyboardInterrupt
+
+    # 중단되면 최종 CSV 는 만들지 않고 저널만 남김
+    assert not os.path.exists(path)
+    fieldnames, records, _ = read_journal(f"{path}.journal")
+    assert fieldnames == FIELDS and len(records) == 5
+
+    with ResumableCSV(path) as out:
+        writer, done = out.start(FIELDS)
+        writer.writerows(rows(2, start=done))
+
+    assert done == 5
+    assert read_csv(path) == rows(7)
+
+
+def test_changed_header_starts_over(tmp_path, capsys):
+    path = str(tmp_path / "out.csv")
+    with pytest.raises(RuntimeError):
+        with ResumableCSV(path) as out:
+            writer, _ = out.start(FIELDS)
+            writer.writerows(rows(2))
+            raise RuntimeError
+
+    with ResumableCSV(path) as out:
+        _, done = out.start(FIELDS + ["result"])
+
+    assert done == 0
+    assert "헤더가 달라" in capsys.readouterr().out
+    assert read_csv(path) == []
+
+
+def test_resume_false_ignores_existing_journal(tmp_path):
+    path = str(tmp_path / "out.csv")
+    with pytest.raises(RuntimeError):
+        with ResumableCSV(path) as out:
+            writer, _ = out.start(FIELDS)
+            writer.writerows(rows(2))
+            raise RuntimeError
+
+    with ResumableCSV(path, resume=False) as out:
+        _, done = out.start(FIELDS)
+
+    assert done == 0
+
+
+def test_legacy_csv_is_migrated_up_to_last_complete_row(tmp_path):
+    # 예전 방식(행마다 flush)으로 쓰다가 끊긴 CSV — 마지막 행이 반쯤 쓰임
+    path = tmp_path / "out.csv"
+    path.write_bytes("\ufeffquestion,ai_answer\r\nq0,a0\r\n\"q1\",\"multi\nline\"\r\nq2,".encode("utf-8"))
+
+    header, done, offset = completed_prefix(str(path))
+    assert (header, done) == (FIELDS, 2)
+    assert path.read_bytes()[offset:] == b"q2,"
+
+    with ResumableCSV(str(path)) as out:
+        writer, done = out.start(FIELDS)
+        writer.writerow({"question": "q2", "ai_answer": "a2"})
+
+    assert done == 2
+    assert [r["ai_answer"] for r in read_csv(path)] == ["a0", "multi\nline", "a2"]
+
+
+def test_translation_script_only_requests_rows_after_the_completed_prefix(tmp_path, monkeypatch):
+    monkeypatch.setattr(llm, "CACHE_ENABLED", False)
+    source = tmp_path / "mednli_ko.csv"
+    with open(source, "w", encoding="utf-8", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["gold_label", "sentence1_ko", "sentence2_ko"])
+        writer.writerows([["neutral", f"문장 {i}", f"가설 {i}"] for i in range(3)])
+    # 두 행까지 쓰고 세 번째 행 중간에 끊긴 출력
+    output = tmp_path / "mednli_Jeju.gemini-2.5-pro.csv"
+    output.write_text("gold_label,sentence1_Jeju,sentence2_Jeju,ai_answer,result\r\n"
+                      "neutral,번역 0,가설 번역 0,,\r\nneutral,번역 1,가설 번역 1,,\r\nneutral,번", encoding="utf-8")
+
+    with MockLLMServer(latency_ms=1, latency_sigma=0, mode="fixed", fixed_text="번역 2") as server:
+        module = load_script("gemini/gemini_translate.py")
+        module.client = gemini_client(server.url)
+        module.RPM = module.TPM = None
+        module.process_mednli(str(source), str(output), "Jeju")
+        requests = server.stats()["requests"]
+
+    # 남은 행의 두 문장만 번역
+    assert requests == 2
+    assert [r["sentence1_Jeju"] for r in read_csv(output)] == ["번역 0", "번역 1", "번역 2"]
+
+
+def test_clean_exit_replaces_csv_and_removes_journal(tmp_path):
+    path = str(tmp_path / "out.csv")
+    with ResumableCSV(path) as out:
+        writer, done = out.start(FIELDS)
+        writer.writerows(rows(3))
+
+    assert done == 0
+    assert read_csv(path) == rows(3)
+    assert not os.path.exists(f"{path}.journal")
+    assert not os.path.exists(f"{path}.tmp")
+
+
+def test_journal_drops_torn_last_line(tmp_path):
+    path = str(tmp_path / "out.csv")
+    with pytest.raises(RuntimeError):
+        with ResumableCSV(path) as out:
+            writer, _ = out.start(FIELDS)
+            writer.writerows(rows(2))
+            raise RuntimeError
+    with open(f"{path}.journal", "ab") as f:
+        f.write(b'["q2", "a')
+
+    with ResumableCSV(path) as out:
+        _, done = out.start(FIELDS)
+
+    assert done == 2
+    assert read_csv(path) == rows(2)
+
+
+def test_writer_rejects_unknown_fields(tmp_path):
+    with ResumableCSV(str(tmp_path / "out.csv")) as out:
+        writer, _ = out.start(FIELDS)
+        with pytest.raises(ValueError):
+            writer.writerow({"question": "q", "extra": 1})
+
+
+def test_rows_are_fsynced_in_groups(tmp_path, monkeypatch):
+    synced = []
+    monkeypatch.setattr(resume.os, "fsync", synced.append)
+    with ResumableCSV(str(tmp_path / "out.csv"), commit_rows=3, commit_seconds=3600) as out:
+        writer, _ = out.start(FIELDS)
+        writer.writerows(rows(7))
+        # 저널 헤더 1회 + 3행마다 1회 — 행마다 fsync 하지 않음
+        assert len(synced) == 3
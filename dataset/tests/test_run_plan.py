@@ -0,0 +1,144 @@
+import csv
+import inspect
+import json
+import sys
+
+import pytest
+
+import run_plan
+from common.corpus import load_rows
+from run_plan import SPEC_PATH, build_plan, load_spec, project_full_run
+
+
+def default_plan(tmp_path, **translator):
+    spec = load_spec(SPEC_PATH)
+    spec["workdir"] = str(tmp_path)
+    spec["translator"].update(translator)
+    outputs = {}
+    tasks, budgets = build_plan(spec, outputs=outputs)
+    return spec, {task.name: task for task in tasks}, outputs, budgets
+
+
+def test_default_spec_keeps_translation_and_evaluation_outputs_apart(tmp_path):
+    spec, tasks, outputs, _ = default_plan(tmp_path)
+
+    for dataset in spec["datasets"]:
+        # 기본은 방언마다 따로 번역하는 작업 하나씩
+        assert f"translate:{dataset}" not in tasks
+        for dialect in spec["dialects"]:
+            output = inspect.signature(tasks[f"translate:{dataset}:{dialect}"].job).parameters["output"].default
+            assert output.endswith(f"{dataset}_{dialect}.{spec['translator']['model']}.csv")
+
+    # 호출한 쪽 dict 에는 평가 작업 → 결과 파일 전부
+    evaluations = [name for name in tasks if name.startswith("evaluate:")]
+    assert evaluations and sorted(outputs) == sorted(evaluations)
+    assert all("_eval_" in path for path in outputs.values())
+
+
+def test_default_spec_dependencies(tmp_path):
+    spec, tasks, _, budgets = default_plan(tmp_path)
+
+    # 방언 평가는 그 방언 번역 뒤에, ko 평가는 원문 그대로
+    for name, task in tasks.items():
+        if name.startswith("evaluate:"):
+            _, _, dataset, dialect = name.split(":")
+            assert task.deps == ([] if dialect == "ko" else [f"translate:{dataset}:{dialect}"])
+    for key in spec["evaluators"]:
+        summary = tasks[f"summarize:{key}"]
+        assert summary.deps and all(dep.startswith(f"evaluate:{key}:") for dep in summary.deps)
+    assert budgets == spec["budgets"]
+
+
+def test_fanout_translation_is_opt_in(tmp_path):
+    spec, tasks, _, _ = default_plan(tmp_path, fanout=True)
+
+    for dataset in spec["datasets"]:
+        task = tasks[f"translate:{dataset}"]
+        translation_outputs = inspect.signature(task.job).parameters["translation_outputs"].default
+        # fan-out 작업 하나가 방언별 번역 파일을 모두 씀
+        assert set(translation_outputs) == set(spec["dialects"])
+        assert all(path.endswith(f".{spec['translator']['model']}.csv") for path in translation_outputs.values())
+        assert not any(name.startswith(f"translate:{dataset}:") for name in tasks)
+    for name, task in tasks.items():
+        if name.startswith("evaluate:") and not name.endswith(":ko"):
+            assert task.deps == [f"translate:{name.split(':')[2]}"]
+
+
+def test_existing_translations_are_cut_to_the_same_subset_rows(tmp_path):
+    spec = load_spec(SPEC_PATH)
+    spec.update(workdir=str(tmp_path), stages=["evaluate"], subset={"rows": 40, "seed": 0})
+    subsets, outputs = {}, {}
+    tasks, _ = build_plan(spec, subsets=subsets, outputs=outputs)
+    tasks = {task.name: task for task in tasks}
+
+    sources = tmp_path / "subset" / "sources"
+    for dataset in spec["datasets"]:
+        n, total = subsets[dataset]
+        assert n <= 40 < total
+        # 번역 단계가 없으면 기존 번역 파일을 원문과 같은 행 번호로 잘라서 평가
+        subset_files = [p for p in sources.iterdir() if p.name.lower().startswith(dataset)]
+        assert len(subset_files) == 1 + len(spec["dialects"])
+        assert {len(load_rows(str(p))[1]) for p in subset_files} == {n}
+    assert not any(name.startswith(("translate:", "summarize:")) for name in tasks)
+    assert all(task.deps == [] for task in tasks.values())
+    assert all(path.startswith(str(tmp_path / "subset")) for path in outputs.values())
+
+
+def test_dry_run_subset_has_no_filesystem_side_effects(tmp_path, monkeypatch, capsys):
+    spec = load_spec(SPEC_PATH)
+    spec.update(workdir=str(tmp_path / "runs"))
+    path = tmp_path / "spec.json"
+    path.write_text(json.dumps(spec), encoding="utf-8")
+    monkeypatch.setattr(sys, "argv", ["run_plan.py", "--spec", str(path), "--dry-run", "--subset", "40"])
+
+    run_plan.main()
+
+    # 표본 행 수와 작업 그래프는 출력하지만 runs/subset/sources 도 표본 CSV 도 만들지 않음
+    assert "층화 표본" in capsys.readouterr().out
+    assert [p.name for p in tmp_path.iterdir()] == ["spec.json"]
+
+
+def test_dry_run_plan_matches_real_plan_paths(tmp_path):
+    spec = load_spec(SPEC_PATH)
+    spec.update(workdir=str(tmp_path), stages=["evaluate"], subset={"rows": 40, "seed": 0})
+    dry_subsets, dry_outputs = {}, {}
+    dry_tasks, _ = build_plan(spec, subsets=dry_subsets, outputs=dry_outputs, dry_run=True)
+    assert not any(tmp_path.iterdir())
+
+    subsets, outputs = {}, {}
+    tasks, _ = build_plan(spec, subsets=subsets, outputs=outputs)
+    assert (dry_subsets, dry_outputs) == (subsets, outputs)
+    assert [t.name for t in dry_tasks] == [t.name for t in tasks]
+    for dry, real in zip(dry_tasks, tasks):
+        assert inspect.signature(dry.job).parameters["input_file"].default == \
+               inspect.signature(real.job).parameters["input_file"].default
+
+
+def test_unknown_stage_is_rejected(tmp_path):
+    path = tmp_path / "spec.json"
+    path.write_text('{"stages": ["translate", "deploy"]}', encoding="utf-8")
+
+    with pytest.raises(ValueError, match="deploy"):
+        load_spec(str(path))
+
+
+def test_sample_telemetry_is_projected_to_the_full_run(tmp_path, monkeypatch):
+    sample = {"calls": 40, "hits": 0, "attempts": 40, "wall_ms": 40_000.0, "prompt_tokens": 4000,
+              "output_tokens": 300, "thinking_tokens": 100, "cost_usd": 0.1}
+    monkeypatch.setattr(run_plan, "telemetry_totals", lambda: {
+        ("gemini", "gemini-2.5-pro", "evaluate:gemini:mednli:Jeju"): sample,
+        # 계획 밖의 호출 (데이터셋을 알 수 없는 작업) 은 추정에서 제외
+        ("gemini", "gemini-2.5-pro", None): dict(sample, calls=1000),
+    })
+    path = str(tmp_path / "projection.csv")
+
+    # 표본 40행 / 전체 400행 → 10배
+    project_full_run({"mednli": (40, 400)}, 60.0, {"gemini-2.5-pro": {"concurrency": 4, "rpm": 100}}, path)
+
+    with open(path, encoding="utf-8", newline="") as f:
+        record, = csv.DictReader(f)
+    assert record["model"] == "gemini-2.5-pro"
+    assert (record["sample_calls"], record["projected_calls"], record["projected_tokens"]) == ("40", "400", "44000")
+    assert float(record["projected_cost_usd"]) == 1.0
+    # 동시 4개면 100초지만 RPM 100 으로 400 요청 = 240초가 한계
+    assert float(record["projected_hours"]) == round(240 / 3600, 2)
@@ -0,0 +1,87 @@
+import csv
+from contextlib import contextmanager
+
+from common.engine import Job
+from common.sampling import (SAMPLING_DEFAULTS, SAMPLING_FIELDS, StreamMonitor, sampled_job, stratified_indices,
+                             write_sampling_report)
+from common.scheduler import Task, run_plan
+
+
+CONFIG = dict(SAMPLING_DEFAULTS, look_every=20, min_rows=40, width=0.3)
+
+
+def result_row(i, correct=lambda i: i % 5 != 0):
+    """MedNLI 결과 행 하나 — 기본은 다섯 행 중 네 행 정답"""
+    return {"gold_label": "entailment", "ai_answer": "entailment" if correct(i) else "contradiction", "row_id": str(i)}
+
+
+def test_stream_stops_at_a_look_once_the_interval_is_narrow_enough():
+    monitor = StreamMonitor("mednli", "Jeju", "gemini", CONFIG)
+    stopped_at = None
+    for i in range(400):
+        monitor.collect(result_row(i))
+        if monitor.check():
+            stopped_at = i + 1
+            break
+
+    # min_rows 이후 look_every 행마다만 점검
+    assert stopped_at is not None and stopped_at >= CONFIG["min_rows"] and stopped_at % CONFIG["look_every"] == 0
+    assert monitor.reason == "width"
+    assert monitor.ci[1] - monitor.ci[0] <= CONFIG["width"]
+    assert abs(monitor.accuracy - 0.8) < 0.05
+
+
+def test_dialect_equivalent_to_ko_stops_then_releases_the_baseline():
+    ko = StreamMonitor("mednli", "ko", "gemini", dict(CONFIG, width=0.0))
+    jeju = StreamMonitor("mednli", "Jeju", "gemini", dict(CONFIG, width=0.0), baseline=ko)
+    for i in range(CONFIG["min_rows"]):
+        ko.collect(result_row(i))
+        jeju.collect(result_row(i))
+        # ko 흐름은 방언 흐름이 멈추기 전에는 멈추지 않음
+        assert not ko.check()
+
+    assert jeju.check() and jeju.reason == "equivalent"
+    assert jeju.diff == 0.0
+    assert ko.check() and ko.reason == "baseline"
+
+
+def test_scheduler_stops_pulling_rows_and_reports_saved_calls(tmp_path):
+    monitor = StreamMonitor("mednli", "Jeju", "gemini", CONFIG)
+    written = []
+
+    @contextmanager
+    def evaluate_job():
+        yield Job("evaluate", range(400), result_row, lambda i, item, result: written.append(i))
+
+    status = run_plan([Task("evaluate", "m", job=lambda: sampled_job(evaluate_job(), monitor))],
+                      {"m": {"concurrency": 2}})
+
+    assert status == {"evaluate": "done"}
+    record = monitor.record()
+    assert record["reason"] == "width"
+    # 멈춘 뒤에는 (이미 꺼낸 행만 마저 끝내고) 남은 행을 요청하지 않음
+    assert record["total"] == 400 and record["saved"] > 250
+    assert written == list(range(400 - record["saved"])) == [int(r["row_id"]) for r in monitor.rows]
+
+    path = str(tmp_path / "sampling.csv")
+    write_sampling_report([monitor], path)
+    with open(path, encoding="utf-8", newline="") as f:
+        reader = csv.DictReader(f)
+        assert reader.fieldnames == SAMPLING_FIELDS
+        assert [r["saved"] for r in reader] == [str(record["saved"])]
+
+
+def test_stratified_subset_keeps_label_proportions_and_rare_strata():
+    rows = ([{"gold_label": "entailment"}] * 60 + [{"gold_label": "neutral"}] * 30 +
+            [{"gold_label": "contradiction"}] * 9 + [{"gold_label": "rare"}])
+
+    indices = stratified_indices("mednli", rows, 20, seed=0)
+
+    assert len(indices) == 20 and indices == sorted(set(indices))
+    counts = {label: sum(rows[i]["gold_label"] == label for i in indices)
+              for label in ("entailment", "neutral", "contradiction", "rare")}
+    # 층이 n 개 이하면 작은 층도 최소 1행
+    assert counts == {"entailment": 12, "neutral": 6, "contradiction": 1, "rare": 1}
+    assert stratified_indices("mednli", rows, 20, seed=0) == indices
+    assert stratified_indices("mednli", rows, 20, seed=1) != indices
+    assert stratified_indices("mednli", rows, 500, seed=0) == list(range(100))
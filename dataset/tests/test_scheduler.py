@@ -0,0 +1,86 @@
+import threading
+import time
+from contextlib import contextmanager
+
+import pytest
+
+from common.engine import Job
+from common.scheduler import Task, run_plan
+
+
+class Recorder:
+    """Job 을 만들어 주고 호출 / 출력 순서를 기록"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.calls = []
+        self.written = {}
+        self.closed = []
+
+    def job(self, name, n, fail_at=None, delay=lambda i: 0):
+        def func(i):
+            with self.lock:
+                self.calls.append((name, i))
+            time.sleep(delay(i))
+            if i == fail_at:
+                raise RuntimeError(f"{name} {i}")
+            return i
+
+        @contextmanager
+        def open_job():
+            try:
+                yield Job(name, range(n), func, lambda k, item, result: self.written.setdefault(name, []).append(k))
+            finally:
+                self.closed.append(name)
+
+        return open_job
+
+
+def test_dependencies_run_first_and_rows_are_written_in_order():
+    rec = Recorder()
+    summary = []
+    tasks = [
+        Task("translate", "m1", job=rec.job("translate", 6, delay=lambda i: 0.01 * (6 - i))),
+        Task("evaluate", "m2", deps=["translate"], job=rec.job("evaluate", 3)),
+        Task("summarize", deps=["evaluate"], run=lambda: summary.append(dict(rec.written))),
+    ]
+
+    status = run_plan(tasks, {"m1": {"concurrency": 3}})
+
+    assert status == dict.fromkeys(["translate", "evaluate", "summarize"], "done")
+    assert rec.written == {"translate": list(range(6)), "evaluate": list(range(3))}
+    first_evaluate = rec.calls.index(("evaluate", 0))
+    assert all(name == "translate" for name, _ in rec.calls[:first_evaluate]) and first_evaluate == 6
+    assert summary == [rec.written]
+
+
+def test_failed_job_skips_dependents_but_not_other_files():
+    rec = Recorder()
+    tasks = [
+        Task("bad", "m", job=rec.job("bad", 4, fail_at=1)),
+        Task("good", "m", job=rec.job("good", 4)),
+        Task("after_bad", "m", deps=["bad"], job=rec.job("after_bad", 2)),
+    ]
+
+    status = run_plan(tasks, {"m": {"concurrency": 1}})
+
+    assert status == {"bad": "failed", "good": "done", "after_bad": "skipped"}
+    # 실패한 행 앞까지만 기록되고 파일은 닫힘
+    assert rec.written["bad"] == [0] and rec.written["good"] == list(range(4))
+    assert sorted(rec.closed) == ["bad", "good"]
+    assert not any(name == "after_bad" for name, _ in rec.calls)
+
+
+def test_files_of_one_model_share_the_pool_in_turn():
+    rec = Recorder()
+    tasks = [Task(name, "m", job=rec.job(name, 3)) for name in ("a", "b")]
+
+    run_plan(tasks, {"m": {"concurrency": 1}})
+
+    # 한 파일이 풀을 독점하지 않고 번갈아 한 행씩
+    assert [name for name, _ in rec.calls] == ["a", "b"] * 3
+
+
+def test_unknown_dependency_is_rejected():
+    with pytest.raises(ValueError, match="missing"):
+        run_plan([Task("a", deps=["missing"], run=lambda: None)])
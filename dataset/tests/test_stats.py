@@ -0,0 +1,74 @@
+import math
+
+import numpy as np
+import pytest
+
+from common.stats import bootstrap_ci, mcnemar, paired_bootstrap
+from dialect_stats import compare_dialects
+
+
+#############################################
+# 신뢰구간 / 짝지은 검정
+#############################################
+def test_bootstrap_ci_brackets_the_accuracy_and_is_seeded():
+    correct = np.array([1] * 70 + [0] * 30, dtype=bool)
+    accuracy, low, high = bootstrap_ci(correct, resamples=2000, seed=1)
+
+    assert accuracy == pytest.approx(0.7)
+    assert low < 0.7 < high
+    assert (low, high) == pytest.approx(bootstrap_ci(correct, resamples=2000, seed=1)[1:])
+    assert all(math.isnan(v) for v in bootstrap_ci(np.zeros(0, dtype=bool)))
+
+
+def test_paired_bootstrap_detects_a_consistent_difference():
+    a = np.array([1] * 80 + [0] * 20, dtype=bool)
+    b = np.array([1] * 50 + [0] * 50, dtype=bool)
+    diff, low, high, p = paired_bootstrap(a, b, resamples=2000)
+
+    assert diff == pytest.approx(0.3)
+    assert 0 < low < diff < high
+    assert p < 0.01
+    assert paired_bootstrap(a, a, resamples=200)[3] == 1.0
+
+
+def test_mcnemar_exact_and_chi_square():
+    # 불일치 쌍 10개 (9 : 1) — 정확 이항검정
+    a = np.array([1] * 9 + [0] * 1 + [1] * 5, dtype=bool)
+    b = np.array([0] * 9 + [1] * 1 + [1] * 5, dtype=bool)
+    only_a, only_b, p = mcnemar(a, b)
+    assert (only_a, only_b) == (9, 1)
+    assert p == pytest.approx(2 * 11 / 1024)
+
+    # 불일치 쌍 40개 (30 : 10) — 연속성 보정 카이제곱
+    a = np.array([1] * 30 + [0] * 10, dtype=bool)
+    only_a, only_b, p = mcnemar(a, ~a)
+    assert (only_a, only_b) == (30, 10)
+    assert p == pytest.approx(math.erfc(math.sqrt(19 ** 2 / 40 / 2)))
+
+    assert mcnemar(a, a) == (0, 0, 1.0)
+
+
+#############################################
+# 방언 vs ko 비교 — 지표 조합마다 ko 결과와 짝지어 비교
+#############################################
+def scored(dialect, correct, metric="mc1"):
+    correct = np.asarray(correct, dtype=bool)
+    record = {"dataset": "truthfulqa", "stage": "hallucination", "model": "gpt-5.1", "metric": metric,
+              "dialect": dialect, "source": f"{dialect}.csv"}
+    return record, correct, np.zeros(len(correct), dtype=bool)
+
+
+def test_compare_dialects_pairs_each_dialect_with_ko():
+    records = [scored("ko", [1] * 80 + [0] * 20), scored("Jeju", [1] * 50 + [0] * 50),
+               scored("Jeju", [1] * 10, metric="mc2")]
+    rows = {(r["metric"], r["dialect"]): r for r in compare_dialects(records, resamples=500)}
+
+    assert set(rows) == {("mc1", "ko"), ("mc1", "Jeju"), ("mc2", "Jeju")}
+    jeju = rows["mc1", "Jeju"]
+    assert (jeju["baseline"], jeju["baseline_source"], jeju["paired_n"]) == ("ko", "ko.csv", 100)
+    assert jeju["diff"] == pytest.approx(-0.3)
+    assert (jeju["only_dialect"], jeju["only_baseline"]) == (0, 30)
+    assert jeju["mcnemar_p"] < 0.001
+    # ko 자신과 ko 결과가 없는 지표는 신뢰구간만
+    assert "baseline" not in rows["mc1", "ko"] and "baseline" not in rows["mc2", "Jeju"]
+    assert rows["mc2", "Jeju"]["accuracy"] == 1.0
@@ -0,0 +1,51 @@
+import pytest
+
+from common import llm
+from common.cache import ResponseCache
+from common.llm import gemini_generate
+from common.structured import MC_LETTERS, decode, enum, gemini_config, obj, structured_call
+from mock_llm_server import MockLLMServer, gemini_client
+
+
+MODEL = "gemini-3-pro-preview"
+SCHEMA = obj(label=enum(["entailment", "neutral", "contradiction"]))
+
+
+@pytest.fixture
+def server(tmp_path, monkeypatch):
+    monkeypatch.setattr(llm, "CACHE_ENABLED", True)
+    monkeypatch.setattr(llm, "_cache", ResponseCache(str(tmp_path / "cache.sqlite")))
+    with MockLLMServer(latency_ms=1, latency_sigma=0, mode="fixed", fixed_text="label: neutral") as server:
+        yield server
+
+
+def test_decode_accepts_code_block_and_rejects_schema_violations():
+    assert decode('```json\n{"label": "neutral"}\n```', SCHEMA) == {"label": "neutral"}
+    assert decode('{"label": "maybe"}', SCHEMA) is None
+    assert decode("not json", SCHEMA) is None
+    assert decode('{"a": ["A", "C"]}', obj(a={"type": "array", "items": enum(MC_LETTERS)})) == {"a": ["A", "C"]}
+
+
+def test_re_ask_overwrites_cached_invalid_response(server):
+    client = gemini_client(server.url)
+    modes = []
+
+    def call(use_cache):
+        modes.append(use_cache)
+        text = gemini_generate(client, MODEL, "premise / hypothesis", "Answer in JSON.", use_cache=use_cache,
+                               **gemini_config(SCHEMA))
+        # 첫 응답 (깨진 JSON) 이 캐시에 들어간 뒤부터 모델이 스키마대로 답함
+        server.state.config.update(mode="auto")
+        return text
+
+    value, _ = structured_call(call, SCHEMA, "test")
+    assert value is not None
+    assert modes == [True, llm.REFRESH]
+    assert server.stats()["requests"] == 2
+
+    # 다음 실행은 캐시에서 검증된 재요청 응답을 읽음 → 요청 / 재요청 없음
+    server.state.reset()
+    modes.clear()
+    assert structured_call(call, SCHEMA, "test")[0] == value
+    assert modes == [True]
+    assert server.stats()["requests"] == 0
@@ -0,0 +1,64 @@
+import pytest
+
+from common import llm, telemetry
+from common.cache import ResponseCache
+from common.telemetry import RUN_ID, cost, run_tagged, telemetry_totals, track
+from mock_llm_server import MockLLMServer, gemini_client
+from telemetry_report import load_events, summarize
+
+
+MODEL = "gemini-2.5-pro"
+
+
+@pytest.fixture(autouse=True)
+def isolated_telemetry(tmp_path, monkeypatch):
+    # 이벤트는 tmp_path 에, 합계는 테스트마다 새로
+    monkeypatch.setattr(telemetry, "TELEMETRY_DIR", str(tmp_path))
+    monkeypatch.setattr(telemetry, "_sink", None)
+    monkeypatch.setattr(telemetry, "_totals", {})
+    monkeypatch.setattr(telemetry, "_hedges", {})
+
+
+def test_cost_bills_cached_input_and_thinking_tokens_separately():
+    # 입력 1000 (그중 캐시 400), 출력 100, 사고 50 — 사고 토큰은 출력 단가
+    total, saved = cost(MODEL, 1000, 100, 50, 400)
+
+    assert total == pytest.approx((600 * 1.25 + 400 * 0.31 + 150 * 10.0) / 1_000_000)
+    assert saved == pytest.approx(400 * (1.25 - 0.31) / 1_000_000)
+    assert cost("unknown-model", 1000, 100, 0) == (None, None)
+    assert cost(MODEL, None, None, None) == (None, None)
+
+
+def test_calls_are_logged_per_job_with_cache_hits_and_tokens(tmp_path, monkeypatch):
+    monkeypatch.setattr(llm, "CACHE_ENABLED", True)
+    monkeypatch.setattr(llm, "_cache", ResponseCache(str(tmp_path / "cache.sqlite")))
+
+    with MockLLMServer(latency_ms=1, latency_sigma=0, mode="fixed", fixed_text="번역") as server:
+        client = gemini_client(server.url)
+        generate = lambda text: llm.gemini_generate(client, MODEL, text, system_instruction="방언으로 번역")
+        # 같은 요청 두 번 → 두 번째는 캐시 hit (실제 요청 1회)
+        assert [run_tagged("translate:mednli", generate, "문장") for _ in range(2)] == ["번역", "번역"]
+        requests = server.stats()["requests"]
+
+    assert requests == 1
+    totals = telemetry_totals()[("gemini", MODEL, "translate:mednli")]
+    assert (totals["calls"], totals["hits"], totals["errors"], totals["attempts"]) == (2, 1, 0, 1)
+    assert totals["prompt_tokens"] > 0 and totals["cost_usd"] > 0
+
+    events = load_events(str(tmp_path), RUN_ID)
+    assert [e["cache"] for e in events] == ["miss", "hit"]
+    assert events[0]["prompt"] == events[1]["prompt"]
+    assert events[1]["prompt_tokens"] is None and events[1]["cost_usd"] is None
+    (key, summary), = summarize(events, ["model", "job"])
+    assert key == {"model": MODEL, "job": "translate:mednli"}
+    assert (summary["calls"], summary["hit_rate"]) == (2, 0.5)
+
+
+def test_failed_call_is_recorded_with_error_type(tmp_path):
+    with pytest.raises(TimeoutError):
+        with track("openai", "gpt-5.1", "system", "user"):
+            raise TimeoutError
+
+    event, = load_events(str(tmp_path), RUN_ID)
+    assert (event["status"], event["error"], event["cache"]) == ("error", "TimeoutError", "off")
+    assert telemetry_totals()[("openai", "gpt-5.1", None)]["errors"] == 1
@@ -0,0 +1,152 @@
+import csv
+import json
+import os
+
+import pytest
+
+from common import llm
+from common.cache import ResponseCache
+from common.corpus import load_rows
+from common.translation_units import TranslationUnits, Untranslated, fallback_path, read_fallbacks
+from mock_llm_server import MockLLMServer, gemini_client
+from repair import TRANSLATOR_SCRIPT, repair_translation
+from run_plan import load_script
+
+
+DIALECT_TEXT = "가심이 아프댄 햄수다"
+FAILING = "두통"
+SOURCE_ROWS = [
+    {"question_ko": "환자는 어디가 아픈가?", "mc1_choices_ko": "['가슴 통증', '두통']", "mc1_labels": "[1, 0]",
+     "mc2_choices_ko": "['가슴 통증', '복통']", "mc2_labels": "[1, 0]"},
+    {"question_ko": "무엇을 처방했는가?", "mc1_choices_ko": "['진통제', '두통약']", "mc1_labels": "[1, 0]",
+     "mc2_choices_ko": "['진통제', '수액']", "mc2_labels": "[1, 0]"},
+]
+
+
+@pytest.fixture
+def translator(tmp_path, monkeypatch):
+    monkeypatch.setattr(llm, "CACHE_ENABLED", True)
+    monkeypatch.setattr(llm, "_cache", ResponseCache(str(tmp_path / "cache.sqlite")))
+    with MockLLMServer(latency_ms=1, latency_sigma=0, mode="fixed", fixed_text=DIALECT_TEXT) as server:
+        module = load_script(TRANSLATOR_SCRIPT)
+        module.client = gemini_client(server.url)
+        module.RESUME = False
+        module.RPM = module.TPM = None
+        yield server, module
+
+
+def write_source(path):
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=list(SOURCE_ROWS[0]))
+        writer.writeheader()
+        writer.writerows(SOURCE_ROWS)
+    return str(path)
+
+
+def fail_on(module, monkeypatch, text):
+    """text 를 번역하는 요청만 API 오류"""
+    generate = module.gemini_generate
+
+    def flaky(client, model, contents, *args, **kwargs):
+        if contents.endswith(f"\n{text}"):
+            raise RuntimeError("503 UNAVAILABLE")
+        return generate(client, model, contents, *args, **kwargs)
+
+    monkeypatch.setattr(module, "gemini_generate", flaky)
+
+
+def test_fanout_is_opt_in():
+    assert load_script(TRANSLATOR_SCRIPT).FANOUT is False
+
+
+def test_untranslated_marker_survives_cell_assembly():
+    units = TranslationUnits([{"c": "['가', '나']"}], ["c"])
+    cell = units.assemble(0, lambda k: Untranslated(units.units[k]) if k == 1 else "번역")["c"]
+    assert isinstance(cell, Untranslated) and cell == "['번역', '나']"
+    assert not isinstance(units.assemble(0, lambda k: "번역")["c"], Untranslated)
+
+
+def test_failed_choice_is_logged_and_repaired(tmp_path, translator, monkeypatch):
+    server, module = translator
+    source = write_source(tmp_path / "truthfulqa_ko.csv")
+    output = str(tmp_path / "truthfulqa_Jeju.gemini-2.5-pro.csv")
+
+    with monkeypatch.context() as patch:
+        fail_on(module, patch, FAILING)
+        module.process_TruthfulQA(source, output, "Jeju")
+
+    # 선택지 하나만 원문 그대로 — 셀 전체 유사도로는 안 잡히므로 .fallback 에 행 번호를 남김
+    _, rows = load_rows(output)
+    assert rows[0]["mc1_choices_Jeju"] == str([DIALECT_TEXT, FAILING])
+    assert read_fallbacks(output) == {0}
+
+    server.state.reset()
+    result = repair_translation(output, {"dataset": "truthfulqa", "dialect": "Jeju"}, {"truthfulqa": source},
+                                {TRANSLATOR_SCRIPT: module}, threshold=0.9, dry_run=False)
+
+    assert (result["flagged"], result["fixed"]) == (1, 1)
+    assert result["reasons"] == {"fallback": 1}
+    _, rows = load_rows(output)
+    assert rows[0]["mc1_choices_Jeju"] == str([DIALECT_TEXT, DIALECT_TEXT])
+    assert not os.path.exists(fallback_path(output))
+
+
+def test_fallback_log_keeps_rows_that_fail_again(tmp_path, translator, monkeypatch):
+    _, module = translator
+    source = write_source(tmp_path / "truthfulqa_ko.csv")
+    output = str(tmp_path / "truthfulqa_Jeju.gemini-2.5-pro.csv")
+    fail_on(module, monkeypatch, FAILING)
+    module.process_TruthfulQA(source, output, "Jeju")
+
+    result = repair_translation(output, {"dataset": "truthfulqa", "dialect": "Jeju"}, {"truthfulqa": source},
+                                {TRANSLATOR_SCRIPT: module}, threshold=0.9, dry_run=False)
+
+    assert (result["flagged"], result["fixed"]) == (1, 0)
+    assert read_fallbacks(output) == {0}
+
+
+#############################################
+# fan-out — 응답 JSON 에 빠진 방언만 방언별 요청으로
+#############################################
+def fake_generate(calls, fanout_answer, failing_dialect=None):
+    def generate(client, model, contents, system_instruction=None, prefix_cache=None, **kwargs):
+        task, dialect = prefix_cache
+        calls.append(prefix_cache)
+        if task == "translate_fanout":
+            return json.dumps(fanout_answer, ensure_ascii=False)
+        if dialect == failing_dialect:
+            raise RuntimeError("503 UNAVAILABLE")
+        return f"{dialect} 번역"
+    return generate
+
+
+def test_fanout_falls_back_per_missing_dialect(monkeypatch):
+    module = load_script(TRANSLATOR_SCRIPT)
+    calls = []
+    monkeypatch.setattr(module, "gemini_generate", fake_generate(calls, {"Jeju": "제주 번역", "Jeolla": " "}))
+    dialects = list(module.DIALECT_NAMES)
+
+    result = module.translate_all_dialects("환자는 통증이 있다.", dialects)
+
+    assert result == {"Jeju": "제주 번역", "Gyeongsang": "Gyeongsang 번역", "Jeolla": "Jeolla 번역",
+                      "Chungcheong": "Chungcheong 번역"}
+    # 한 번의 fan-out 요청 + 빠지거나 빈 방언 3개만 따로
+    assert calls == [("translate_fanout", "+".join(dialects))] + [("translate", d) for d in dialects[1:]]
+    assert module.translate_all_dialects("", dialects) == dict.fromkeys(dialects, "")
+
+
+def test_fanout_job_logs_fallbacks_only_for_the_failed_dialect(tmp_path, monkeypatch):
+    module = load_script(TRANSLATOR_SCRIPT)
+    module.RESUME = False
+    module.RPM = module.TPM = None
+    monkeypatch.setattr(module, "gemini_generate", fake_generate([], {"Jeju": "제주 번역"}, failing_dialect="Jeolla"))
+    source = write_source(tmp_path / "truthfulqa_ko.csv")
+    outputs = {d: str(tmp_path / f"truthfulqa_{d}.csv") for d in ("Jeju", "Jeolla")}
+
+    module.process_fanout(source, outputs, module.TRUTHFULQA_COLUMNS, module.truthfulqa_fieldnames,
+                          module.truthfulqa_row)
+
+    assert read_fallbacks(outputs["Jeju"]) == set()
+    assert read_fallbacks(outputs["Jeolla"]) == {0, 1}
+    _, rows = load_rows(outputs["Jeolla"])
+    assert rows[1]["question_Jeolla"] == SOURCE_ROWS[1]["question_ko"]
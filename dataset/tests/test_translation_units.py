@@ -0,0 +1,60 @@
+import threading
+
+from common.translation_units import TranslationUnits, split_cell
+from run_plan import load_script
+
+
+ROWS = [
+    {"question_ko": "아픈 곳은?", "mc1_choices_ko": "['두통', '복통']"},
+    {"question_ko": "아픈 곳은?", "mc1_choices_ko": "['복통', '요통', '']"},
+    {"question_ko": "", "mc1_choices_ko": "['두통']"},
+]
+COLUMNS = ["question_ko", "mc1_choices_ko"]
+
+
+def test_split_cell():
+    assert split_cell("['a', 'b']") == ("list", ["a", "b"])
+    assert split_cell("[1, 2]") == ("text", ["[1, 2]"])
+    assert split_cell("['깨진") == ("text", ["['깨진"])
+    assert split_cell(None) == ("text", [""])
+
+
+def test_units_are_unique_across_rows_and_columns():
+    units = TranslationUnits(ROWS, COLUMNS)
+
+    assert units.units == ["아픈 곳은?", "두통", "복통", "요통"]
+    assert units.total == 7
+    assert units.dedup_ratio == 4 / 7
+    # 행을 조립하려면 필요한 마지막 unit — 행 2 는 앞에서 이미 번역한 것만 필요
+    assert units.ready_at == {0: 2, 1: 3, 2: 1}
+
+
+def test_assemble_restores_the_cell_shape():
+    units = TranslationUnits(ROWS, COLUMNS)
+    wrap = lambda k: f"<{units.units[k]}>"
+
+    assert units.assemble(1, wrap) == {"question_ko": "<아픈 곳은?>", "mc1_choices_ko": "['<복통>', '<요통>', '']"}
+    assert units.assemble(2, wrap) == {"question_ko": "", "mc1_choices_ko": "['<두통>']"}
+
+
+def test_start_skips_rows_already_written():
+    units = TranslationUnits(ROWS, COLUMNS, start=2)
+    assert units.units == ["두통"] and list(units.ready_at) == [2]
+
+
+def test_translate_rows_translates_each_unit_once_and_writes_rows_in_order():
+    module = load_script("gemini/gemini_translate.py")
+    module.RPM = module.TPM = None
+    lock, calls, written = threading.Lock(), [], []
+
+    def translate(text):
+        with lock:
+            calls.append(text)
+        return f"<{text}>"
+
+    module.translate_rows(ROWS, COLUMNS, translate, lambda i, row, translated: written.append((i, translated)),
+                          desc="test")
+
+    assert sorted(calls) == sorted(["아픈 곳은?", "두통", "복통", "요통"])
+    assert [i for i, _ in written] == [0, 1, 2]
+    assert written[0][1] == {"question_ko": "<아픈 곳은?>", "mc1_choices_ko": "['<두통>', '<복통>']"}